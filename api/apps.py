@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Registra las invalidaciones de cache: usuarios JWT (post_save/post_delete
+        # de User) y roles (m2m_changed de User.groups, cambios en Group).
+        # api.fx lleva cada cambio de FxRate a FxRateHistorico e invalida su cache.
+        # api.busqueda y api.versiones reparan sus triggers tras migrate (SQLite).
+        # core.sqlite aplica los PRAGMAs de SQLite en cada conexión nueva.
+        from . import authentication, busqueda, fx, permissions, versiones  # noqa: F401
+        from core import sqlite  # noqa: F401
@@ -0,0 +1,151 @@
+# api/authentication.py
+import copy
+import hashlib
+import threading
+import time
+
+import jwt
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+User = get_user_model()
+
+# Segundos que un token ya validado se resuelve sin volver a la BD (nunca más allá de su exp)
+JWT_USER_CACHE_TTL = float(getattr(settings, "JWT_USER_CACHE_TTL", 30))
+JWT_USER_CACHE_MAX = int(getattr(settings, "JWT_USER_CACHE_MAX", 10000))
+# Alias de un cache COMPARTIDO entre workers con la versión de cada usuario:
+# desactivar o editar una cuenta sube su versión y las copias de todos los
+# procesos dejan de valer. Vacío = sin cache entre requests (solo por request).
+JWT_USER_CACHE = getattr(settings, "JWT_USER_CACHE", "")
+
+# jti -> (sha256 del token, user, validated_token, vence_en, versión del usuario)
+_cache: dict[str, tuple[str, object, object, float, int]] = {}
+_lock = threading.Lock()
+
+
+def _versiones():
+    return caches[JWT_USER_CACHE] if JWT_USER_CACHE and JWT_USER_CACHE_TTL > 0 else None
+
+
+def _clave_version(user_id) -> str:
+    return f"jwt:v:{user_id}"
+
+
+def _jti_sin_verificar(raw_token: str):
+    """Lee el jti sin verificar la firma: solo se usa como clave de búsqueda."""
+    try:
+        return jwt.decode(raw_token, options={"verify_signature": False}).get("jti")
+    except Exception:
+        return None
+
+
+def _guardar(jti: str, digest: str, user, validated, exp, version: int) -> None:
+    if _versiones() is None:
+        return
+    vence = time.time() + JWT_USER_CACHE_TTL
+    if exp:
+        vence = min(vence, float(exp))
+    with _lock:
+        if len(_cache) >= JWT_USER_CACHE_MAX:
+            ahora = time.time()
+            for k in [k for k, v in _cache.items() if v[3] <= ahora]:
+                del _cache[k]
+            if len(_cache) >= JWT_USER_CACHE_MAX:
+                _cache.clear()
+        _cache[jti] = (digest, user, validated, vence, version)
+
+
+def invalidar_usuario(user_id) -> None:
+    """Descarta los tokens cacheados de un usuario (cambios de cuenta, borrado) en todos los workers."""
+    with _lock:
+        for k in [k for k, v in _cache.items() if getattr(v[1], "pk", None) == user_id]:
+            del _cache[k]
+    versiones = _versiones()
+    if versiones is not None:
+        clave = _clave_version(user_id)
+        versiones.add(clave, 0, timeout=None)
+        try:
+            versiones.incr(clave)
+        except ValueError:  # expulsada entre add() e incr()
+            versiones.set(clave, 1, timeout=None)
+
+
+def resolver_usuario_jwt(request, raw_token, auth: JWTAuthentication | None = None):
+    """
+    Devuelve (user, validated_token) para un access token.
+
+    1) Cache del request: el middleware y las vistas DRF comparten el resultado.
+    2) Cache del proceso por jti: solo acierta si el token es idéntico (sha256)
+       al ya validado, no superó JWT_USER_CACHE_TTL ni su exp y la versión del
+       usuario en el cache compartido JWT_USER_CACHE no cambió.
+    3) Validación completa de SimpleJWT + consulta del usuario.
+
+    Lanza las mismas excepciones que JWTAuthentication (InvalidToken, AuthenticationFailed).
+    """
+    if isinstance(raw_token, bytes):
+        raw_token = raw_token.decode("utf-8")
+
+    django_request = getattr(request, "_request", request)
+    scoped = getattr(django_request, "_jwt_user_cache", None)
+    if scoped is None:
+        scoped = {}
+        django_request._jwt_user_cache = scoped
+    if raw_token in scoped:
+        return scoped[raw_token]
+
+    digest = hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
+    versiones = _versiones()
+    jti = _jti_sin_verificar(raw_token) if versiones is not None else None
+    if jti:
+        with _lock:
+            hit = _cache.get(jti)
+        if (hit and hit[0] == digest and time.time() < hit[3]
+                and versiones.get(_clave_version(hit[1].pk), 0) == hit[4]):
+            # Copia por request: el objeto cacheado se comparte entre hilos
+            result = (copy.copy(hit[1]), hit[2])
+            scoped[raw_token] = result
+            return result
+
+    auth = auth or JWTAuthentication()
+    validated = auth.get_validated_token(raw_token)
+    # Versión leída ANTES que el usuario: una invalidación concurrente deja la copia vieja
+    claim = validated.get(jwt_settings.USER_ID_CLAIM)
+    version = versiones.get(_clave_version(claim), 0) if versiones is not None and claim is not None else 0
+    user = auth.get_user(validated)
+
+    jti = validated.get("jti")
+    if jti and versiones is not None and str(user.pk) == str(claim):
+        # Se guarda una copia: lo que el request cuelgue de `user` (roles, caches
+        # de relaciones) no debe viajar a los requests siguientes.
+        _guardar(jti, digest, copy.copy(user), validated, validated.get("exp"), version)
+
+    result = (user, validated)
+    scoped[raw_token] = result
+    return result
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que reutiliza la resolución de resolver_usuario_jwt."""
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        user, validated = resolver_usuario_jwt(request, raw_token, auth=self)
+        return user, validated
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _invalidar_cache_jwt(sender, instance, **kwargs):
+    invalidar_usuario(instance.pk)
@@ -0,0 +1,219 @@
+# api/busqueda.py — búsqueda de texto en razon_social / observaciones
+#
+# `razon_social__icontains` es un LIKE '%x%': recorre la tabla entera en cada
+# búsqueda. Aquí cada término es un prefijo sin tildes ni mayúsculas (igual que
+# _norm en la carga masiva) resuelto con un índice de texto:
+#
+#   SQLite      tabla FTS5 "external content" (api_calificacion_fts) con
+#               tokenize unicode61 remove_diacritics 2 e índices de prefijo,
+#               sincronizada por triggers (también para bulk_create/update()).
+#   PostgreSQL  índice GIN sobre nuamx_fts_doc(razon_social, observaciones):
+#               tsvector 'simple' del texto en minúsculas y sin tildes
+#               (razon_social con peso A, observaciones con peso B).
+#
+# Otros motores: icontains por término (sin índice).
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
+from django.db.models.expressions import RawSQL
+
+TABLA = "api_calificacion"
+FTS = "api_calificacion_fts"
+COLUMNAS = ("razon_social", "observaciones")
+MAX_TERMINOS = 8
+# Autocompletar: largo mínimo del último término (un prefijo de 1-2 letras
+# coincide con media tabla) y filas candidatas que se ordenan por relevancia.
+# Rankear TODAS las coincidencias cuesta O(coincidencias); con el tope, el
+# costo queda acotado y se ordena lo primero que entrega el índice.
+MIN_PREFIJO_AUTOCOMPLETAR = 3
+MAX_CANDIDATOS = 500
+
+# Mismas letras que quita NFKD + combining en Python, para el índice de PostgreSQL.
+# Se traduce antes de lower(): con locale C, lower() no toca las letras no ASCII.
+_CON_TILDE = "áàäâãåéèëêíìïîóòöôõúùüûñçý" "ÁÀÄÂÃÅÉÈËÊÍÌÏÎÓÒÖÔÕÚÙÜÛÑÇÝ"
+_SIN_TILDE = "aaaaaaeeeeiiiiooooouuuuncy" "aaaaaaeeeeiiiiooooouuuuncy"
+
+
+# ====== Términos ======
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin tildes (como _norm de la carga masiva)."""
+    texto = (texto or "").strip().lower()
+    return "".join(c for c in unicodedata.normalize("NFKD", texto) if not unicodedata.combining(c))
+
+
+def terminos(texto: str) -> list[str]:
+    """Palabras alfanuméricas normalizadas; solo estas llegan a MATCH / to_tsquery."""
+    return re.findall(r"[a-z0-9]+", normalizar(texto))[:MAX_TERMINOS]
+
+
+def _expr_sqlite(terms, columnas) -> str:
+    # "termino"* AND ... limitado a las columnas pedidas
+    prefijos = " AND ".join(f'"{t}"*' for t in terms)
+    return f"{{{' '.join(columnas)}}} : ({prefijos})"
+
+
+def _expr_pg(terms, columnas) -> str:
+    pesos = "".join("A" if c == "razon_social" else "B" for c in columnas)
+    return " & ".join(f"{t}:*{pesos}" for t in terms)
+
+
+# ====== Filtro y relevancia ======
+def filtrar_texto(qs, texto: str, columnas=COLUMNAS, relevancia: bool = False):
+    """
+    Filas de `qs` cuyo texto contiene todos los términos de `texto` como prefijo.
+    Con relevancia=True anota `relevancia` (mayor = mejor) para ordenar.
+    """
+    terms = terminos(texto)
+    if not terms:
+        return qs
+    vendor = connections[qs.db].vendor
+    if vendor == "sqlite":
+        expr = _expr_sqlite(terms, columnas)
+        if relevancia:
+            # JOIN con la tabla FTS5: un solo MATCH y el rank (bm25, negativo = mejor) de
+            # cada fila. Una subconsulta correlacionada repetiría el MATCH por fila
+            # (segundos con prefijos comunes); el ORM no tiene otra forma de este JOIN.
+            return qs.extra(
+                tables=[FTS],
+                where=[f'{FTS}.rowid = "{TABLA}"."id"', f"{FTS} MATCH %s"],
+                params=[expr],
+                select={"relevancia": f"-{FTS}.rank"},
+            )
+        return qs.filter(id__in=RawSQL(f"SELECT rowid FROM {FTS} WHERE {FTS} MATCH %s", [expr]))
+    if vendor == "postgresql":
+        expr = _expr_pg(terms, columnas)
+        doc = f'nuamx_fts_doc("{TABLA}"."razon_social", "{TABLA}"."observaciones")'
+        qs = qs.filter(RawSQL(f"{doc} @@ to_tsquery('simple', %s)", [expr], output_field=BooleanField()))
+        if relevancia:
+            qs = qs.annotate(relevancia=RawSQL(
+                f"ts_rank({doc}, to_tsquery('simple', %s))", [expr], output_field=FloatField(),
+            ))
+        return qs
+    for t in terms:
+        cond = Q()
+        for c in columnas:
+            cond |= Q(**{f"{c}__icontains": t})
+        qs = qs.filter(cond)
+    return qs
+
+
+def buscar_ids(texto: str, limite: int = 20, columnas=COLUMNAS, using: str = "default") -> list[int]:
+    """
+    Ids de las `limite` filas más relevantes entre las primeras MAX_CANDIDATOS
+    coincidencias, directo sobre el índice (para autocompletar). [] si el último
+    término tiene menos de MIN_PREFIJO_AUTOCOMPLETAR letras.
+    """
+    terms = terminos(texto)
+    if not terms or len(terms[-1]) < MIN_PREFIJO_AUTOCOMPLETAR:
+        return []
+    candidatos = max(MAX_CANDIDATOS, limite)
+    conn = connections[using]
+    with conn.cursor() as cur:
+        if conn.vendor == "sqlite":
+            cur.execute(
+                f"SELECT rowid FROM (SELECT rowid, rank FROM {FTS} WHERE {FTS} MATCH %s LIMIT %s) "
+                f"ORDER BY rank LIMIT %s",
+                [_expr_sqlite(terms, columnas), candidatos, limite],
+            )
+        elif conn.vendor == "postgresql":
+            cur.execute(
+                f"SELECT id FROM ("
+                f"SELECT id, nuamx_fts_doc(razon_social, observaciones) AS doc FROM {TABLA} "
+                f"WHERE nuamx_fts_doc(razon_social, observaciones) @@ to_tsquery('simple', %s) LIMIT %s"
+                f") c ORDER BY ts_rank(doc, to_tsquery('simple', %s)) DESC, id DESC LIMIT %s",
+                [_expr_pg(terms, columnas), candidatos, _expr_pg(terms, columnas), limite],
+            )
+        else:
+            from .models import Calificacion
+
+            qs = filtrar_texto(Calificacion.objects.using(using), texto, columnas).order_by("-id")
+            return list(qs.values_list("id", flat=True)[:limite])
+        return [fila[0] for fila in cur.fetchall()]
+
+
+# ====== Esquema (migración y post_migrate) ======
+_SQLITE_FTS = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS} USING fts5(
+    razon_social, observaciones,
+    content='{TABLA}', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+)"""
+_SQLITE_TRIGGERS = {
+    f"{FTS}_ai": f"""
+CREATE TRIGGER IF NOT EXISTS {FTS}_ai AFTER INSERT ON {TABLA} BEGIN
+    INSERT INTO {FTS}(rowid, razon_social, observaciones) VALUES (new.id, new.razon_social, new.observaciones);
+END""",
+    f"{FTS}_ad": f"""
+CREATE TRIGGER IF NOT EXISTS {FTS}_ad AFTER DELETE ON {TABLA} BEGIN
+    INSERT INTO {FTS}({FTS}, rowid, razon_social, observaciones)
+    VALUES ('delete', old.id, old.razon_social, old.observaciones);
+END""",
+    f"{FTS}_au": f"""
+CREATE TRIGGER IF NOT EXISTS {FTS}_au AFTER UPDATE OF razon_social, observaciones ON {TABLA} BEGIN
+    INSERT INTO {FTS}({FTS}, rowid, razon_social, observaciones)
+    VALUES ('delete', old.id, old.razon_social, old.observaciones);
+    INSERT INTO {FTS}(rowid, razon_social, observaciones) VALUES (new.id, new.razon_social, new.observaciones);
+END""",
+}
+
+_PG_FUNCION = f"""
+CREATE OR REPLACE FUNCTION nuamx_fts_doc(razon text, obs text) RETURNS tsvector
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT setweight(to_tsvector('simple', lower(translate(coalesce(razon, ''), '{_CON_TILDE}', '{_SIN_TILDE}'))), 'A')
+        || setweight(to_tsvector('simple', lower(translate(coalesce(obs, ''), '{_CON_TILDE}', '{_SIN_TILDE}'))), 'B')
+$$"""
+_PG_INDICE = f"CREATE INDEX IF NOT EXISTS api_calif_fts_gin_idx ON {TABLA} USING GIN (nuamx_fts_doc(razon_social, observaciones))"
+
+
+def asegurar_indice_texto(schema_editor=None, using: str = "default", solo_reparar: bool = False) -> bool:
+    """
+    Crea (si faltan) la tabla FTS5 y sus triggers, o la función e índice GIN,
+    y reconstruye el índice de SQLite si faltaba algo. Devuelve True si creó algo.
+    Con solo_reparar=True no crea la tabla FTS5 si no existe (migración sin aplicar).
+    """
+    conn = schema_editor.connection if schema_editor else connections[using]
+    with conn.cursor() as cur:
+        if conn.vendor == "sqlite":
+            cur.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') AND name LIKE %s", [f"{FTS}%"])
+            existentes = {fila[0] for fila in cur.fetchall()}
+            faltan = [n for n in (FTS, *_SQLITE_TRIGGERS) if n not in existentes]
+            if not faltan or (solo_reparar and FTS in faltan):
+                return False
+            cur.execute(_SQLITE_FTS)
+            for sql in _SQLITE_TRIGGERS.values():
+                cur.execute(sql)
+            cur.execute(f"INSERT INTO {FTS}({FTS}) VALUES ('rebuild')")
+            print(f"[BUSQUEDA] Índice de texto reconstruido en {conn.alias!r} (faltaba: {', '.join(faltan)})")
+            return True
+        if conn.vendor == "postgresql":
+            cur.execute("SELECT to_regclass('api_calif_fts_gin_idx') IS NULL")
+            if not cur.fetchone()[0]:
+                return False
+            cur.execute(_PG_FUNCION)
+            cur.execute(_PG_INDICE)
+            return True
+    return False
+
+
+def borrar_indice_texto(schema_editor) -> None:
+    conn = schema_editor.connection
+    with conn.cursor() as cur:
+        if conn.vendor == "sqlite":
+            for nombre in _SQLITE_TRIGGERS:
+                cur.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+            cur.execute(f"DROP TABLE IF EXISTS {FTS}")
+        elif conn.vendor == "postgresql":
+            cur.execute("DROP INDEX IF EXISTS api_calif_fts_gin_idx")
+            cur.execute("DROP FUNCTION IF EXISTS nuamx_fts_doc(text, text)")
+
+
+@receiver(post_migrate, dispatch_uid="api.busqueda.reparar_triggers")
+def _reparar_triggers(sender, using="default", **kwargs):
+    # En SQLite, Django rehace la tabla (CREATE new__ + DROP + RENAME) en varios
+    # ALTER de migraciones futuras: los triggers se van con la tabla vieja.
+    if getattr(sender, "name", None) == "api" and connections[using].vendor == "sqlite":
+        asegurar_indice_texto(using=using, solo_reparar=True)
@@ -1,7 +1,12 @@
 from django.urls import path
-from .views import CalificacionTemplateView
+
+from core.lazy_imports import lazy_view
 
 urlpatterns = [
     # Ruta absoluta /api/calificaciones/template/ gracias a cómo la incluimos en core/urls.py
-    path("api/calificaciones/template/", CalificacionTemplateView.as_view(), name="calificaciones-template"),
+    path(
+        "api/calificaciones/template/",
+        lazy_view("api.views.carga_masiva.CalificacionTemplateView", csrf_exempt=True),
+        name="calificaciones-template",
+    ),
 ]
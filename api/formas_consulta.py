@@ -0,0 +1,105 @@
+# api/formas_consulta.py — consultas "calientes" sobre api_calificacion
+#
+# Arma los querysets reales de las vistas (get_queryset del ViewSet, _filtrar
+# de reportes, stats) para cada combinación de filtros, sin ejecutarlos.
+# Los usan `manage.py planes_consulta` (EXPLAIN de cada forma) y los tests que
+# fallan si una forma cae en un recorrido completo de la tabla.
+from dataclasses import dataclass
+from itertools import combinations
+from urllib.parse import urlencode
+
+from django.db.models import Count, Sum
+from django.http import HttpRequest, QueryDict
+from rest_framework.request import Request
+
+from core.ventanas import filtro_ventana, hoy_local
+
+# Filtros de la UI que pueden resolverse con índice (valor de ejemplo por filtro)
+FILTROS = {
+    "periodo": {"pdesde": "2025-01", "phasta": "2025-06"},
+    "estado": {"estado": "Válida"},
+    "tipo": {"tipo": "Factura"},
+    "moneda": {"moneda": "USD"},
+    "no_inscritos": {"noi": "1"},
+    "texto": {"q": "empresa"},  # índice de texto (api/busqueda.py)
+}
+# rut (REPLACE(...) LIKE '%x%') nunca usa un índice B-tree: se informa en el
+# comando, pero no se exige.
+NO_INDEXABLES = {"rut": {"rut": "12345678"}}
+
+
+@dataclass
+class Forma:
+    nombre: str
+    qs: object
+    filtrada: bool  # True si tiene al menos un filtro indexable
+    # Motivo por el que no puede usar índice (la columna va envuelta en una función)
+    no_sargable: str = ""
+
+
+def problema(forma: Forma, plan) -> str:
+    """Por qué el plan de `forma` no es aceptable ("" si lo es). `plan` viene de core.query_plan.analizar."""
+    if forma.no_sargable:
+        return f"no sargable ({forma.no_sargable})"
+    if forma.filtrada and plan.scan_completo:
+        return "recorre la tabla entera"
+    if forma.filtrada and not plan.busca_por_indice:
+        return "recorre un índice entero sin usar el filtro"
+    if not forma.filtrada and plan.ordena_en_memoria:
+        return "ordena la tabla entera en memoria"
+    return ""
+
+
+def _request(params: dict) -> Request:
+    http = HttpRequest()
+    http.method = "GET"
+    http.GET = QueryDict(urlencode(params))
+    return Request(http)
+
+
+def _combinaciones(maximo=None):
+    nombres = list(FILTROS)
+    for n in range(0, (maximo or len(nombres)) + 1):
+        for combo in combinations(nombres, n):
+            params = {}
+            for nombre in combo:
+                params.update(FILTROS[nombre])
+            yield combo, params
+
+
+def _listado(params: dict):
+    from .views.calificaciones import CalificacionViewSet
+
+    vista = CalificacionViewSet(action="list", request=_request(params), format_kwarg=None, kwargs={})
+    return vista.filter_queryset(vista.get_queryset())
+
+
+def formas(no_indexables: bool = False):
+    """Todas las formas: listado (todas las combinaciones), export, reportes, enriquecer y stats."""
+    from .models import SIN_RAZON_SOCIAL, Calificacion
+    from .views.calificaciones import CalificacionViewSet
+    from .views.reportes import ReporteExportView
+
+    for combo, params in _combinaciones():
+        yield Forma(f"listado[{'+'.join(combo) or '-'}]", _listado(params), bool(combo))
+
+    for combo, params in _combinaciones(maximo=1):
+        nombre = "+".join(combo) or "-"
+        yield Forma(f"export_csv[{nombre}]", _listado(params).order_by("id"), bool(combo))
+        vista = ReporteExportView()
+        inicio, fin = vista._rango("mensual")
+        qs = vista._filtrar(_request(params)).filter(**filtro_ventana("created_at", inicio, fin)).order_by("id")
+        yield Forma(f"reporte_mensual[{nombre}]", qs, True)
+        if not combo:
+            resumen = qs.order_by().values("moneda").annotate(docs=Count("id"), suma=Sum("monto"), suma_clp=Sum("monto_clp"))
+            yield Forma("reporte_mensual[resumen]", resumen, True)
+
+    yield Forma("enriquecer", Calificacion.objects.filter(SIN_RAZON_SOCIAL).order_by("id").values("id", "rut", "razon_social")[:500], True)
+
+    # Las mismas consultas que ejecuta CalificacionViewSet.stats
+    for nombre, qs in CalificacionViewSet.consultas_stats(hoy_local()).items():
+        yield Forma(f"stats[{nombre}]", qs, nombre.endswith("_14d"))
+
+    if no_indexables:
+        for nombre, params in NO_INDEXABLES.items():
+            yield Forma(f"listado[{nombre}]", _listado(params), True, "LIKE '%x%' sobre la columna")
@@ -0,0 +1,244 @@
+# api/fx.py — conversión a CLP con historial de tasas
+#
+# Cada calificación guarda su monto en su propia moneda (`monto`) y, además,
+# el equivalente en CLP (`monto_clp`) con la tasa usada (`fx_clp_per_unit`).
+# Así los totales entre monedas son un SUM en SQL.
+#
+# La tasa es la vigente al cierre del período de la calificación, según
+# FxRateHistorico (code, vigente_desde, clp_per_unit). FxRate es la tasa "de
+# hoy": al cambiarla se agrega una fila al historial vigente desde hoy, de modo
+# que los períodos anteriores conservan su tasa. Las consultas "tasa de X al
+# período P" se responden en memoria (TablaFx: arreglos ordenados + bisect).
+import calendar
+import datetime
+import threading
+import time
+from bisect import bisect_right
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BigIntegerField, DecimalField, F, Max, Min, Value
+from django.db.models.functions import Cast, Round
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+MONEDA_BASE = "CLP"
+UNO = Decimal("1")
+# Vigencia de la primera tasa conocida de una moneda: rige hacia atrás
+FECHA_INICIAL = datetime.date(1970, 1, 1)
+
+
+# ====== Período → fecha ======
+@lru_cache(maxsize=1024)
+def fecha_de_periodo(periodo: str | None) -> datetime.date | None:
+    """'YYYY-MM' → último día del mes (la tasa es la vigente al cierre). None si no es válido."""
+    try:
+        anio, mes = (int(x) for x in (periodo or "").strip().split("-"))
+        return datetime.date(anio, mes, calendar.monthrange(anio, mes)[1])
+    except (ValueError, TypeError):
+        return None
+
+
+# ====== Tabla en memoria ======
+class TablaFx:
+    """
+    Historial de tasas como arreglos paralelos (fechas, tasas) por moneda,
+    ordenados por fecha: la tasa a una fecha es un bisect, O(log n) y sin
+    consultas. Se construye con una sola consulta (ver tabla_fx()).
+    """
+
+    __slots__ = ("_series",)
+
+    def __init__(self, filas):
+        series = defaultdict(list)
+        for code, desde, tasa in filas:
+            series[code.upper()].append((desde, Decimal(tasa)))
+        self._series = {}
+        for code, puntos in series.items():
+            puntos.sort()
+            self._series[code] = ([d for d, _ in puntos], [t for _, t in puntos])
+
+    def tasa(self, moneda: str | None, fecha: datetime.date | None = None) -> Decimal | None:
+        """CLP por unidad de `moneda` vigente a `fecha` (hoy si es None); None si no hay."""
+        moneda = (moneda or MONEDA_BASE).upper()
+        if moneda == MONEDA_BASE:
+            return UNO
+        serie = self._series.get(moneda)
+        if serie is None:
+            return None
+        fechas, tasas = serie
+        i = bisect_right(fechas, fecha or timezone.localdate())
+        return tasas[i - 1] if i else None
+
+    def vigentes(self) -> dict[str, Decimal]:
+        hoy = timezone.localdate()
+        tasas = {code: self.tasa(code, hoy) for code in self._series}
+        tasas[MONEDA_BASE] = UNO
+        return {code: t for code, t in tasas.items() if t is not None}
+
+    def __len__(self):
+        return sum(len(fechas) for fechas, _ in self._series.values())
+
+
+# ====== Cache del proceso ======
+# TTL corto: otro worker puede cambiar una tasa; en este proceso se invalida al guardar.
+FX_CACHE_TTL = float(getattr(settings, "FX_CACHE_TTL", 60))
+
+_tabla: TablaFx | None = None
+_tabla_expira = 0.0
+_tabla_lock = threading.Lock()
+
+
+def tabla_fx() -> TablaFx:
+    """Todo FxRateHistorico en memoria, en UNA consulta (cacheada FX_CACHE_TTL segundos)."""
+    global _tabla, _tabla_expira
+    with _tabla_lock:
+        if _tabla is not None and time.monotonic() < _tabla_expira:
+            return _tabla
+    from .models import FxRateHistorico
+
+    tabla = TablaFx(FxRateHistorico.objects.order_by().values_list("code", "vigente_desde", "clp_per_unit"))
+    with _tabla_lock:
+        _tabla, _tabla_expira = tabla, time.monotonic() + FX_CACHE_TTL
+    return tabla
+
+
+def invalidar_tasas() -> None:
+    global _tabla
+    with _tabla_lock:
+        _tabla = None
+
+
+def tasas_clp() -> dict[str, Decimal]:
+    """{código: CLP por unidad} vigentes hoy."""
+    return tabla_fx().vigentes()
+
+
+def tasa_clp(moneda: str, periodo: str | None = None) -> Decimal | None:
+    """CLP por unidad de `moneda` al cierre de `periodo` (hoy si no hay período válido)."""
+    return tabla_fx().tasa(moneda, fecha_de_periodo(periodo))
+
+
+def tasa_en_bd(moneda: str, fecha: datetime.date) -> Decimal | None:
+    """Lo mismo que TablaFx.tasa pero en SQL (usa el índice único code, vigente_desde)."""
+    from .models import FxRateHistorico
+
+    moneda = (moneda or MONEDA_BASE).upper()
+    if moneda == MONEDA_BASE:
+        return UNO
+    return (
+        FxRateHistorico.objects.filter(code=moneda, vigente_desde__lte=fecha)
+        .order_by("-vigente_desde").values_list("clp_per_unit", flat=True).first()
+    )
+
+
+def a_clp(monto, tasa: Decimal | None) -> int | None:
+    """monto × tasa redondeado a entero (mitad hacia arriba, igual que ROUND en SQL)."""
+    if tasa is None or monto is None:
+        return None
+    monto = Decimal(str(monto)) if isinstance(monto, float) else Decimal(monto)
+    return int((monto * tasa).quantize(UNO, rounding=ROUND_HALF_UP))
+
+
+def convertir_lote(items, tabla: TablaFx | None = None) -> list[tuple[int | None, Decimal | None]]:
+    """
+    Convierte muchas tuplas (monto, moneda, periodo) de una vez, para la carga
+    masiva y los reportes: una sola lectura de la tabla (o ninguna si está en
+    cache). Devuelve [(monto_clp, tasa)] en el mismo orden; (None, None) sin tasa.
+    """
+    tabla = tabla or tabla_fx()
+    salida = []
+    for monto, moneda, periodo in items:
+        tasa = tabla.tasa(moneda, fecha_de_periodo(periodo))
+        salida.append((a_clp(monto, tasa), tasa))
+    return salida
+
+
+# ====== Recalcular en lote ======
+def _valores(tasa: Decimal | None) -> dict:
+    if tasa is None:
+        return {"monto_clp": None, "fx_clp_per_unit": None}
+    if tasa == UNO:
+        return {"monto_clp": F("monto"), "fx_clp_per_unit": UNO}
+    factor = Value(tasa, output_field=DecimalField(max_digits=12, decimal_places=4))
+    return {"monto_clp": Cast(Round(F("monto") * factor), BigIntegerField()), "fx_clp_per_unit": tasa}
+
+
+def recalcular_monto_clp(modelo=None, tasas: dict | None = None, monedas=None, lote: int = 5000, log=print) -> dict:
+    """
+    Rehace monto_clp / fx_clp_per_unit con UPDATEs en SQL por moneda, por tasa
+    (los períodos con la misma tasa vigente van juntos) y por rangos de id
+    (cada lote en su transacción: no bloquea la tabla entera). Filas sin tasa
+    quedan en NULL. `tasas` ({código: tasa}, una por moneda para todos los
+    períodos) y `modelo` permiten usarlo desde una migración con los modelos
+    históricos. Devuelve {moneda: filas}.
+    """
+    if modelo is None:
+        from .models import Calificacion as modelo
+    tabla = None
+    if tasas is None:
+        invalidar_tasas()
+        tabla = tabla_fx()
+    rango = modelo.objects.aggregate(desde=Min("id"), hasta=Max("id"))
+    if rango["desde"] is None:
+        return {}
+    if monedas is None:
+        monedas = sorted(set(modelo.objects.values_list("moneda", flat=True).distinct()))
+
+    resultado = {}
+    for moneda in monedas:
+        moneda = moneda.upper()
+        if tabla is None:
+            grupos = {tasas.get(moneda): None}  # None = todos los períodos
+        else:
+            grupos = defaultdict(list)
+            for periodo in modelo.objects.filter(moneda=moneda).values_list("periodo", flat=True).distinct():
+                grupos[tabla.tasa(moneda, fecha_de_periodo(periodo))].append(periodo)
+        filas = sin_tasa = 0
+        for tasa, periodos in grupos.items():
+            qs = modelo.objects.filter(moneda=moneda)
+            if periodos is not None:
+                qs = qs.filter(periodo__in=periodos)
+            valores = _valores(tasa)
+            for desde in range(rango["desde"], rango["hasta"] + 1, lote):
+                with transaction.atomic():
+                    n = qs.filter(id__gte=desde, id__lt=desde + lote).update(**valores)
+                filas += n
+                if tasa is None:
+                    sin_tasa += n
+        resultado[moneda] = filas
+        log(f"[FX] {moneda}: {filas} filas" + (f", {sin_tasa} sin tasa (monto_clp = NULL)" if sin_tasa else ""))
+    return resultado
+
+
+# ====== Historial e invalidación ======
+@receiver(post_save, sender="api.FxRate", dispatch_uid="api.fx.fxrate_guardada")
+def _fxrate_guardada(sender, instance, created, **kwargs):
+    invalidar_tasas()
+    if kwargs.get("raw"):
+        return
+    from .models import FxRateHistorico
+
+    code = instance.code.upper()
+    # La primera tasa de una moneda rige hacia atrás; un cambio, desde hoy
+    primera = created and not FxRateHistorico.objects.filter(code=code).exists()
+    desde = FECHA_INICIAL if primera else timezone.localdate()
+    FxRateHistorico.objects.update_or_create(
+        code=code, vigente_desde=desde, defaults={"clp_per_unit": instance.clp_per_unit}
+    )
+    if not primera:
+        print(
+            f"[FX] {code} = {instance.clp_per_unit} CLP desde {desde}: los períodos anteriores conservan "
+            f"su tasa. Recalcular con `python manage.py recalcular_monto_clp --moneda {code}`"
+        )
+
+
+@receiver(post_delete, sender="api.FxRate", dispatch_uid="api.fx.fxrate_borrada")
+@receiver([post_save, post_delete], sender="api.FxRateHistorico", dispatch_uid="api.fx.historial_cambio")
+def _historial_cambio(sender, **kwargs):
+    # Borrar una FxRate no borra su historial: los períodos pasados siguen con sus tasas
+    invalidar_tasas()
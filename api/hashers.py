@@ -0,0 +1,15 @@
+# api/hashers.py
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class PBKDF2ConfigurableHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 con iteraciones según settings.PASSWORD_PBKDF2_ITERATIONS.
+
+    Mismo `algorithm` que el hasher de Django: los hashes existentes se
+    verifican igual y, si sus iteraciones difieren del perfil actual, se
+    re-hashean en el siguiente login exitoso (must_update).
+    """
+
+    iterations = int(getattr(settings, "PASSWORD_PBKDF2_ITERATIONS", PBKDF2PasswordHasher.iterations))
@@ -2,9 +2,12 @@
 
 import json
 import os
+import time
 
-from kafka import KafkaProducer
-from kafka.errors import NoBrokersAvailable
+from core.lazy_imports import lazy_import
+
+# kafka-python tarda en importarse: se carga recién al crear el producer
+kafka = lazy_import("kafka")
 
 
 # ========================= CONFIG =========================
@@ -17,43 +20,70 @@ KAFKA_BOOTSTRAP_SERVERS = (
 KAFKA_TOPIC_CALIFICACIONES = (
     os.getenv("KAFKA_TOPIC_CALIFICACIONES") or "calificaciones_eventos"
 ).strip()
+KAFKA_TOPIC_AUDITORIA = (
+    os.getenv("KAFKA_TOPIC_AUDITORIA") or "auditoria_eventos"
+).strip()
+# Tras un fallo al crear el producer, esperamos esto antes de reintentar
+# (crear el producer bloquea mientras busca brokers).
+KAFKA_RETRY_SECONDS = float(os.getenv("KAFKA_RETRY_SECONDS") or "30")
+# Auditoría: máximo que send() puede bloquear esperando metadata o espacio en
+# el buffer (el default de kafka-python, que sigue usando calificaciones, es
+# 60 s). Pasado esto el envío falla y el evento va al spill local.
+KAFKA_AUDITORIA_MAX_BLOCK_MS = int(os.getenv("KAFKA_AUDITORIA_MAX_BLOCK_MS") or "500")
 
-_producer: KafkaProducer | None = None
+# Un producer por uso: max_block_ms es de todo el producer, no de cada send()
+_PERFILES = {
+    "calificaciones": {},
+    "auditoria": {"max_block_ms": KAFKA_AUDITORIA_MAX_BLOCK_MS},
+}
+_producers: dict = {}  # perfil → kafka.KafkaProducer
+_producer_retry_at: dict[str, float] = {}
+_aviso_deshabilitado = False
 
 
 # ========================= HELPERS =========================
-def _get_producer() -> KafkaProducer | None:
+def _get_producer(perfil: str = "calificaciones") -> "kafka.KafkaProducer | None":
     """
-    Crea (lazy) y reutiliza un KafkaProducer apuntando a localhost:9092
-    (o lo que venga en KAFKA_BOOTSTRAP_SERVERS).
+    Crea (lazy) y reutiliza el KafkaProducer de `perfil` (ver _PERFILES)
+    apuntando a localhost:9092 (o lo que venga en KAFKA_BOOTSTRAP_SERVERS).
     Nunca lanza excepción hacia afuera: si falla, devuelve None
     y el resto de la app sigue funcionando.
     """
-    global _producer
+    global _aviso_deshabilitado
 
     if not KAFKA_ENABLED:
-        print("[KAFKA] Producer deshabilitado por KAFKA_ENABLED != '1'.")
+        if not _aviso_deshabilitado:
+            _aviso_deshabilitado = True
+            print("[KAFKA] Producer deshabilitado por KAFKA_ENABLED != '1'.")
         return None
 
-    if _producer is not None:
-        return _producer
+    producer = _producers.get(perfil)
+    if producer is not None:
+        return producer
+
+    if time.monotonic() < _producer_retry_at.get(perfil, 0.0):
+        return None
 
     try:
-        print(f"[KAFKA] Creando producer hacia {KAFKA_BOOTSTRAP_SERVERS}...")
-        _producer = KafkaProducer(
+        print(f"[KAFKA] Creando producer ({perfil}) hacia {KAFKA_BOOTSTRAP_SERVERS}...")
+        producer = kafka.KafkaProducer(
             bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS,
             value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+            **_PERFILES[perfil],
         )
+        _producers[perfil] = producer
         print("[KAFKA] Producer creado correctamente.")
-        return _producer
-    except NoBrokersAvailable:
+        return producer
+    except kafka.errors.NoBrokersAvailable:
         print(
             f"[KAFKA] NoBrokersAvailable al crear producer hacia {KAFKA_BOOTSTRAP_SERVERS}. "
             "¿Está Kafka levantado?"
         )
+        _producer_retry_at[perfil] = time.monotonic() + KAFKA_RETRY_SECONDS
         return None
     except Exception as e:
         print(f"[KAFKA] Error inesperado al crear producer: {e!r}")
+        _producer_retry_at[perfil] = time.monotonic() + KAFKA_RETRY_SECONDS
         return None
 
 
@@ -83,3 +113,31 @@ def enviar_evento_calificacion(payload: dict) -> None:
     except Exception as e:
         # Nunca queremos que un error de Kafka rompa la API
         print(f"[KAFKA] Error al enviar evento de calificación: {e!r}")
+
+
+def publicar_evento_auditoria(payload: dict, al_fallar=None) -> bool:
+    """
+    Publica un evento en el topic de auditoría SIN esperar confirmación:
+    el producer agrupa y envía en segundo plano. Si la entrega falla se
+    llama a al_fallar(payload, exc) desde el hilo del producer.
+    Devuelve False si no hay producer disponible o send() no aceptó el
+    evento (para que el llamador use otra vía).
+    Pensado para hilos de fondo (web/auditoria_client.py): send() puede
+    bloquear hasta KAFKA_AUDITORIA_MAX_BLOCK_MS y crear el producer, bastante más.
+    """
+    def _errback(exc):
+        print(f"[KAFKA] Error al entregar evento de auditoría: {exc!r}")
+        if al_fallar is not None:
+            al_fallar(payload, exc)
+
+    try:
+        producer = _get_producer("auditoria")
+        if producer is None:
+            return False
+
+        future = producer.send(KAFKA_TOPIC_AUDITORIA, payload)
+        future.add_errback(_errback)
+        return True
+    except Exception as e:
+        print(f"[KAFKA] Error al publicar evento de auditoría: {e!r}")
+        return False
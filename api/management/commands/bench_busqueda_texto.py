@@ -0,0 +1,128 @@
+# api/management/commands/bench_busqueda_texto.py
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Q
+
+from api.busqueda import asegurar_indice_texto, buscar_ids, filtrar_texto
+
+GIROS = ("Constructora", "Inversiones", "Comercial", "Transportes", "Agrícola",
+         "Servicios", "Inmobiliaria", "Distribuidora", "Minera", "Exportadora")
+SOCIEDADES = ("SpA", "Ltda", "S.A.", "EIRL")
+SILABAS = ("ba", "ca", "da", "fe", "gi", "lo", "ma", "ñu", "pe", "quí", "ra", "so", "ta", "vi", "za", "ño", "rí", "lú")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de búsqueda de texto sobre una tabla SQLite temporal de varios millones de filas: "
+        "icontains (LIKE '%x%', como antes) contra el índice FTS5 de api/busqueda.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", type=int, default=2_000_000)
+        parser.add_argument("-r", "--repeticiones", type=int, default=3)
+
+    # ====== Tabla de prueba ======
+    def _crear(self, alias: str, filas: int):
+        from api.models import Calificacion
+
+        conn = connections[alias]
+        with conn.schema_editor() as editor:
+            editor.create_model(Calificacion)
+        tabla = Calificacion._meta.db_table
+        rnd = random.Random(7)
+        vocabulario = sorted({"".join(rnd.choice(SILABAS) for _ in range(rnd.randint(2, 4))).capitalize()
+                              for _ in range(6000)})
+        t0 = time.perf_counter()
+        with conn.cursor() as cur:
+            sql = (
+                f'INSERT INTO "{tabla}" (rut, razon_social, periodo, tipo_instrumento, folio, monto, moneda, '
+                "estado_validacion, observaciones, created_at) "
+                "VALUES (?, ?, '2025-01', 'Factura', ?, 1000, 'CLP', 'Válida', ?, datetime('now', ?))"
+            )
+            lote = 50_000
+            for base in range(0, filas, lote):
+                valores = []
+                for i in range(base, min(base + lote, filas)):
+                    razon = f"{rnd.choice(GIROS)} {rnd.choice(vocabulario)} {rnd.choice(vocabulario)} {rnd.choice(SOCIEDADES)}"
+                    obs = "" if rnd.random() < 0.3 else " ".join(rnd.choice(vocabulario).lower() for _ in range(4))
+                    valores.append((f"{76000000 + i % 90000}-{i % 10}", razon, str(i), obs, f"-{i} seconds"))
+                cur.connection.executemany(sql, valores)
+        self.stdout.write(f"{filas:,} filas creadas en {time.perf_counter() - t0:.1f}s")
+        t0 = time.perf_counter()
+        asegurar_indice_texto(using=alias)
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE")
+        self.stdout.write(f"Índice de texto construido en {time.perf_counter() - t0:.1f}s")
+        return rnd.choice(vocabulario)
+
+    # ====== Consultas ======
+    def _consultas(self, alias: str, nombre: str):
+        from api.models import Calificacion
+
+        qs = Calificacion.objects.using(alias)
+        raro, comun = nombre.lower(), "constructora"
+
+        def icontains(*terms):
+            cond = qs
+            for t in terms:
+                cond = cond.filter(Q(razon_social__icontains=t) | Q(observaciones__icontains=t))
+            return cond
+
+        def pagina(q):
+            return [c.id for c in q[:50]]
+
+        return [
+            (f"listado razon={raro!r} (50)",
+             lambda: pagina(qs.filter(razon_social__icontains=raro).order_by("-created_at")),
+             lambda: pagina(filtrar_texto(qs, raro, ("razon_social",), relevancia=True).order_by("-relevancia", "-created_at"))),
+            (f"count razon={comun!r}",
+             lambda: qs.filter(razon_social__icontains=comun).count(),
+             lambda: filtrar_texto(qs, comun, ("razon_social",)).count()),
+            (f"count q='{comun} {raro}'",
+             lambda: icontains(comun, raro).count(),
+             lambda: filtrar_texto(qs, f"{comun} {raro}").count()),
+            (f"autocompletar '{raro[:3]}' (20)",
+             lambda: list(icontains(raro[:3]).values_list("id", flat=True)[:20]),
+             lambda: buscar_ids(raro[:3], 20, using=alias)),
+        ]
+
+    def _medir(self, fn, repeticiones):
+        tiempos, resultado = [], None
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            resultado = fn()
+            tiempos.append(time.perf_counter() - t0)
+        return statistics.median(tiempos) * 1000, resultado
+
+    def handle(self, *args, **opts):
+        if connections["default"].vendor != "sqlite":
+            raise CommandError("bench_busqueda_texto usa una tabla SQLite temporal: correr con DB_PROFILE=sqlite.")
+        tmp = Path(tempfile.mkdtemp(prefix="nuamx-texto-"))
+        alias = "bench_texto"
+        default = connections.settings["default"]
+        connections.settings[alias] = connections.configure_settings({
+            "default": default,
+            alias: {**default, "NAME": str(tmp / "bench.sqlite3"), "CONN_MAX_AGE": 0, "TEST": {}},
+        })[alias]
+        try:
+            nombre = self._crear(alias, opts["filas"])
+            self.stdout.write(f"\n{'consulta':<40}{'icontains ms':>14}{'índice ms':>12}{'x':>8}  filas")
+            for etiqueta, antes, despues in self._consultas(alias, nombre):
+                ms_antes, r_antes = self._medir(antes, opts["repeticiones"])
+                ms_despues, r_despues = self._medir(despues, opts["repeticiones"])
+                filas = lambda r: len(r) if isinstance(r, list) else r
+                self.stdout.write(
+                    f"{etiqueta:<40}{ms_antes:>14.1f}{ms_despues:>12.1f}{ms_antes / max(ms_despues, 1e-6):>8.1f}"
+                    f"  {filas(r_antes)} / {filas(r_despues)}"
+                )
+        finally:
+            connections[alias].close()
+            del connections.settings[alias]
+            shutil.rmtree(tmp, ignore_errors=True)
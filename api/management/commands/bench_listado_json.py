@@ -0,0 +1,95 @@
+# api/management/commands/bench_listado_json.py
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import ORJSONRenderer, orjson
+from api.serializers import CalificacionSerializer, lectura_calificaciones
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark del listado de calificaciones (consulta + serialización + JSON) sobre una tabla "
+        "SQLite temporal: ModelSerializer + JSONRenderer (camino anterior) contra .values() con el "
+        "mapeo precompilado de LecturaRapida, con json.dumps y con orjson. Informa filas/segundo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", type=int, default=10_000)
+        parser.add_argument("-r", "--repeticiones", type=int, default=5)
+
+    # ====== Tabla de prueba ======
+    def _crear(self, alias: str, filas: int):
+        from api.models import Calificacion
+
+        with connections[alias].schema_editor() as editor:
+            editor.create_model(Calificacion)
+        rnd = random.Random(7)
+        monedas = ("CLP", "USD", "EUR", "UF")
+        Calificacion.objects.using(alias).bulk_create([
+            Calificacion(
+                rut=f"{76000000 + i}-{i % 10}", razon_social=f"Empresa Ñandú {i} SpA", periodo=f"2025-{1 + i % 12:02d}",
+                tipo_instrumento="Factura", folio=str(i), monto=rnd.randint(1, 10_000_000), moneda=monedas[i % 4],
+                monto_clp=None if i % 10 == 0 else rnd.randint(1, 10**10),
+                fx_clp_per_unit=None if i % 4 == 0 else f"{rnd.uniform(1, 40000):.4f}",
+                estado_validacion="Válida", observaciones="" if i % 3 else "revisar folio duplicado",
+            )
+            for i in range(filas)
+        ], batch_size=2000)
+
+    def _medir(self, fn, repeticiones):
+        tiempos, resultado = [], None
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            resultado = fn()
+            tiempos.append(time.perf_counter() - t0)
+        return statistics.median(tiempos), resultado
+
+    def handle(self, *args, **opts):
+        from api.models import Calificacion
+
+        tmp = Path(tempfile.mkdtemp(prefix="nuamx-json-"))
+        alias = "bench_json"
+        default = connections.settings["default"]
+        connections.settings[alias] = connections.configure_settings({
+            "default": default,
+            alias: {**{k: v for k, v in default.items() if k != "OPTIONS"}, "ENGINE": "django.db.backends.sqlite3",
+                    "NAME": str(tmp / "bench.sqlite3"), "CONN_MAX_AGE": 0, "TEST": {}},
+        })[alias]
+        try:
+            self._crear(alias, opts["filas"])
+            qs = Calificacion.objects.using(alias).order_by("-created_at")
+            stock, rapido = JSONRenderer(), ORJSONRenderer()
+            caminos = [
+                ("ModelSerializer + JSONRenderer", lambda: stock.render(CalificacionSerializer(qs, many=True).data)),
+                (".values() + mapeo + JSONRenderer", lambda: stock.render(lectura_calificaciones.filas(qs))),
+            ]
+            if orjson and rapido.disponible:
+                caminos.append((".values() + mapeo + orjson", lambda: rapido.render(lectura_calificaciones.filas(qs))))
+            else:
+                self.stdout.write(self.style.WARNING("orjson no está instalado (o API_ORJSON=0): se omite ese camino"))
+
+            base, referencia = None, None
+            self.stdout.write(f"{opts['filas']:,} filas por respuesta, mediana de {opts['repeticiones']}\n")
+            self.stdout.write(f"{'camino':<36}{'ms':>10}{'filas/s':>12}{'x':>7}  bytes")
+            for nombre, fn in caminos:
+                fn()  # calentar
+                segundos, cuerpo = self._medir(fn, opts["repeticiones"])
+                base = base or segundos
+                referencia = referencia or cuerpo
+                igual = "" if cuerpo == referencia else "  ⚠ cuerpo distinto"
+                self.stdout.write(
+                    f"{nombre:<36}{segundos * 1000:>10.1f}{opts['filas'] / segundos:>12,.0f}{base / segundos:>7.1f}"
+                    f"  {len(cuerpo):,}{igual}"
+                )
+        finally:
+            connections[alias].close()
+            del connections.settings[alias]
+            shutil.rmtree(tmp, ignore_errors=True)
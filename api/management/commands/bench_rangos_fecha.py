@@ -0,0 +1,147 @@
+# api/management/commands/bench_rangos_fecha.py
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count, Q
+
+from core.ventanas import filtro_ventana, hoy_local, inicio_dia, limites_dias, ventana_periodo
+
+ESTADOS = ("Válida", "Con advertencias", "Rechazada")
+ERRORES = ["Con advertencias", "Rechazada"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de filtros por fecha sobre una tabla SQLite temporal de varios millones de filas: "
+        "created_at__date (función sobre la columna, como stats antes) contra rangos UTC semiabiertos "
+        "de core/ventanas.py, con y sin el índice de created_at."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--filas", type=int, default=3_000_000)
+        parser.add_argument("--dias", type=int, default=730, help="Días hacia atrás en que se reparten las filas.")
+        parser.add_argument("-r", "--repeticiones", type=int, default=3)
+
+    # ====== Tabla de prueba ======
+    def _crear(self, alias: str, filas: int, dias: int):
+        from api.models import Calificacion
+
+        conn = connections[alias]
+        with conn.schema_editor() as editor:
+            editor.create_model(Calificacion)
+        tabla = Calificacion._meta.db_table
+        with conn.cursor() as cur:
+            # Índices después de insertar: mucho más rápido que mantenerlos fila a fila
+            cur.execute("SELECT name, sql FROM sqlite_master WHERE type='index' AND tbl_name=%s AND sql IS NOT NULL", [tabla])
+            indices = cur.fetchall()
+            for nombre, _ in indices:
+                cur.execute(f'DROP INDEX "{nombre}"')
+
+            rnd = random.Random(7)
+            fin = inicio_dia(hoy_local() + timedelta(days=1)).replace(tzinfo=None)
+            segundos = dias * 86400
+            sql = (
+                f'INSERT INTO "{tabla}" (rut, razon_social, periodo, tipo_instrumento, folio, monto, moneda, '
+                "estado_validacion, observaciones, created_at) VALUES (?, 'Empresa', ?, 'Factura', ?, ?, 'CLP', ?, '', ?)"
+            )
+            lote = 50_000
+            t0 = time.perf_counter()
+            for base in range(0, filas, lote):
+                valores = []
+                for i in range(base, min(base + lote, filas)):
+                    creado = fin - timedelta(seconds=rnd.random() * segundos)
+                    valores.append((f"{76000000 + i % 90000}-{i % 10}", creado.strftime("%Y-%m"), str(i), 1000 + i % 9000,
+                                    ESTADOS[i % 3], creado.isoformat(sep=" ")))
+                cur.connection.executemany(sql, valores)
+            for _, sql_indice in indices:
+                cur.execute(sql_indice)
+            cur.execute("ANALYZE")
+        self.stdout.write(f"{filas:,} filas en {dias} días, creadas en {time.perf_counter() - t0:.1f}s")
+        return [n for n, s in indices if '"created_at"' in s]
+
+    # ====== Consultas ======
+    def _consultas(self, alias: str):
+        from api.models import Calificacion
+
+        qs = Calificacion.objects.using(alias)
+        hoy = hoy_local()
+        inicio = hoy - timedelta(days=13)
+        inicio_mes, fin_mes = ventana_periodo("mensual", hoy)
+
+        def stats_antes():
+            # Código de stats anterior: objetos completos y agrupación en Python
+            por_dia = defaultdict(int)
+            for c in qs.filter(created_at__date__gte=inicio, created_at__date__lte=hoy):
+                por_dia[c.created_at.date()] += 1
+            errores = qs.filter(created_at__date__gte=inicio, created_at__date__lte=hoy,
+                                estado_validacion__in=ERRORES).count()
+            return sum(por_dia.values()), errores
+
+        def stats_despues():
+            limites = limites_dias(inicio, 14)
+            ventana = filtro_ventana("created_at", limites[0], limites[-1])
+            por_dia = qs.filter(**ventana).aggregate(**{
+                f"d{i}": Count("id", filter=Q(**filtro_ventana("created_at", limites[i], limites[i + 1])))
+                for i in range(14)
+            })
+            errores = qs.filter(**ventana, estado_validacion__in=ERRORES).count()
+            return sum(por_dia.values()), errores
+
+        return [
+            ("stats 14 días", stats_antes, stats_despues),
+            ("reporte mensual (COUNT)",
+             lambda: qs.filter(created_at__date__gte=hoy.replace(day=1), created_at__date__lte=hoy).count(),
+             lambda: qs.filter(**filtro_ventana("created_at", inicio_mes, fin_mes)).count()),
+        ]
+
+    def _medir(self, fn, repeticiones):
+        tiempos, resultado = [], None
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            resultado = fn()
+            tiempos.append(time.perf_counter() - t0)
+        return statistics.median(tiempos) * 1000, resultado
+
+    def handle(self, *args, **opts):
+        if connections["default"].vendor != "sqlite":
+            raise CommandError("bench_rangos_fecha usa una tabla SQLite temporal: correr con DB_PROFILE=sqlite.")
+        tmp = Path(tempfile.mkdtemp(prefix="nuamx-fechas-"))
+        alias = "bench_fechas"
+        default = connections.settings["default"]
+        connections.settings[alias] = connections.configure_settings({
+            "default": default,
+            alias: {**default, "NAME": str(tmp / "bench.sqlite3"), "CONN_MAX_AGE": 0, "TEST": {}},
+        })[alias]
+        try:
+            indices_fecha = self._crear(alias, opts["filas"], opts["dias"])
+            consultas = self._consultas(alias)
+            filas = []
+            for con_indice in (True, False):
+                if not con_indice:
+                    with connections[alias].cursor() as cur:
+                        for nombre in indices_fecha:
+                            cur.execute(f'DROP INDEX "{nombre}"')
+                for nombre, antes, despues in consultas:
+                    ms_antes, r_antes = self._medir(antes, opts["repeticiones"])
+                    ms_despues, r_despues = self._medir(despues, opts["repeticiones"])
+                    if r_antes != r_despues:
+                        self.stdout.write(self.style.WARNING(f"  {nombre}: resultados distintos {r_antes} / {r_despues}"))
+                    filas.append((nombre, "sí" if con_indice else "no", ms_antes, ms_despues, r_despues))
+
+            self.stdout.write(f"\n{'consulta':<26}{'índice':>7}{'__date ms':>12}{'rango UTC ms':>14}{'x':>8}  resultado")
+            for nombre, indice, ms_antes, ms_despues, resultado in filas:
+                self.stdout.write(
+                    f"{nombre:<26}{indice:>7}{ms_antes:>12.1f}{ms_despues:>14.1f}{ms_antes / max(ms_despues, 1e-6):>8.1f}  {resultado}"
+                )
+        finally:
+            connections[alias].close()
+            del connections.settings[alias]
+            shutil.rmtree(tmp, ignore_errors=True)
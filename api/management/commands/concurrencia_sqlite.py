@@ -0,0 +1,183 @@
+# api/management/commands/concurrencia_sqlite.py
+import json
+import multiprocessing
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def _p(valores, q):
+    if not valores:
+        return 0.0
+    if len(valores) < 2:
+        return valores[0]
+    return statistics.quantiles(valores, n=100)[q - 1]
+
+
+def _fila(modelo, i: int):
+    return modelo(
+        rut=f"{76000000 + i % 5000}-{i % 10}", razon_social=f"Empresa {i % 5000}", periodo="2025-01",
+        tipo_instrumento="Factura", folio=str(i), monto=1000 + i, moneda="CLP", estado_validacion="Pendiente",
+    )
+
+
+def _trabajar(rol: str, n: int, alias: str, cfg: dict, inicio: float, fin: float, lote: int, cola):
+    """
+    Un proceso por rol, como los workers de gunicorn (con hilos el GIL
+    dominaría la medición). Cada iteración es un "request": al final se llama
+    a close_if_unusable_or_obsolete(), igual que Django en request_finished.
+    """
+    import django
+    from django.apps import apps
+    if not apps.ready:  # multiprocessing con spawn (Windows)
+        django.setup()
+    from django.db import OperationalError, connections, transaction
+    from api.models import Calificacion
+
+    connections.settings[alias] = cfg
+    conn = connections[alias]
+    qs = Calificacion.objects.using(alias).order_by("-id")
+    latencias, fallas, filas = [], 0, 0
+    i = 10_000_000 * (n + 1)
+
+    while time.time() < inicio:
+        time.sleep(0.005)
+    while time.time() < fin:
+        t0 = time.perf_counter()
+        try:
+            if rol == "lector":
+                list(qs[:50])
+                qs.count()
+            elif rol == "masivo":
+                # Como CalificacionBulkCommitView: un INSERT (y un commit) por fila
+                for k in range(lote):
+                    _fila(Calificacion, i + k).save(using=alias)
+                filas += lote
+                i += lote
+            else:  # crud
+                with transaction.atomic(using=alias):
+                    _fila(Calificacion, i).save(using=alias)
+                filas += 1
+                i += 1
+            latencias.append(time.perf_counter() - t0)
+        except OperationalError:
+            fallas += 1
+        conn.close_if_unusable_or_obsolete()
+    conn.close()
+    cola.put((rol, latencias, fallas, filas))
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de concurrencia sobre SQLite: N lectores (página de 50 + COUNT, como el listado), "
+        "un writer de carga masiva (inserts en autocommit, como import_commit) y writers del CRUD "
+        "(una fila por transacción), cada uno en su proceso. Compara la configuración por defecto "
+        "de Django ('antes') con SQLITE_PRAGMAS + CONN_MAX_AGE + BEGIN IMMEDIATE ('despues')."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--perfil", choices=("antes", "despues", "ambos"), default="ambos")
+        parser.add_argument("-d", "--duracion", type=float, default=5.0, help="Segundos por perfil.")
+        parser.add_argument("-l", "--lectores", type=int, default=6, help="Procesos lectores.")
+        parser.add_argument("--lote", type=int, default=200, help="Filas por request del writer masivo.")
+        parser.add_argument("--crud", type=int, default=2, help="Procesos writers del CRUD (una fila por commit).")
+        parser.add_argument("--filas", type=int, default=20000, help="Filas iniciales de la tabla.")
+        parser.add_argument("--json", action="store_true", help="Salida JSON (para comparar corridas).")
+
+    def _config(self, perfil: str, ruta: Path) -> dict:
+        """Alias de BD temporal: config por defecto de Django o la de core/settings.py."""
+        default = connections.settings["default"]
+        if perfil == "antes":
+            cfg = {"ENGINE": "django.db.backends.sqlite3", "NAME": str(ruta),
+                   "CONN_MAX_AGE": 0, "OPTIONS": {}, "SQLITE_PRAGMAS": {}}
+        else:
+            cfg = {"ENGINE": "django.db.backends.sqlite3", "NAME": str(ruta),
+                   "CONN_MAX_AGE": default.get("CONN_MAX_AGE", 0), "CONN_HEALTH_CHECKS": True,
+                   "OPTIONS": dict(default.get("OPTIONS") or {}),
+                   "SQLITE_PRAGMAS": dict(getattr(settings, "SQLITE_PRAGMAS", {}))}
+        return connections.configure_settings({"default": default, "bench": cfg})["bench"]
+
+    def _medir(self, perfil: str, opts) -> dict:
+        from api.models import Calificacion
+
+        tmp = Path(tempfile.mkdtemp(prefix="nuamx-sqlite-"))
+        alias = f"bench_{perfil}"
+        cfg = self._config(perfil, tmp / "bench.sqlite3")
+        connections.settings[alias] = cfg
+        try:
+            with connections[alias].schema_editor() as editor:
+                editor.create_model(Calificacion)
+            Calificacion.objects.using(alias).bulk_create(
+                (_fila(Calificacion, i) for i in range(opts["filas"])), batch_size=2000
+            )
+            connections[alias].close()
+
+            roles = ["lector"] * opts["lectores"] + ["masivo"] + ["crud"] * opts["crud"]
+            cola = multiprocessing.Queue()
+            inicio = time.time() + 1.0  # margen para que arranquen todos los procesos
+            fin = inicio + opts["duracion"]
+            procesos = [
+                multiprocessing.Process(target=_trabajar, args=(rol, n, alias, cfg, inicio, fin, opts["lote"], cola))
+                for n, rol in enumerate(roles)
+            ]
+            for p in procesos:
+                p.start()
+            resultados = [cola.get() for _ in procesos]
+            for p in procesos:
+                p.join()
+
+            lat = {"lector": [], "masivo": [], "crud": []}
+            filas = {"masivo": 0, "crud": 0}
+            bloqueos = 0
+            for rol, latencias, fallas, n in resultados:
+                lat[rol].extend(latencias)
+                bloqueos += fallas
+                if rol in filas:
+                    filas[rol] += n
+            segundos = opts["duracion"]
+            return {
+                "perfil": perfil,
+                "lecturas_s": len(lat["lector"]) / segundos,
+                "lectura_p50_ms": _p(lat["lector"], 50) * 1000,
+                "lectura_p99_ms": _p(lat["lector"], 99) * 1000,
+                "filas_masivo_s": filas["masivo"] / segundos,
+                "lote_p50_ms": _p(lat["masivo"], 50) * 1000,
+                "crud_s": filas["crud"] / segundos,
+                "crud_p99_ms": _p(lat["crud"], 99) * 1000,
+                "bloqueos": bloqueos,
+            }
+        finally:
+            connections[alias].close()
+            del connections.settings[alias]
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def handle(self, *args, **opts):
+        if connections["default"].vendor != "sqlite":
+            raise CommandError("concurrencia_sqlite compara configuraciones de SQLite: correr con DB_PROFILE=sqlite.")
+        perfiles = ("antes", "despues") if opts["perfil"] == "ambos" else (opts["perfil"],)
+        resultados = [self._medir(p, opts) for p in perfiles]
+
+        if opts["json"]:
+            self.stdout.write(json.dumps(resultados, indent=2))
+            return
+
+        self.stdout.write(
+            f"{opts['lectores']} lectores + 1 writer masivo (lotes de {opts['lote']}) + {opts['crud']} writers CRUD, "
+            f"{opts['duracion']:.0f} s por perfil, tabla inicial de {opts['filas']} filas\n"
+        )
+        self.stdout.write(
+            f"{'perfil':<9}{'lect/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'filas/s':>10}{'lote ms':>9}"
+            f"{'crud/s':>8}{'crud p99':>10}{'bloqueos':>10}"
+        )
+        for r in resultados:
+            self.stdout.write(
+                f"{r['perfil']:<9}{r['lecturas_s']:>9.0f}{r['lectura_p50_ms']:>9.1f}{r['lectura_p99_ms']:>9.1f}"
+                f"{r['filas_masivo_s']:>10.0f}{r['lote_p50_ms']:>9.1f}{r['crud_s']:>8.0f}{r['crud_p99_ms']:>10.1f}"
+                f"{r['bloqueos']:>10}"
+            )
@@ -0,0 +1,131 @@
+# api/management/commands/perfil_arranque.py
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Lo que hace un worker antes de atender su primer request
+_SCRIPT = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+import django
+django.setup()
+objetivo = sys.argv[1]
+if objetivo == "wsgi":
+    from django.core.wsgi import get_wsgi_application
+    get_wsgi_application()
+elif objetivo == "asgi":
+    from django.core.asgi import get_asgi_application
+    get_asgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+for extra in sys.argv[2:]:
+    __import__(extra)
+transcurrido = time.perf_counter() - t0
+try:
+    import resource
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        rss_kb //= 1024
+except ImportError:
+    rss_kb = None
+print(json.dumps({"segundos": transcurrido, "rss_kb": rss_kb, "modulos": len(sys.modules)}))
+"""
+
+
+def _parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """Líneas de `-X importtime` → [(módulo, self_us, acumulado_us)]."""
+    filas = []
+    for linea in stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        try:
+            _, resto = linea.split(":", 1)
+            propio, acumulado, nombre = resto.split("|", 2)
+            filas.append((nombre.strip(), int(propio), int(acumulado)))
+        except ValueError:
+            continue
+    return filas
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el arranque de un worker (django.setup + URLconf) con `python -X importtime`: "
+        "tiempo total, RSS y los módulos/paquetes que más tardan en importarse."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--objetivo", choices=("urls", "wsgi", "asgi"), default="wsgi",
+                            help="Qué carga el proceso medido (default: wsgi, como gunicorn).")
+        parser.add_argument("--top", type=int, default=20, help="Cuántos módulos/paquetes listar.")
+        parser.add_argument("--repeticiones", type=int, default=3,
+                            help="Corridas en procesos nuevos; se reporta la mediana.")
+        parser.add_argument("--importar", nargs="*", default=[], metavar="MODULO",
+                            help="Módulos extra a importar tras la URLconf (p.ej. api.views.reportes).")
+        parser.add_argument("--json", action="store_true", help="Salida JSON (para comparar corridas).")
+
+    def _correr(self, objetivo: str, extras: list[str]):
+        env = dict(os.environ)
+        env.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _SCRIPT, objetivo, *extras],
+            capture_output=True, text=True, env=env, cwd=os.getcwd(),
+        )
+        if proc.returncode != 0:
+            raise CommandError(f"El proceso medido falló:\n{proc.stderr[-2000:]}")
+        resumen = json.loads(proc.stdout.strip().splitlines()[-1])
+        return resumen, _parse_importtime(proc.stderr)
+
+    def handle(self, *args, **opts):
+        corridas = [self._correr(opts["objetivo"], opts["importar"]) for _ in range(max(1, opts["repeticiones"]))]
+
+        segundos = statistics.median(r["segundos"] for r, _ in corridas)
+        rss = [r["rss_kb"] for r, _ in corridas if r["rss_kb"] is not None]
+        rss_kb = statistics.median(rss) if rss else None
+
+        # Mediana por módulo entre corridas
+        por_modulo = defaultdict(lambda: ([], []))
+        for _, filas in corridas:
+            for nombre, propio, acumulado in filas:
+                por_modulo[nombre][0].append(propio)
+                por_modulo[nombre][1].append(acumulado)
+        modulos = {
+            nombre: (statistics.median(p), statistics.median(a))
+            for nombre, (p, a) in por_modulo.items()
+        }
+        paquetes = defaultdict(float)
+        for nombre, (propio, _) in modulos.items():
+            paquetes[nombre.split(".", 1)[0]] += propio
+
+        top = opts["top"]
+        top_modulos = sorted(modulos.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+        top_paquetes = sorted(paquetes.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        total_import_ms = sum(paquetes.values()) / 1000
+
+        if opts["json"]:
+            self.stdout.write(json.dumps({
+                "objetivo": opts["objetivo"],
+                "segundos": segundos,
+                "rss_kb": rss_kb,
+                "modulos_cargados": corridas[0][0]["modulos"],
+                "import_ms": total_import_ms,
+                "paquetes_ms": {k: v / 1000 for k, v in top_paquetes},
+                "modulos_acumulado_ms": {k: v[1] / 1000 for k, v in top_modulos},
+            }, indent=2))
+            return
+
+        rss_txt = f"{rss_kb / 1024:.1f} MB" if rss_kb else "n/d"
+        self.stdout.write(self.style.SUCCESS(
+            f"Arranque ({opts['objetivo']}, mediana de {len(corridas)}): {segundos * 1000:.0f} ms · "
+            f"RSS {rss_txt} · {corridas[0][0]['modulos']} módulos · imports {total_import_ms:.0f} ms"
+        ))
+        self.stdout.write("\nPaquetes (tiempo propio de sus módulos):")
+        for nombre, us in top_paquetes:
+            self.stdout.write(f"  {us / 1000:8.1f} ms  {nombre}")
+        self.stdout.write("\nMódulos (acumulado, incluye lo que importan):")
+        for nombre, (propio, acumulado) in top_modulos:
+            self.stdout.write(f"  {acumulado / 1000:8.1f} ms  {nombre}")
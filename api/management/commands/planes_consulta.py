@@ -0,0 +1,58 @@
+# api/management/commands/planes_consulta.py
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from api.formas_consulta import formas, problema
+from core.query_plan import analizar, sin_seq_scan
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN (QUERY PLAN) de cada forma de consulta sobre api_calificacion: todas las "
+        "combinaciones de filtros de get_queryset, export, reportes (_filtrar), enriquecer y stats. "
+        "Marca las que recorren la tabla entera, ordenan todo en memoria o no son sargables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+        parser.add_argument("--solo-problemas", action="store_true", help="Mostrar solo las formas con problema.")
+        parser.add_argument("--planes", action="store_true", help="Imprimir el plan completo de cada forma.")
+        parser.add_argument("--no-indexables", action="store_true",
+                            help="Incluir rut/razon (LIKE '%%x%%'), que nunca usan índice.")
+        parser.add_argument("--json", action="store_true")
+        parser.add_argument("--estricto", action="store_true", help="Terminar con error si alguna forma tiene problema.")
+
+    def handle(self, *args, **opts):
+        alias = opts["database"]
+        resultados = []
+        # En PostgreSQL, con tablas chicas el planner prefiere Seq Scan aunque exista
+        # un índice: se penaliza para ver si hay uno utilizable.
+        with sin_seq_scan(alias):
+            for forma in formas(no_indexables=opts["no_indexables"]):
+                plan = analizar(forma.qs.using(alias))
+                resultados.append((forma, plan, problema(forma, plan)))
+
+        if opts["json"]:
+            self.stdout.write(json.dumps([
+                {"forma": f.nombre, "problema": p, "indices": plan.indices, "ordena_en_memoria": plan.ordena_en_memoria,
+                 "plan": plan.lineas}
+                for f, plan, p in resultados
+            ], indent=2, ensure_ascii=False))
+        else:
+            self.stdout.write(f"{len(resultados)} formas ({connections[alias].vendor})\n")
+            for forma, plan, p in resultados:
+                if opts["solo_problemas"] and not p:
+                    continue
+                estado = self.style.ERROR("✗") if p else self.style.SUCCESS("✓")
+                orden = " +sort" if plan.ordena_en_memoria else ""
+                detalle = p or (", ".join(plan.indices) or "PRIMARY KEY") + orden
+                self.stdout.write(f"{estado} {forma.nombre:<48} {detalle}")
+                if opts["planes"]:
+                    for linea in plan.lineas:
+                        self.stdout.write(f"      {linea}")
+
+        con_problema = [f.nombre for f, _, p in resultados if p]
+        if con_problema and opts["estricto"]:
+            raise CommandError(f"{len(con_problema)} formas con problema: {', '.join(con_problema)}")
@@ -0,0 +1,28 @@
+# api/management/commands/recalcular_monto_clp.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.fx import recalcular_monto_clp
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula Calificacion.monto_clp y fx_clp_per_unit con la tasa vigente al cierre de "
+        "cada período (FxRateHistorico; UPDATE en SQL por moneda, tasa y lotes de ids). "
+        "Correr después de cambiar o cargar tasas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--moneda", action="append", metavar="CODIGO",
+                            help="Solo esta moneda (repetible). Por defecto, todas las presentes.")
+        parser.add_argument("--lote", type=int, default=5000, help="Filas (rango de ids) por transacción.")
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        monedas = [m.upper() for m in opts["moneda"]] if opts["moneda"] else None
+        resultado = recalcular_monto_clp(monedas=monedas, lote=max(1, opts["lote"]), log=self.stdout.write)
+        total = sum(resultado.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"{total} calificaciones recalculadas en {time.perf_counter() - t0:.2f}s ({len(resultado)} monedas)"
+        ))
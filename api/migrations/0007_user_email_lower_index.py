@@ -0,0 +1,35 @@
+# Índice funcional LOWER(email) sobre la tabla de usuarios (auth_user).
+#
+# auth.User no es un modelo de esta app, así que el índice va como SQL:
+# la sintaxis es válida en SQLite y PostgreSQL. El login por email filtra con
+# Lower("email") = <email en minúsculas>, que usa este índice (iexact no).
+
+from django.conf import settings
+from django.db import migrations
+
+
+def _crear_indice(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    qn = schema_editor.quote_name
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {qn('api_user_email_lower_idx')} "
+        f"ON {qn(User._meta.db_table)} (LOWER({qn('email')}))"
+    )
+
+
+def _borrar_indice(apps, schema_editor):
+    schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name('api_user_email_lower_idx')}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_calificacion_moneda_and_more'),
+        # Después de la última migración de auth: en SQLite cada ALTER de
+        # auth_user reconstruye la tabla y descarta índices que Django no conoce.
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(_crear_indice, _borrar_indice),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:08
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def _backfill(apps, schema_editor):
+    # Mismo UPDATE por moneda que `manage.py recalcular_monto_clp`, con los modelos históricos
+    from api.fx import MONEDA_BASE, recalcular_monto_clp
+
+    FxRate = apps.get_model("api", "FxRate")
+    tasas = {code.upper(): Decimal(v) for code, v in FxRate.objects.values_list("code", "clp_per_unit")}
+    tasas[MONEDA_BASE] = Decimal("1")
+    recalcular_monto_clp(apps.get_model("api", "Calificacion"), tasas=tasas, log=lambda *_: None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_user_email_lower_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='calificacion',
+            name='fx_clp_per_unit',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='calificacion',
+            name='monto_clp',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(_backfill, migrations.RunPython.noop),
+    ]
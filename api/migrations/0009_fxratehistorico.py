@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:10
+
+import datetime
+
+from django.db import migrations, models
+
+
+def _sembrar_historial(apps, schema_editor):
+    # La única tasa conocida de cada moneda rige hacia atrás (igual que hasta ahora):
+    # los monto_clp ya calculados no cambian.
+    FxRate = apps.get_model("api", "FxRate")
+    FxRateHistorico = apps.get_model("api", "FxRateHistorico")
+    FxRateHistorico.objects.bulk_create(
+        FxRateHistorico(code=code.upper(), vigente_desde=datetime.date(1970, 1, 1), clp_per_unit=tasa)
+        for code, tasa in FxRate.objects.values_list("code", "clp_per_unit")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_calificacion_monto_clp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FxRateHistorico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=3)),
+                ('vigente_desde', models.DateField()),
+                ('clp_per_unit', models.DecimalField(decimal_places=4, max_digits=12)),
+            ],
+            options={
+                'ordering': ['code', 'vigente_desde'],
+                'constraints': [models.UniqueConstraint(fields=('code', 'vigente_desde'), name='api_fxhist_code_desde_uniq')],
+            },
+        ),
+        migrations.RunPython(_sembrar_historial, migrations.RunPython.noop),
+    ]
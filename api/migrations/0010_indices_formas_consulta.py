@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_fxratehistorico'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='calificacion',
+            name='api_calific_tipo_in_3a9349_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='calificacion',
+            name='api_calific_estado__f8ebdd_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='calificacion',
+            name='api_calific_moneda_321f97_idx',
+        ),
+        migrations.AddIndex(
+            model_name='calificacion',
+            index=models.Index(fields=['estado_validacion', 'periodo'], name='api_calif_estado_periodo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calificacion',
+            index=models.Index(fields=['tipo_instrumento', 'periodo'], name='api_calif_tipo_periodo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calificacion',
+            index=models.Index(fields=['moneda', 'periodo'], name='api_calif_moneda_periodo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calificacion',
+            index=models.Index(fields=['created_at', 'moneda', 'monto', 'monto_clp'], name='api_calif_created_cubre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calificacion',
+            index=models.Index(condition=models.Q(('razon_social__isnull', True), ('razon_social', ''), _connector='OR'), fields=['created_at'], name='api_calif_noinsc_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calificacion',
+            index=models.Index(condition=models.Q(('razon_social__isnull', True), ('razon_social', ''), _connector='OR'), fields=['id'], name='api_calif_noinsc_id_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Índice de texto para razon_social / observaciones (ver api/busqueda.py):
+# FTS5 external content + triggers en SQLite, función + índice GIN en PostgreSQL.
+
+from django.db import migrations
+
+
+def _crear(apps, schema_editor):
+    from api.busqueda import asegurar_indice_texto
+
+    asegurar_indice_texto(schema_editor)
+
+
+def _borrar(apps, schema_editor):
+    from api.busqueda import borrar_indice_texto
+
+    borrar_indice_texto(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_indices_formas_consulta'),
+    ]
+
+    operations = [
+        migrations.RunPython(_crear, _borrar),
+    ]
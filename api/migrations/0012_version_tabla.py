@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 13:58
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def _crear_triggers(apps, schema_editor):
+    from api.versiones import TABLAS, asegurar_triggers
+
+    VersionTabla = apps.get_model("api", "VersionTabla")
+    VersionTabla.objects.bulk_create(VersionTabla(tabla=t, version=0, modificado=timezone.now()) for t in TABLAS)
+    asegurar_triggers(schema_editor)
+
+
+def _borrar_triggers(apps, schema_editor):
+    from api.versiones import borrar_triggers
+
+    borrar_triggers(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_indice_texto'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionTabla',
+            fields=[
+                ('tabla', models.CharField(max_length=63, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=0)),
+                ('modificado', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunPython(_crear_triggers, _borrar_triggers),
+    ]
@@ -58,6 +58,10 @@ def ensure_user_flags(sender, instance, created, **kwargs):
         UserFlag.objects.get_or_create(user=instance)
 
 
+# Calificación "no inscrita": sin razón social (misma condición que usan las vistas)
+SIN_RAZON_SOCIAL = models.Q(razon_social__isnull=True) | models.Q(razon_social="")
+
+
 class Calificacion(models.Model):
     MONEDAS = (
         ("CLP", "CLP"),
@@ -76,19 +80,48 @@ class Calificacion(models.Model):
     estado_validacion = models.CharField(max_length=50)
     observaciones = models.TextField(blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Equivalente en CLP materializado al guardar (api/fx.py) con la tasa vigente
+    # al cierre de `periodo`: los totales entre monedas se suman en SQL.
+    # NULL si la moneda no tiene tasa a esa fecha.
+    monto_clp = models.BigIntegerField(null=True, blank=True)
+    fx_clp_per_unit = models.DecimalField(max_digits=12, decimal_places=4, null=True, blank=True)  # tasa usada
 
     class Meta:
+        # Índices según las formas de consulta reales (api/formas_consulta.py,
+        # `python manage.py planes_consulta`): igualdad primero, rango de período después.
         indexes = [
             models.Index(fields=["rut"]),
             models.Index(fields=["periodo"]),
-            models.Index(fields=["tipo_instrumento"]),
-            models.Index(fields=["estado_validacion"]),
-            models.Index(fields=["moneda"]),
+            models.Index(fields=["estado_validacion", "periodo"], name="api_calif_estado_periodo_idx"),
+            models.Index(fields=["tipo_instrumento", "periodo"], name="api_calif_tipo_periodo_idx"),
+            models.Index(fields=["moneda", "periodo"], name="api_calif_moneda_periodo_idx"),
+            # ORDER BY -created_at del listado y rangos de fecha de reportes/stats;
+            # con moneda/monto/monto_clp cubre el Resumen por moneda sin leer la tabla
+            models.Index(fields=["created_at", "moneda", "monto", "monto_clp"], name="api_calif_created_cubre_idx"),
+            # Filtro "no inscritos": solo las filas sin razón social (pocas) entran a
+            # estos índices, en el orden del listado (-created_at) y en el del
+            # export y `enriquecer` (id)
+            models.Index(fields=["created_at"], name="api_calif_noinsc_created_idx", condition=SIN_RAZON_SOCIAL),
+            models.Index(fields=["id"], name="api_calif_noinsc_id_idx", condition=SIN_RAZON_SOCIAL),
         ]
 
     def __str__(self):
         return f"{self.rut} {self.tipo_instrumento} {self.folio} [{self.moneda}] {self.monto}"
 
+    def calcular_monto_clp(self):
+        from .fx import a_clp, tasa_clp
+
+        self.fx_clp_per_unit = tasa_clp(self.moneda, self.periodo)
+        self.monto_clp = a_clp(self.monto, self.fx_clp_per_unit)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or {"monto", "moneda", "periodo"} & set(update_fields):
+            self.calcular_monto_clp()
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | {"monto_clp", "fx_clp_per_unit"}
+        super().save(*args, **kwargs)
+
 
 class FxRate(models.Model):
     code = models.CharField(max_length=3, unique=True)  # 'CLP','USD','PEN','COP'
@@ -97,3 +130,39 @@ class FxRate(models.Model):
 
     def __str__(self):
         return f"{self.code} ({self.clp_per_unit} CLP)"
+
+
+class FxRateHistorico(models.Model):
+    """
+    Serie de tasas por moneda: cada fila rige desde `vigente_desde` hasta la
+    siguiente. FxRate sigue siendo la tasa "de hoy"; al cambiarla se agrega
+    aquí una fila vigente desde la fecha del cambio (ver api/fx.py).
+    """
+    code = models.CharField(max_length=3)
+    vigente_desde = models.DateField()
+    clp_per_unit = models.DecimalField(max_digits=12, decimal_places=4)
+
+    class Meta:
+        ordering = ["code", "vigente_desde"]
+        constraints = [
+            # Su índice (code, vigente_desde) resuelve la consulta "tasa a la fecha X"
+            models.UniqueConstraint(fields=["code", "vigente_desde"], name="api_fxhist_code_desde_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.code} desde {self.vigente_desde}: {self.clp_per_unit} CLP"
+
+
+class VersionTabla(models.Model):
+    """
+    Contador de cambios de una tabla, mantenido por triggers de la BD (ver
+    api/versiones.py): todo INSERT/UPDATE/DELETE lo incrementa, también
+    bulk_create, update() y SQL directo. Es el validador (ETag / Last-Modified)
+    del listado y de stats: comprobarlo es una lectura por clave primaria.
+    """
+    tabla = models.CharField(max_length=63, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    modificado = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.tabla} v{self.version}"
@@ -1,14 +1,125 @@
 # api/permissions.py
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import caches
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
 User = get_user_model()
 
+# ====== Cache de grupos (roles) por usuario ======
+# Nivel 1: atributo en la instancia → una consulta por usuario y request.
+# Nivel 2 (opcional): el cache compartido ROLE_CACHE (alias de CACHES) con TTL
+#          corto, invalidado por m2m_changed de User.groups y por cambios en
+#          Group. Debe ser compartido entre workers (Redis/BD): un cache por
+#          proceso dejaría a un admin degradado con permisos en los demás.
+#          Vacío = solo nivel 1.
+ROLE_CACHE = getattr(settings, "ROLE_CACHE", "")
+ROLE_CACHE_TTL = int(getattr(settings, "ROLE_CACHE_TTL", 60))
+
+_ATTR = "_nuamx_group_names"
+# Generación: invalidar a todos = sumar 1 (las claves viejas vencen solas)
+_CLAVE_GEN = "roles:gen"
+
+
+def _cache_roles():
+    return caches[ROLE_CACHE] if ROLE_CACHE and ROLE_CACHE_TTL > 0 else None
+
+
+def _clave_roles(cache, pk) -> str:
+    return f"roles:{cache.get(_CLAVE_GEN, 0)}:{pk}"
+
+
+def group_names_for(user) -> tuple[str, ...]:
+    """Nombres de grupos del usuario, con cache por instancia y compartido (ROLE_CACHE)."""
+    names = getattr(user, _ATTR, None)
+    if names is not None:
+        return names
+
+    prefetched = getattr(user, "_prefetched_objects_cache", {}).get("groups")
+    if prefetched is not None:
+        names = tuple(g.name for g in prefetched)
+    else:
+        cache = _cache_roles()
+        clave = _clave_roles(cache, user.pk) if cache else None
+        hit = cache.get(clave) if cache else None
+        if hit is not None:
+            names = tuple(hit)
+        else:
+            names = tuple(user.groups.values_list("name", flat=True))
+            if cache:
+                cache.set(clave, names, timeout=ROLE_CACHE_TTL)
+
+    setattr(user, _ATTR, names)
+    return names
+
+
+def prefetch_roles(users) -> list:
+    """
+    Resuelve los grupos de una página de usuarios en UNA consulta
+    (para querysets sin prefetch_related("groups")). Devuelve la lista.
+    """
+    users = list(users)
+    pendientes = {u.pk: u for u in users if getattr(u, _ATTR, None) is None}
+    if pendientes:
+        por_usuario: dict[int, list[str]] = {pk: [] for pk in pendientes}
+        filas = User.groups.through.objects.filter(user_id__in=pendientes).values_list("user_id", "group__name")
+        for user_id, name in filas:
+            por_usuario[user_id].append(name)
+        for pk, u in pendientes.items():
+            setattr(u, _ATTR, tuple(por_usuario[pk]))
+    return users
+
+
+def invalidar_roles(user_ids=None) -> None:
+    """Olvida los grupos cacheados de esos usuarios (None = todos), en todos los workers."""
+    cache = _cache_roles()
+    if cache is None:
+        return
+    if user_ids is None:
+        cache.add(_CLAVE_GEN, 0, timeout=None)
+        try:
+            cache.incr(_CLAVE_GEN)
+        except ValueError:  # expulsada entre add() e incr()
+            cache.set(_CLAVE_GEN, 1, timeout=None)
+    else:
+        cache.delete_many([_clave_roles(cache, pk) for pk in user_ids])
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def _roles_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if isinstance(instance, User):
+        invalidar_roles([instance.pk])
+        if hasattr(instance, _ATTR):
+            delattr(instance, _ATTR)
+    elif pk_set:
+        # group.user_set.add/remove(...): pk_set son usuarios
+        invalidar_roles(pk_set)
+    else:
+        # group.user_set.clear(): no sabemos a quiénes afectó
+        invalidar_roles()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def _roles_group_changed(sender, **kwargs):
+    invalidar_roles()
+
+
+@receiver(post_delete, sender=User)
+def _roles_user_deleted(sender, instance, **kwargs):
+    invalidar_roles([instance.pk])
+
+
 def get_role(user: User) -> str:
     """Devuelve 'Administrador' | 'Operador' | 'Auditor' | 'Usuario'."""
     if not user or not user.is_authenticated:
         return "Usuario"
-    groups = set(user.groups.values_list("name", flat=True))
+    groups = set(group_names_for(user))
     if "Administrador" in groups or user.is_superuser:
         return "Administrador"
     if "Operador" in groups or user.is_staff:
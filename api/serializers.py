@@ -1,11 +1,14 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.utils import timezone
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError as DjangoValidationError
-from rest_framework import serializers
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
 
 from .models import Calificacion  # ⬅️ necesario para el serializer de calificaciones
+from .permissions import group_names_for
 
 User = get_user_model()
 
@@ -19,7 +22,7 @@ def _primary_role_for(user: User) -> str:
     2) flags de superuser/staff
     3) 'Usuario'
     """
-    groups = list(user.groups.all().values_list("name", flat=True))
+    groups = group_names_for(user)
     if groups:
         priority = ["Administrador", "Operador", "Auditor", "Usuario"]
         for name in priority:
@@ -228,8 +231,96 @@ class CalificacionSerializer(serializers.ModelSerializer):
             "folio",
             "monto",
             "moneda",             # ⬅️ NUEVO
+            "monto_clp",          # calculado al guardar (api/fx.py)
+            "fx_clp_per_unit",
             "estado_validacion",
             "observaciones",
             "created_at",
         ]
-        read_only_fields = ["id", "created_at"]
+        read_only_fields = ["id", "created_at", "monto_clp", "fx_clp_per_unit"]
+
+
+# ---------- Lectura rápida (listados grandes) ----------
+
+# Campos cuya representación es el mismo valor que entrega la BD (str / int)
+_TAL_CUAL = (serializers.CharField, serializers.IntegerField, serializers.ChoiceField)
+
+
+class LecturaRapida:
+    """
+    Los mismos dicts que `serializer_class(qs, many=True).data`, pero desde `.values()`:
+    sin instanciar un modelo ni recorrer los campos de DRF por fila. El mapeo
+    columna → conversor se arma una sola vez a partir de los campos del serializer
+    (así no se desincroniza); solo sirve si todos son columnas del modelo.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self._mapeo = None
+
+    def _compilar(self):
+        mapeo = []
+        for nombre, campo in self.serializer_class().fields.items():
+            if campo.write_only:
+                continue
+            if campo.source != nombre or isinstance(campo, serializers.SerializerMethodField):
+                raise ValueError(f"LecturaRapida: {nombre!r} no es una columna del modelo")
+            if isinstance(campo, _TAL_CUAL):
+                tipo = None
+            elif isinstance(campo, serializers.DateTimeField) and \
+                    getattr(campo, "format", api_settings.DATETIME_FORMAT) == ISO_8601:
+                tipo = "datetime"
+            elif isinstance(campo, serializers.DecimalField) and campo.decimal_places is not None and \
+                    getattr(campo, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING) and \
+                    not (campo.localize or getattr(campo, "normalize_output", False)):
+                tipo = self._decimal(campo)
+            else:
+                tipo = campo.to_representation
+            mapeo.append((nombre, tipo))
+        return mapeo
+
+    @staticmethod
+    def _decimal(campo):
+        # La BD ya entrega el Decimal con decimal_places (el campo del modelo lo cuantiza):
+        # basta formatearlo; si no, el quantize de DRF
+        exponente = -campo.decimal_places
+
+        def decimal_a_texto(valor):
+            if valor.as_tuple().exponent == exponente:
+                return format(valor, "f")
+            return campo.to_representation(valor)
+        return decimal_a_texto
+
+    @property
+    def mapeo(self) -> list[tuple]:
+        if self._mapeo is None:
+            self._mapeo = self._compilar()
+        return self._mapeo
+
+    @property
+    def columnas(self) -> list[str]:
+        return [nombre for nombre, _ in self.mapeo]
+
+    def _conversores(self):
+        tz = timezone.get_current_timezone() if settings.USE_TZ else None
+
+        def fecha_hora(valor):
+            # DateTimeField.to_representation: a la zona activa, ISO 8601 y "Z" si es UTC
+            texto = (valor.astimezone(tz) if tz and valor.tzinfo is not None else valor).isoformat()
+            return texto[:-6] + "Z" if texto.endswith("+00:00") else texto
+
+        return [(nombre, fecha_hora if tipo == "datetime" else tipo) for nombre, tipo in self.mapeo if tipo is not None]
+
+    def filas(self, queryset) -> list[dict]:
+        conversores = self._conversores()
+        filas = list(queryset.values(*self.columnas))
+        if conversores:
+            for fila in filas:
+                for nombre, conv in conversores:
+                    valor = fila[nombre]
+                    if valor is not None:
+                        fila[nombre] = conv(valor)
+        return filas
+
+
+lectura_calificaciones = LecturaRapida(CalificacionSerializer)
@@ -1,3 +1,857 @@
-from django.test import TestCase
+import copy
+import gzip
+import json
+import os
+import pickle
+import subprocess
+import sys
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import parse_http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .busqueda import asegurar_indice_texto, buscar_ids, filtrar_texto, terminos
+from .formas_consulta import formas, problema
+from .hashers import PBKDF2ConfigurableHasher
+from .fx import TablaFx, convertir_lote, fecha_de_periodo, invalidar_tasas, recalcular_monto_clp, tasa_en_bd
+from .models import Calificacion, FxRate, FxRateHistorico, UserFlag, UserProfile
+from . import authentication, permissions, throttling
+from .permissions import get_role, invalidar_roles
+from .renderers import ORJSONRenderer, orjson
+from .serializers import CalificacionSerializer, lectura_calificaciones
+from .throttling import CacheBuckets, MemoriaBuckets
+from .versiones import version_tabla
+from .views.auth import _autenticar_login
+from .views.comun import _apply_rut_filter
+from core.db_router import REPLICA_ALIAS
+from core.lazy_imports import LazyModule, lazy_import
+from core.middleware import CompresionMiddleware, brotli
+from core.query_plan import analizar, sin_seq_scan
+from core.ventanas import hoy_local, inicio_dia, ventana_dias
+
+User = get_user_model()
+
+
+class UsersListQueryCountTests(TestCase):
+    """GET /api/users/ no debe hacer consultas por usuario (N+1)."""
+
+    TOTAL = 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        roles = {name: Group.objects.create(name=name) for name in ("Administrador", "Operador", "Auditor")}
+        cls.admin = User.objects.create_user("admin@nuamx.cl", "admin@nuamx.cl", "x")
+        cls.admin.groups.add(roles["Administrador"])
+
+        users = User.objects.bulk_create(
+            User(username=f"u{i}@nuamx.cl", email=f"u{i}@nuamx.cl", password="!")
+            for i in range(cls.TOTAL - 1)
+        )
+        UserProfile.objects.bulk_create(UserProfile(user=u, phone=f"+569{i:08d}") for i, u in enumerate(users))
+        UserFlag.objects.bulk_create(UserFlag(user=u) for u in users[::2])
+        User.groups.through.objects.bulk_create(
+            User.groups.through(user_id=u.id, group_id=(roles["Operador"] if i % 3 else roles["Auditor"]).id)
+            for i, u in enumerate(users)
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _queries(self, url):
+        # Solicitante "frío" en cada request (sin rol memorizado): conteos comparables
+        invalidar_roles()
+        self.client.force_authenticate(User.objects.get(pk=self.admin.pk))
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        return resp.json(), len(ctx)
+
+    def test_query_count_constant(self):
+        _, pocas = self._queries("/api/users/?page_size=10")
+        data, muchas = self._queries("/api/users/?page_size=500")
+        self.assertEqual(data["count"], self.TOTAL)
+        self.assertEqual(len(data["results"]), 500)
+        self.assertEqual(pocas, muchas)
+        # COUNT + página (con perfil/flags) + grupos de la página (+ rol del solicitante)
+        self.assertLessEqual(muchas, 4)
+
+    def test_all_pages_same_query_count(self):
+        counts = set()
+        vistos = 0
+        url = "/api/users/?page_size=500"
+        while url:
+            data, n = self._queries(url)
+            counts.add(n)
+            vistos += len(data["results"])
+            url = data["next"]
+        self.assertEqual(vistos, self.TOTAL)
+        self.assertEqual(len(counts), 1)
+
+    def test_filters(self):
+        data, _ = self._queries("/api/users/?role=Auditor&page_size=500")
+        self.assertEqual(data["count"], len(range(0, self.TOTAL - 1, 3)))
+        self.assertTrue(all(u["role"] == "Auditor" for u in data["results"]))
+
+        data, _ = self._queries("/api/users/?role=Administrador")
+        self.assertEqual([u["email"] for u in data["results"]], ["admin@nuamx.cl"])
+
+        data, _ = self._queries("/api/users/?email=u12@")
+        self.assertEqual([u["email"] for u in data["results"]], ["u12@nuamx.cl"])
+        self.assertEqual(data["results"][0]["phone"], "+56900000012")
+
+        data, _ = self._queries("/api/users/?q=U99")
+        self.assertEqual(data["count"], 10)  # u99, u990..u998
+
+
+class RolesCacheTests(TestCase):
+    """El cache compartido de roles se invalida para todos los workers al cambiar grupos."""
+
+    def setUp(self):
+        from django.core.cache import caches
+        caches["default"].clear()
+        parche = mock.patch.object(permissions, "ROLE_CACHE", "default")
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.admin = Group.objects.create(name="Administrador")
+        self.user = User.objects.create_user("jefe@nuamx.cl", "jefe@nuamx.cl", "x")
+        self.user.groups.add(self.admin)
+
+    def _rol(self):
+        # Instancia nueva = otro request (u otro worker leyendo el mismo cache)
+        return get_role(User.objects.get(pk=self.user.pk))
+
+    def test_cache_entre_requests_e_invalidacion(self):
+        self.assertEqual(self._rol(), "Administrador")
+        with self.assertNumQueries(1):  # solo el usuario: los grupos salen del cache
+            self.assertEqual(self._rol(), "Administrador")
+        self.user.groups.remove(self.admin)  # m2m_changed
+        self.assertEqual(self._rol(), "Usuario")
+        self.user.groups.add(self.admin)
+        self.assertEqual(self._rol(), "Administrador")
+        # Cambios por SQL directo: invalidar_roles() sin ids cambia la generación
+        User.groups.through.objects.filter(user_id=self.user.pk).delete()
+        invalidar_roles()
+        self.assertEqual(self._rol(), "Usuario")
+
+
+class LoginTests(TestCase):
+    """_autenticar_login: email sin mayúsculas, username, fallos y re-hash al perfil configurado."""
+
+    ITERACIONES = 1000  # bajas para el test; el perfil real no cambia la lógica
+
+    def setUp(self):
+        from django.contrib.auth.hashers import make_password
+        parche = mock.patch.object(PBKDF2ConfigurableHasher, "iterations", self.ITERACIONES)
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.user = User.objects.create(
+            username="ana", email="Ana.Perez@NuamX.cl", password=make_password("Clave123!"),
+        )
+        self.request = RequestFactory().post("/api/token/")
+
+    def _login(self, identifier, password="Clave123!"):
+        return _autenticar_login(self.request, identifier, password)
+
+    def test_email_sin_mayusculas_y_username(self):
+        with self.assertNumQueries(1):  # usuario + flags en una consulta
+            self.assertEqual(self._login("ana.perez@nuamx.cl"), self.user)
+        self.assertEqual(self._login("ANA.PEREZ@NUAMX.CL"), self.user)
+        self.assertEqual(self._login("ana"), self.user)
+        self.assertIsNone(self._login("Ana"))  # el username sí distingue mayúsculas
+
+    def test_fallos(self):
+        from django.contrib.auth.signals import user_login_failed
+        fallidos = []
+
+        def _capturar(sender, credentials, **kwargs):
+            fallidos.append(credentials["username"])
+
+        user_login_failed.connect(_capturar)
+        self.addCleanup(user_login_failed.disconnect, _capturar)
+
+        self.assertIsNone(self._login("ana.perez@nuamx.cl", "otra"))
+        # Usuario inexistente: igual hashea la contraseña (mismo tiempo que uno existente)
+        with mock.patch.object(PBKDF2ConfigurableHasher, "encode", wraps=PBKDF2ConfigurableHasher().encode) as encode:
+            self.assertIsNone(self._login("nadie@nuamx.cl"))
+        self.assertEqual(encode.call_count, 1)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(self._login("ana.perez@nuamx.cl"))
+        self.assertEqual(fallidos, ["ana.perez@nuamx.cl", "nadie@nuamx.cl", "ana.perez@nuamx.cl"])
+
+    def test_rehash_a_las_iteraciones_configuradas(self):
+        viejo = PBKDF2ConfigurableHasher().encode("Clave123!", "salviejo", iterations=500)
+        User.objects.filter(pk=self.user.pk).update(password=viejo)
+        self.assertIsNotNone(self._login("ana"))
+        nuevo = User.objects.get(pk=self.user.pk).password
+        self.assertTrue(nuevo.startswith(f"pbkdf2_sha256${self.ITERACIONES}$"), nuevo)
+        # Ya al día: otro login no vuelve a escribir
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertIsNotNone(self._login("ana"))
+        self.assertFalse(any(q["sql"].startswith("UPDATE") for q in ctx))
+
+    def test_indice_lower_email(self):
+        # Migración 0007: el login por email busca por LOWER(email) con índice
+        tabla = User._meta.db_table
+        with connection.cursor() as cur:
+            self.assertIn("api_user_email_lower_idx", connection.introspection.get_constraints(cur, tabla))
+        from django.db.models.functions import Lower
+        qs = User.objects.annotate(email_lower=Lower("email")).filter(email_lower="ana.perez@nuamx.cl")
+        with sin_seq_scan():
+            plan = analizar(qs, tabla)
+        self.assertIn("api_user_email_lower_idx", plan.indices, str(plan))
+
+
+class JwtUsuarioCacheTests(TestCase):
+    """El cache de usuarios por token deja de valer en todos los workers al cambiar la cuenta."""
+
+    def setUp(self):
+        from django.core.cache import caches
+        from rest_framework_simplejwt.tokens import AccessToken
+        caches["default"].clear()
+        parche = mock.patch.object(authentication, "JWT_USER_CACHE", "default")
+        parche.start()
+        self.addCleanup(parche.stop)
+        self.user = User.objects.create_user("jwt@nuamx.cl", "jwt@nuamx.cl", "x")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def _me(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get("/api/me/")
+        return resp.status_code, sum('FROM "auth_user"' in q["sql"] for q in ctx)
+
+    def test_desactivar_invalida_en_otros_workers(self):
+        self.assertEqual(self._me(), (200, 1))
+        self.assertEqual(self._me(), (200, 0))  # usuario desde el cache del proceso
+        # Otro worker desactiva la cuenta: aquí no corre ningún signal, solo cambia la versión
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        with mock.patch.dict(authentication._cache):
+            authentication.invalidar_usuario(self.user.pk)
+        self.assertEqual(self._me()[0], 401)
+
+
+class ThrottlingTests(TestCase):
+    """Token buckets del login y refresh: recarga, 429 + Retry-After y scopes independientes."""
+
+    RATES = {"login_ip": "4/60", "login_identificador": "2/60", "refresh_ip": "1/60"}
+
+    def setUp(self):
+        from django.core.cache import caches
+        caches["default"].clear()
+        for parche in (
+            mock.patch.dict(throttling.LOGIN_THROTTLE_RATES, self.RATES, clear=True),
+            mock.patch.object(throttling, "_store", MemoriaBuckets()),
+        ):
+            parche.start()
+            self.addCleanup(parche.stop)
+        self.client = APIClient()
+
+    def test_buckets_recargan(self):
+        for store in (MemoriaBuckets(), CacheBuckets("default")):
+            with self.subTest(store=type(store).__name__):
+                # 2 de capacidad, 1 token por segundo
+                self.assertEqual(store.consumir("k", 2, 1.0, 100.0), 0)
+                self.assertEqual(store.consumir("k", 2, 1.0, 100.0), 0)
+                self.assertAlmostEqual(store.consumir("k", 2, 1.0, 100.0), 1.0)
+                self.assertAlmostEqual(store.consumir("k", 2, 1.0, 100.5), 0.5)  # medio token recargado
+                self.assertEqual(store.consumir("k", 2, 1.0, 102.0), 0)
+                self.assertEqual(store.consumir("otra", 2, 1.0, 100.5), 0)
+
+    def _login(self, email, ip="10.0.0.1"):
+        return self.client.post("/api/token/", {"email": email, "password": "mala"}, format="json", REMOTE_ADDR=ip)
+
+    def test_429_con_retry_after_por_identificador_e_ip(self):
+        self.assertEqual(self._login("victima@nuamx.cl").status_code, 400)
+        self.assertEqual(self._login("victima@nuamx.cl").status_code, 400)
+        r = self._login("victima@nuamx.cl")
+        self.assertEqual(r.status_code, 429)
+        self.assertGreater(int(r["Retry-After"]), 0)
+        # Desde otra IP el mismo email sigue pudiendo entrar: nadie bloquea a un tercero
+        self.assertEqual(self._login("victima@nuamx.cl", ip="10.0.0.2").status_code, 400)
+        # El límite por IP cuenta todos los intentos de esa IP, con cualquier email
+        self.assertEqual(self._login("otro@nuamx.cl").status_code, 400)
+        self.assertEqual(self._login("otro2@nuamx.cl").status_code, 429)
+
+    def test_scopes_independientes(self):
+        self.assertEqual(self.client.post("/api/token/refresh/", {"refresh": "x"}, format="json").status_code, 401)
+        r = self.client.post("/api/token/refresh/", {"refresh": "x"}, format="json")
+        self.assertEqual(r.status_code, 429)
+        self.assertIn("Retry-After", r)
+        # El refresh agotado no toca los buckets del login
+        self.assertEqual(self._login("a@nuamx.cl", ip="127.0.0.1").status_code, 400)
+        self.assertGreaterEqual(throttling.metricas()["scopes"]["refresh_ip"]["rechazados"], 1)
+
+
+class RutFilterTests(TestCase):
+    """El filtro de RUT (Replace en SQL) da lo mismo en SQLite y PostgreSQL (DB_PROFILE)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for rut in ("12.345.678-9", "12345678-9", "12 345 678 9", "9.876.543-2"):
+            Calificacion.objects.create(
+                rut=rut, razon_social="Empresa", periodo="2025-01", tipo_instrumento="Factura",
+                folio="1", monto=1000, estado_validacion="Pendiente",
+            )
+        cls.user = User.objects.create_user("op@nuamx.cl", "op@nuamx.cl", "x")
+
+    def test_ignora_puntos_guiones_y_espacios(self):
+        for consulta in ("12345678", "12.345.678-9", "12345678-9", " 12 345 678 "):
+            self.assertEqual(_apply_rut_filter(Calificacion.objects.all(), consulta).count(), 3, consulta)
+        self.assertEqual(_apply_rut_filter(Calificacion.objects.all(), "98765432").count(), 1)
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        resp = client.get("/api/calificaciones/", {"rut": "12.345.678-9"})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(len(data["results"] if isinstance(data, dict) else data), 3)
+
+
+class MontoClpTests(TestCase):
+    """monto_clp se llena al guardar y se recalcula en SQL cuando cambia una FxRate."""
+
+    @classmethod
+    def setUpTestData(cls):
+        FxRate.objects.create(code="USD", name="Dólar", clp_per_unit="950.5000")
+        for moneda, monto in (("CLP", 1000), ("USD", 3), ("USD", 10), ("PEN", 7)):
+            Calificacion.objects.create(
+                rut="11111111-1", razon_social="Empresa", periodo="2025-01", tipo_instrumento="Factura",
+                folio="1", monto=monto, moneda=moneda, estado_validacion="Pendiente",
+            )
+
+    def setUp(self):
+        # El cache de tasas es del proceso: no debe sobrevivir al rollback de otro test
+        invalidar_tasas()
+
+    def _montos(self):
+        return dict(Calificacion.objects.order_by("id").values_list("monto", "monto_clp"))
+
+    def test_se_llena_al_guardar(self):
+        # 3 × 950.5 = 2851.5 → 2852 (mitad hacia arriba); PEN sin tasa → NULL
+        self.assertEqual(self._montos(), {1000: 1000, 3: 2852, 10: 9505, 7: None})
+        c = Calificacion.objects.get(monto=10)
+        c.monto = 2
+        c.save(update_fields=["monto"])
+        c.refresh_from_db()
+        self.assertEqual((c.monto_clp, str(c.fx_clp_per_unit)), (1901, "950.5000"))
+
+    def test_recalcular_tras_cambio_de_tasa(self):
+        # Un cambio de FxRate rige desde hoy: el período 2025-01 conserva su tasa.
+        # La primera tasa de PEN rige hacia atrás y llena la fila que estaba en NULL.
+        usd = FxRate.objects.get(code="USD")
+        usd.clp_per_unit = Decimal("1000")
+        usd.save()
+        FxRate.objects.create(code="PEN", name="Sol", clp_per_unit="250.2500")
+        resultado = recalcular_monto_clp(lote=2, log=lambda *_: None)
+        self.assertEqual(resultado, {"CLP": 1, "PEN": 1, "USD": 2})
+        self.assertEqual(self._montos(), {1000: 1000, 3: 2852, 10: 9505, 7: 1752})
+
+        # Con una tasa vigente desde antes del período, sí cambia
+        FxRateHistorico.objects.create(code="USD", vigente_desde=date(2025, 1, 15), clp_per_unit="900")
+        recalcular_monto_clp(monedas=["USD"], log=lambda *_: None)
+        self.assertEqual(self._montos(), {1000: 1000, 3: 2700, 10: 9000, 7: 1752})
+
+    def test_suma_entre_monedas_en_una_consulta(self):
+        from django.db.models import Sum
+
+        with CaptureQueriesContext(connection) as ctx:
+            total = Calificacion.objects.aggregate(t=Sum("monto_clp"))["t"]
+        self.assertEqual((total, len(ctx.captured_queries)), (1000 + 2852 + 9505, 1))
+
+
+class FxHistorialTests(TestCase):
+    """Tasa vigente al cierre de cada período: en memoria (bisect) y en SQL dan lo mismo."""
+
+    @classmethod
+    def setUpTestData(cls):
+        FxRateHistorico.objects.bulk_create(
+            FxRateHistorico(code="USD", vigente_desde=d, clp_per_unit=t)
+            for d, t in ((date(2024, 1, 1), "800"), (date(2025, 3, 10), "900"), (date(2025, 6, 1), "950"))
+        )
+        cls.user = User.objects.create_user("fx@nuamx.cl", "fx@nuamx.cl", "x")
+
+    def setUp(self):
+        invalidar_tasas()
+
+    def test_tasa_a_la_fecha(self):
+        with CaptureQueriesContext(connection) as ctx:
+            convertidos = convertir_lote([
+                (10, "USD", "2023-12"),   # antes de la primera tasa
+                (10, "USD", "2025-02"),
+                (10, "USD", "2025-03"),   # cierre 31-03: ya rige la del 10-03
+                (10, "usd", "2025-05"),
+                (10, "USD", "2025-06"),
+                (10, "CLP", "2025-06"),
+                (10, "PEN", "2025-06"),
+            ])
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual([c for c, _ in convertidos], [None, 8000, 9000, 9000, 9500, 10, None])
+        for periodo in ("2023-12", "2025-02", "2025-03", "2025-06"):
+            fecha = fecha_de_periodo(periodo)
+            self.assertEqual(tasa_en_bd("USD", fecha), TablaFx(
+                FxRateHistorico.objects.values_list("code", "vigente_desde", "clp_per_unit")
+            ).tasa("USD", fecha), periodo)
+
+    def test_calificacion_usa_la_tasa_de_su_periodo(self):
+        c = Calificacion.objects.create(
+            rut="11111111-1", razon_social="Empresa", periodo="2025-04", tipo_instrumento="Factura",
+            folio="1", monto=2, moneda="USD", estado_validacion="Pendiente",
+        )
+        self.assertEqual(c.monto_clp, 1800)
+        c.periodo = "2025-07"
+        c.save(update_fields=["periodo"])
+        c.refresh_from_db()
+        self.assertEqual(c.monto_clp, 1900)
+
+    def test_endpoint_en_lote(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        resp = client.post("/api/fx/convertir/", {"items": [
+            {"monto": "1,5", "moneda": "USD", "periodo": "2024-06"},
+            {"monto": 3, "moneda": "PEN", "periodo": "2024-06"},
+        ]}, format="json")
+        self.assertEqual(resp.status_code, 200, resp.content)
+        self.assertEqual(resp.json(), {"items": [
+            {"monto_clp": 1200, "fx_clp_per_unit": "800.0000"}, {"monto_clp": None, "fx_clp_per_unit": None},
+        ], "sin_tasa": 1})
+
+    def test_endpoint_rechaza_entrada_invalida(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for body in (
+            [{"monto": 1, "moneda": "USD"}],  # lista en vez de objeto
+            {"items": [{"monto": "nan", "moneda": "USD"}]},
+            {"items": [{"monto": "inf", "moneda": "USD"}]},
+            {"items": [{"monto": "1e400", "moneda": "USD"}]},
+            {"items": [{"monto": 1, "moneda": 5, "periodo": "2024-06"}]},
+            {"items": [{"monto": 1, "moneda": "USD", "periodo": 202406}]},
+            {"items": ["1"]},
+        ):
+            with self.subTest(body=body):
+                self.assertEqual(client.post("/api/fx/convertir/", body, format="json").status_code, 400)
+
+
+class PlanesConsultaTests(TestCase):
+    """Ninguna forma de consulta caliente (api/formas_consulta.py) recorre api_calificacion entera."""
+
+    def test_formas_calientes_usan_indice(self):
+        with sin_seq_scan():
+            for forma in formas():
+                if forma.no_sargable:
+                    continue
+                with self.subTest(forma.nombre):
+                    plan = analizar(forma.qs)
+                    self.assertEqual(problema(forma, plan), "", str(plan))
+
+    def test_detecta_scan_completo(self):
+        with sin_seq_scan():
+            plan = analizar(Calificacion.objects.filter(folio="1"))
+        self.assertTrue(plan.scan_completo, str(plan))
+        self.assertFalse(plan.busca_por_indice, str(plan))
+
+
+class VentanasTests(TestCase):
+    """Días de America/Santiago como rangos UTC [inicio, fin), también en los cambios de hora."""
+
+    def test_limites_utc(self):
+        utc = lambda *a: datetime(*a, tzinfo=dt_timezone.utc)
+        self.assertEqual(inicio_dia(date(2025, 1, 15)), utc(2025, 1, 15, 3))   # verano, UTC-3
+        self.assertEqual(inicio_dia(date(2025, 7, 15)), utc(2025, 7, 15, 4))   # invierno, UTC-4
+        # 2025-09-07: a medianoche se salta a la 01:00; el día dura 23 horas
+        inicio, fin = ventana_dias(date(2025, 9, 7), date(2025, 9, 7))
+        self.assertEqual((inicio, fin - inicio), (utc(2025, 9, 7, 4), timedelta(hours=23)))
+        # 2025-04-06: a medianoche se vuelve a las 23:00 del sábado; el sábado dura 25 horas
+        inicio, fin = ventana_dias(date(2025, 4, 5), date(2025, 4, 5))
+        self.assertEqual(fin - inicio, timedelta(hours=25))
+
+    def test_stats_agrupa_por_dia_local_sin_funciones_sobre_la_columna(self):
+        hoy = hoy_local()
+        medianoche = inicio_dia(hoy)
+        for instante in (medianoche - timedelta(microseconds=1), medianoche, medianoche + timedelta(hours=1)):
+            c = Calificacion.objects.create(
+                rut="1-9", razon_social="x", periodo="2025-01", tipo_instrumento="Factura",
+                folio="1", monto=1, estado_validacion="Rechazada",
+            )
+            Calificacion.objects.filter(pk=c.pk).update(created_at=instante)
+        Calificacion.objects.filter(pk=c.pk).update(created_at=inicio_dia(hoy - timedelta(days=14)))  # fuera
+
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user("st@nuamx.cl", "st@nuamx.cl", "x"))
+        with CaptureQueriesContext(connection) as ctx:
+            data = client.get("/api/calificaciones/stats/").json()
+        serie = {d["date"]: d["count"] for d in data["registros_por_dia"]}
+        self.assertEqual(serie[hoy.isoformat()], 1)
+        self.assertEqual(serie[(hoy - timedelta(days=1)).isoformat()], 1)
+        self.assertEqual(sum(serie.values()), 2)
+        self.assertEqual(data["errores_ultimos_14d"], 2)
+        sql = " ".join(q["sql"] for q in ctx.captured_queries if "api_calificacion" in q["sql"])
+        self.assertNotIn("cast_date", sql)
+        self.assertNotIn("AT TIME ZONE", sql)
+
+
+class BusquedaTextoTests(TestCase):
+    """Prefijos sin tildes ni mayúsculas sobre el índice de texto, sincronizado por la BD."""
+
+    @classmethod
+    def setUpTestData(cls):
+        base = dict(rut="1-9", periodo="2025-01", tipo_instrumento="Factura", folio="1", monto=1)
+        cls.nunoa = Calificacion.objects.create(razon_social="Constructora Ñuñoa SpA", **base)
+        cls.obs = Calificacion.objects.create(razon_social="Inversiones Sur", observaciones="ex constructora", **base)
+        Calificacion.objects.bulk_create([
+            Calificacion(razon_social="Comercial Andes", observaciones="", **base),
+            Calificacion(razon_social="", observaciones="pendiente Ñuñoa", **base),
+        ])
+        cls.user = User.objects.create_user("bq@nuamx.cl", "bq@nuamx.cl", "x")
+
+    def _ids(self, texto, **kw):
+        return set(filtrar_texto(Calificacion.objects.all(), texto, **kw).values_list("id", flat=True))
+
+    def test_terminos_normalizados(self):
+        self.assertEqual(terminos('  CONSTRU* "Ñuñoa" OR '), ["constru", "nunoa", "or"])
+
+    def test_prefijo_sin_tildes_ni_mayusculas(self):
+        self.assertEqual(self._ids("constru nuño", columnas=("razon_social",)), {self.nunoa.id})
+        self.assertEqual(self._ids("NUNOA", columnas=("razon_social",)), {self.nunoa.id})
+        self.assertEqual(self._ids("constru"), {self.nunoa.id, self.obs.id})
+        self.assertEqual(len(self._ids("ñuñ")), 2)  # bulk_create también quedó indexado
+        self.assertEqual(self._ids("tora"), set())  # prefijos, no subcadenas
+
+    def test_triggers_update_y_delete(self):
+        Calificacion.objects.filter(pk=self.obs.pk).update(observaciones="", razon_social="Minera Norte")
+        self.assertEqual(self._ids("constru"), {self.nunoa.id})
+        self.assertEqual(self._ids("miner"), {self.obs.id})
+        self.nunoa.delete()
+        self.assertEqual(self._ids("constru"), set())
+
+    def test_relevancia_y_endpoints(self):
+        # La razón social pesa más que las observaciones
+        self.assertEqual(buscar_ids("constru", 10), [self.nunoa.id, self.obs.id])
+        # Autocompletar no corre con un último prefijo de menos de 3 letras
+        self.assertEqual(buscar_ids("co", 10), [])
+        self.assertEqual(buscar_ids("constru ñu", 10), [])
+        self.assertEqual(buscar_ids("constru ñuñ", 10), [self.nunoa.id])
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = client.get("/api/calificaciones/", {"q": "Constru"}).json()
+        filas = data["results"] if isinstance(data, dict) else data
+        self.assertEqual([f["id"] for f in filas], [self.nunoa.id, self.obs.id])
+        data = client.get("/api/calificaciones/", {"razon": "ñunoa"}).json()
+        filas = data["results"] if isinstance(data, dict) else data
+        self.assertEqual([f["id"] for f in filas], [self.nunoa.id])
+        data = client.get("/api/calificaciones/buscar/", {"q": "constru", "limit": 1}).json()
+        self.assertEqual([f["id"] for f in data["results"]], [self.nunoa.id])
+
+    def test_asegurar_indice_es_idempotente(self):
+        self.assertFalse(asegurar_indice_texto())
+
+
+class LecturaRapidaTests(TestCase):
+    """El listado desde .values() + orjson entrega exactamente lo mismo que el ModelSerializer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        base = dict(rut="1-9", periodo="2025-01", tipo_instrumento="Factura", estado_validacion="Válida")
+        Calificacion.objects.create(razon_social="Ñandú\u2028SpA", folio="1", monto=10, moneda="USD", **base)
+        Calificacion.objects.create(razon_social="Andes", folio="2", monto=5, observaciones="x", **base)
+        Calificacion.objects.filter(folio="1").update(monto_clp=9505, fx_clp_per_unit=Decimal("950.5"))
+        Calificacion.objects.filter(folio="2").update(created_at=datetime(2025, 4, 6, 3, 30, tzinfo=dt_timezone.utc))
+        cls.user = User.objects.create_user("lr@nuamx.cl", "lr@nuamx.cl", "x")
+
+    def test_mismos_dicts_que_el_serializer(self):
+        qs = Calificacion.objects.order_by("id")
+        for zona in ("America/Santiago", "UTC"):
+            with timezone.override(zona):
+                self.assertEqual(lectura_calificaciones.filas(qs), CalificacionSerializer(qs, many=True).data)
+        self.assertEqual(lectura_calificaciones.filas(qs)[0]["fx_clp_per_unit"], "950.5000")
+
+    @skipUnless(orjson, "orjson no está instalado")
+    def test_orjson_igual_a_json_renderer(self):
+        datos = {"filas": lectura_calificaciones.filas(Calificacion.objects.all()), 1: Decimal("1.50"),
+                 "t": timedelta(seconds=3), "d": date(2025, 1, 2), "f": datetime(2025, 1, 1, tzinfo=dt_timezone.utc)}
+        self.assertEqual(ORJSONRenderer().render(datos), JSONRenderer().render(datos))
+        self.assertIn(b"\\u2028", ORJSONRenderer().render(datos))
+
+    def test_listado_sin_modelos_por_fila(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            resp = client.get("/api/calificaciones/", {"ordering": "id"}, HTTP_ACCEPT="application/json")
+        self.assertEqual(resp.json(), CalificacionSerializer(Calificacion.objects.order_by("id"), many=True).data)
+        self.assertEqual(len([q for q in ctx.captured_queries if 'FROM "api_calificacion"' in q["sql"]]), 1)
+        csv_ = client.get("/api/calificaciones/export_csv/").content.decode()
+        self.assertIn("Andes,2025-01,Factura,2,5,CLP,Válida,x,2025-04-06T03:30:00+00:00", csv_)
+
+
+class GetCondicionalTests(TestCase):
+    """ETag/Last-Modified desde VersionTabla (triggers) y 304 sin la consulta principal."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Calificacion.objects.bulk_create([
+            Calificacion(rut="1-9", razon_social=f"Empresa {i}", periodo="2025-01", tipo_instrumento="Factura",
+                         folio=str(i), monto=i, estado_validacion="Válida")
+            for i in range(40)
+        ])
+        cls.user = User.objects.create_user("cg@nuamx.cl", "cg@nuamx.cl", "x")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _consulta_principal(self, ctx):
+        return [q for q in ctx.captured_queries if 'FROM "api_calificacion"' in q["sql"]]
+
+    def test_triggers_cuentan_todas_las_escrituras(self):
+        antes, _ = version_tabla("api_calificacion")
+        Calificacion.objects.filter(folio="1").update(monto=99)
+        Calificacion.objects.filter(folio="2").delete()
+        self.assertGreater(version_tabla("api_calificacion")[0], antes)
+
+    def test_listado_304_sin_consulta_principal(self):
+        r1 = self.client.get("/api/calificaciones/", {"estado": "Válida"})
+        self.assertEqual(r1.status_code, 200)
+        self.assertTrue(r1["ETag"].startswith('W/"'))
+        self.assertIn("Last-Modified", r1)
+        with CaptureQueriesContext(connection) as ctx:
+            r2 = self.client.get("/api/calificaciones/", {"estado": "Válida"}, HTTP_IF_NONE_MATCH=r1["ETag"])
+        self.assertEqual((r2.status_code, r2.content), (304, b""))
+        self.assertEqual(self._consulta_principal(ctx), [])
+        # Otros filtros u otra versión de la tabla: respuesta completa
+        otra = self.client.get("/api/calificaciones/", {"estado": "Rechazada"}, HTTP_IF_NONE_MATCH=r1["ETag"])
+        self.assertEqual(otra.status_code, 200)
+        Calificacion.objects.filter(folio="3").update(observaciones="editada")
+        r3 = self.client.get("/api/calificaciones/", {"estado": "Válida"}, HTTP_IF_NONE_MATCH=r1["ETag"])
+        self.assertEqual(r3.status_code, 200)
+        self.assertNotEqual(r3["ETag"], r1["ETag"])
+        # El listado enriquecido depende de servicios externos: sin validadores
+        self.assertNotIn("ETag", self.client.get("/api/calificaciones/", {"noi": "1"}))
+        self.assertIn("ETag", self.client.get("/api/calificaciones/", {"noi": "1", "enrich": "0"}))
+
+    def test_stats_if_modified_since(self):
+        r1 = self.client.get("/api/calificaciones/stats/")
+        with CaptureQueriesContext(connection) as ctx:
+            r2 = self.client.get("/api/calificaciones/stats/", HTTP_IF_MODIFIED_SINCE=r1["Last-Modified"])
+        self.assertEqual(r2.status_code, 304)
+        self.assertEqual(self._consulta_principal(ctx), [])
+        # Last-Modified nunca es anterior al inicio del día local (la serie cambia a medianoche)
+        self.assertGreaterEqual(parse_http_date(r1["Last-Modified"]), int(inicio_dia(hoy_local()).timestamp()))
+
+
+class CompresionTests(TestCase):
+    """JSON y CSV grandes de GET comprimidos según Accept-Encoding; lo demás intacto."""
+
+    @classmethod
+    def setUpTestData(cls):
+        Calificacion.objects.bulk_create([
+            Calificacion(rut="1-9", razon_social=f"Empresa {i}", periodo="2025-01", tipo_instrumento="Factura",
+                         folio=str(i), monto=i, estado_validacion="Válida")
+            for i in range(60)
+        ])
+        cls.user = User.objects.create_user("cz@nuamx.cl", "cz@nuamx.cl", "x")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_gzip_json_y_csv(self):
+        plano = self.client.get("/api/calificaciones/")
+        self.assertNotIn("Content-Encoding", plano)
+        r = self.client.get("/api/calificaciones/", HTTP_ACCEPT_ENCODING="gzip, br;q=0")
+        self.assertEqual(r["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", r["Vary"])
+        self.assertEqual(gzip.decompress(r.content), plano.content)
+        self.assertLess(len(r.content), len(plano.content))
+        # CSV directo al middleware: export_csv lee de la réplica, que este TestCase no declara
+        cuerpo = "rut,razon_social\n" + "".join(f"1-9,Empresa {i}\n" for i in range(200))
+        csv_ = CompresionMiddleware(lambda req: HttpResponse(cuerpo, content_type="text/csv; charset=utf-8"))(
+            RequestFactory().get("/api/calificaciones/export_csv/", HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertEqual(csv_["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(csv_.content).decode(), cuerpo)
+        # Respuestas chicas y métodos no seguros quedan sin comprimir
+        self.assertNotIn("Content-Encoding", self.client.get("/api/calificaciones/1/", HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertEqual(CompresionMiddleware._aceptadas("gzip;q=0, deflate, br ; q=0.5"), {"deflate", "br"})
+
+    @skipUnless(brotli, "brotli no está instalado")
+    def test_brotli_si_esta_instalado(self):
+        plano = self.client.get("/api/calificaciones/")
+        r = self.client.get("/api/calificaciones/", HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(r["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(r.content), plano.content)
+
+
+_HAY_REPLICA = REPLICA_ALIAS in settings.DATABASES
+
+
+@skipUnless(_HAY_REPLICA, "Sin réplica: correr con DB_REPLICA_URL=sqlite:///... o postgres://...")
+class ReplicaRouterTests(TransactionTestCase):
+    """Lecturas analíticas a la réplica; tras escribir, el mismo usuario lee de "default"."""
+
+    # En los tests la réplica es un MIRROR de "default" con su propia conexión:
+    # TransactionTestCase para que vea los datos ya confirmados
+    databases = {"default", REPLICA_ALIAS} if _HAY_REPLICA else {"default"}
+
+    @classmethod
+    def tearDownClass(cls):
+        # Con pool (PostgreSQL) el mirror mantiene sesiones abiertas en la BD de test
+        if getattr(connections[REPLICA_ALIAS], "pool", None) is not None:
+            connections[REPLICA_ALIAS].close_pool()
+        super().tearDownClass()
+
+    def setUp(self):
+        from django.core.cache import caches
+        from core import db_router
+        caches[db_router.RYW_CACHE].clear()
+        # Un acceso a la réplica desde otro test (p. ej. un error de aislamiento) la deja "caída" 30 s
+        db_router._caida_hasta = 0.0
+        self.user = User.objects.create_user("op@nuamx.cl", "op@nuamx.cl", "x")
+        self.otro = User.objects.create_user("aud@nuamx.cl", "aud@nuamx.cl", "x")
+        Calificacion.objects.create(
+            rut="12.345.678-9", razon_social="Empresa", periodo="2025-01", tipo_instrumento="Factura",
+            folio="1", monto=1000, estado_validacion="Válida",
+        )
+
+    def _tablas_leidas(self, user, url, **params):
+        """Alias → ¿leyó api_calificacion? durante GET url."""
+        client = APIClient()
+        client.force_authenticate(user)
+        with CaptureQueriesContext(connections["default"]) as prim, \
+                CaptureQueriesContext(connections[REPLICA_ALIAS]) as repl:
+            resp = client.get(url, params)
+        self.assertEqual(resp.status_code, 200)
+        leyo = lambda ctx: any("api_calificacion" in q["sql"] for q in ctx.captured_queries)
+        return {"default": leyo(prim), REPLICA_ALIAS: leyo(repl)}
+
+    def test_lecturas_analiticas_van_a_la_replica(self):
+        for url, params in (
+            ("/api/calificaciones/stats/", {}),
+            ("/api/calificaciones/export_csv/", {}),
+            ("/api/calificaciones/", {"enrich": "1"}),
+            ("/api/reportes/export/", {"scope": "mensual"}),
+        ):
+            self.assertEqual(self._tablas_leidas(self.user, url, **params), {"default": False, REPLICA_ALIAS: True}, url)
+
+    def test_listado_normal_queda_en_default(self):
+        self.assertEqual(self._tablas_leidas(self.user, "/api/calificaciones/"), {"default": True, REPLICA_ALIAS: False})
+
+    def test_read_your_writes(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        resp = client.post("/api/calificaciones/", {
+            "rut": "9.876.543-2", "razon_social": "Otra", "periodo": "2025-02", "tipo_instrumento": "Factura",
+            "folio": "2", "monto": 500, "moneda": "CLP", "estado_validacion": "Válida",
+        }, format="json")
+        self.assertEqual(resp.status_code, 201, resp.content)
+        # Quien escribió lee de "default"; los demás siguen en la réplica
+        self.assertEqual(self._tablas_leidas(self.user, "/api/calificaciones/stats/"), {"default": True, REPLICA_ALIAS: False})
+        self.assertEqual(self._tablas_leidas(self.otro, "/api/calificaciones/stats/"), {"default": False, REPLICA_ALIAS: True})
+
+
+# Arranque de un worker en un intérprete limpio: django.setup + URLconf y,
+# opcionalmente, los módulos de `extra`. Devuelve tiempos y módulos cargados.
+_ARRANQUE = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+t1 = time.perf_counter()
+for extra in sys.argv[1:]:
+    __import__(extra)
+t2 = time.perf_counter()
+print(json.dumps({"arranque_ms": (t1 - t0) * 1000, "extra_ms": (t2 - t1) * 1000,
+                  "api_views": sorted(m for m in sys.modules if m.startswith("api.views")),
+                  "modulos": len(sys.modules)}))
+"""
+
+
+class PlantillaCacheTests(SimpleTestCase):
+    """La versión de la plantilla depende del contenido del builder, no de dónde está escrito."""
+
+    @staticmethod
+    def _builder(fuente: str, lineas_antes: int = 0, archivo: str = "a.py"):
+        espacio = {}
+        exec(compile("\n" * lineas_antes + fuente, archivo, "exec"), {"BytesIO": BytesIO}, espacio)
+        return espacio["construir"]
+
+    def test_version_y_poda(self):
+        import tempfile
+        from pathlib import Path
+        from . import views_template
+
+        fuente = "def construir():\n    return BytesIO(bytes([len(x) for x in ('a', 'bb')]))\n"
+        base = self._builder(fuente)
+        self.assertEqual(views_template.template_version(base),
+                         views_template.template_version(self._builder(fuente, 40, "otro.py")))
+        cambiado = self._builder(fuente.replace("'bb'", "'bbb'"))
+        self.assertNotEqual(views_template.template_version(base), views_template.template_version(cambiado))
+        aciertos = views_template.template_version.cache_info().hits
+        views_template.template_version(base)
+        self.assertEqual(views_template.template_version.cache_info().hits, aciertos + 1)
+
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(views_template, "TEMPLATE_CACHE_DIR", Path(tmp)):
+            views_template.get_template_bytes(base)
+            data, version = views_template.get_template_bytes(cambiado)
+            self.assertEqual(data, bytes([1, 3]))
+            self.assertEqual(os.listdir(tmp), [f"construir_{version}.xlsx"])
+
+
+class LazyModuleTests(SimpleTestCase):
+    """El proxy se comporta como el módulo: submódulos al vuelo y AttributeError si no existe."""
+
+    def test_atributos_y_submodulos(self):
+        email = LazyModule("email")
+        self.assertEqual(email.mime.text.MIMEText.__name__, "MIMEText")  # submódulo no importado por el paquete
+        self.assertFalse(hasattr(email, "no_existe"))
+        self.assertEqual(getattr(email, "no_existe", 1), 1)
+        with self.assertRaises(AttributeError):
+            email.__no_existe__
+        self.assertIs(copy.copy(email), email)
+        self.assertIs(copy.deepcopy({"m": email})["m"], email)
+        copia = pickle.loads(pickle.dumps(LazyModule("json")))
+        self.assertEqual(copia.dumps([1]), "[1]")
+        self.assertIsNone(lazy_import("paquete_que_no_existe_nuamx", optional=True))
+
+
+class ViewsImportTimeTests(SimpleTestCase):
+    """Cargar la URLconf no debe importar los módulos de vistas diferidos."""
+
+    DIFERIDOS = ["api.views.auth", "api.views.carga_masiva", "api.views.reportes", "api.views.enriquecimiento",
+                 "api.views.fx"]
+
+    def _arrancar(self, *extra):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE="core.settings")
+        proc = subprocess.run(
+            [sys.executable, "-c", _ARRANQUE, *extra],
+            capture_output=True, text=True, env=env, cwd=settings.BASE_DIR, timeout=120,
+        )
+        self.assertEqual(proc.returncode, 0, proc.stderr[-2000:])
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+    def test_urlconf_no_importa_vistas_diferidas(self):
+        base = self._arrancar()
+        self.assertEqual(base["api_views"], ["api.views", "api.views.calificaciones", "api.views.comun"])
+
+        todo = self._arrancar(*self.DIFERIDOS)
+        resumen = (
+            f"arranque {base['arranque_ms']:.0f} ms / {base['modulos']} módulos; "
+            f"vistas diferidas +{todo['extra_ms']:.1f} ms / +{todo['modulos'] - base['modulos']} módulos"
+        )
+        self.assertGreater(todo["modulos"], base["modulos"], resumen)
+        self.assertTrue(set(self.DIFERIDOS) <= set(todo["api_views"]), resumen)
+        if os.getenv("BENCH"):
+            print(f"\n[ARRANQUE] {resumen}")
@@ -0,0 +1,210 @@
+# api/throttling.py
+import hashlib
+import math
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+# ====== Config ======
+# "capacidad/segundos": ráfaga de `capacidad` intentos que se recargan a
+# razón de `capacidad` por `segundos`. Vacío o "0" desactiva el scope.
+LOGIN_THROTTLE_RATES = getattr(settings, "LOGIN_THROTTLE_RATES", {})
+# Alias de CACHES para compartir los buckets entre workers; vacío = memoria del proceso
+LOGIN_THROTTLE_CACHE = getattr(settings, "LOGIN_THROTTLE_CACHE", "")
+# Tope de buckets en memoria antes de purgar los que ya están llenos
+MAX_BUCKETS = 50_000
+
+
+def _parse_rate(rate):
+    """'5/300' → (5.0 capacidad, 5/300 tokens por segundo) | None."""
+    try:
+        capacidad, segundos = str(rate or "").split("/", 1)
+        capacidad, segundos = float(capacidad), float(segundos)
+    except ValueError:
+        return None
+    if capacidad <= 0 or segundos <= 0:
+        return None
+    return capacidad, capacidad / segundos
+
+
+def _recargar(estado, capacidad: float, por_segundo: float, ahora: float) -> float:
+    if estado is None:
+        return capacidad
+    tokens, ultimo = estado[0], estado[1]
+    return min(capacidad, tokens + (ahora - ultimo) * por_segundo)
+
+
+# ====== Stores ======
+class MemoriaBuckets:
+    """
+    Buckets en un dict del proceso, sin locks: cada bucket es una tupla
+    inmutable (tokens, último, lleno_en) que se reemplaza con una sola
+    asignación (atómica bajo el GIL). Dos requests simultáneos de la misma
+    clave pueden leer el mismo estado y colarse ambos: se tolera un intento
+    de más a cambio de no serializar el login.
+    """
+
+    def __init__(self, max_buckets: int = MAX_BUCKETS):
+        self._buckets: dict[str, tuple[float, float, float]] = {}
+        self._max = max_buckets
+
+    def consumir(self, key: str, capacidad: float, por_segundo: float, ahora: float) -> float:
+        """Consume un token. Devuelve 0 si pasa, o los segundos hasta el próximo token."""
+        tokens = _recargar(self._buckets.get(key), capacidad, por_segundo, ahora)
+        espera = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            espera = (1 - tokens) / por_segundo
+        self._buckets[key] = (tokens, ahora, ahora + (capacidad - tokens) / por_segundo)
+        if len(self._buckets) > self._max:
+            self._purgar(ahora)
+        return espera
+
+    def _purgar(self, ahora: float) -> None:
+        # Un bucket lleno equivale a no tener bucket
+        for key, estado in list(self._buckets.items()):
+            if estado[2] <= ahora:
+                self._buckets.pop(key, None)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class CacheBuckets:
+    """
+    Buckets en un cache de Django (Redis/Memcached/BD) compartido entre
+    workers. get+set no es atómico: bajo carga concurrente sobre la MISMA
+    clave puede dejar pasar algún intento extra (mismo criterio que la memoria).
+    """
+
+    def __init__(self, alias: str):
+        self.cache = caches[alias]
+
+    def consumir(self, key: str, capacidad: float, por_segundo: float, ahora: float) -> float:
+        ckey = "thr:" + hashlib.sha1(key.encode("utf-8")).hexdigest()
+        tokens = _recargar(self.cache.get(ckey), capacidad, por_segundo, ahora)
+        espera = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            espera = (1 - tokens) / por_segundo
+        hasta_lleno = (capacidad - tokens) / por_segundo
+        self.cache.set(ckey, (tokens, ahora), timeout=math.ceil(hasta_lleno) + 1)
+        return espera
+
+    def __len__(self):
+        return 0  # no se puede contar sin recorrer el backend
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CacheBuckets(LOGIN_THROTTLE_CACHE) if LOGIN_THROTTLE_CACHE else MemoriaBuckets()
+    return _store
+
+
+# ====== Métricas ======
+_metricas = Counter()
+_metricas_lock = threading.Lock()
+_ultimo_rechazo: dict[str, float] = {}
+
+
+def _contar(scope: str, permitido: bool) -> None:
+    with _metricas_lock:
+        _metricas[(scope, "permitidos" if permitido else "rechazados")] += 1
+        if not permitido:
+            _ultimo_rechazo[scope] = time.time()
+
+
+def metricas() -> dict:
+    """Contadores del proceso por scope (desde el arranque)."""
+    with _metricas_lock:
+        por_scope = {}
+        for (scope, tipo), n in _metricas.items():
+            por_scope.setdefault(scope, {"permitidos": 0, "rechazados": 0})[tipo] = n
+        for scope, ts in _ultimo_rechazo.items():
+            por_scope[scope]["ultimo_rechazo"] = ts
+    return {
+        "backend": f"cache:{LOGIN_THROTTLE_CACHE}" if LOGIN_THROTTLE_CACHE else "memoria",
+        "buckets": len(get_store()),
+        "rates": dict(LOGIN_THROTTLE_RATES),
+        "scopes": por_scope,
+    }
+
+
+# ====== Throttles DRF ======
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Throttle de token bucket. DRF lo evalúa en `initial()`, antes del
+    handler: un intento rechazado nunca llega a hashear la contraseña.
+    Las subclases definen `scope` y `get_key`.
+    """
+
+    scope = None
+
+    def get_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        self._espera = None
+        rate = _parse_rate(LOGIN_THROTTLE_RATES.get(self.scope))
+        if rate is None:
+            return True
+        key = self.get_key(request, view)
+        if not key:
+            return True
+
+        espera = get_store().consumir(f"{self.scope}:{key}", rate[0], rate[1], time.time())
+        _contar(self.scope, espera == 0)
+        if espera:
+            self._espera = espera
+            return False
+        return True
+
+    def wait(self):
+        return self._espera
+
+
+class LoginIPThrottle(TokenBucketThrottle):
+    """Intentos de login por IP (respeta NUM_PROXIES de DRF para X-Forwarded-For)."""
+    scope = "login_ip"
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+
+class LoginIdentifierThrottle(TokenBucketThrottle):
+    """
+    Intentos de login por email/usuario desde una misma IP. Con solo el
+    identificador, cualquiera podría dejar sin login a otra persona gastando
+    su bucket con contraseñas al azar; con la IP, el bloqueo queda del lado
+    de quien lo provoca (y LoginIPThrottle acota sus intentos en total).
+    """
+    scope = "login_identificador"
+
+    def get_key(self, request, view):
+        try:
+            identifier = request.data.get("username") or request.data.get("email") or ""
+        except Exception:
+            return None
+        identifier = str(identifier).strip().lower()
+        return f"{identifier}|{self.get_ident(request)}" if identifier else None
+
+
+class RefreshIPThrottle(TokenBucketThrottle):
+    """Refresh de tokens por IP."""
+    scope = "refresh_ip"
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
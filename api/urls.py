@@ -1,43 +1,54 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from . import views
-from rest_framework_simplejwt.views import TokenRefreshView
+from core.lazy_imports import lazy_view
+
+from .views.calificaciones import CalificacionViewSet
+
+
+def _vista(ruta: str):
+    """Vista de api.views.<ruta> que se importa en su primer request."""
+    return lazy_view(f"api.views.{ruta}", csrf_exempt=True)
+
 
 router = DefaultRouter()
 # Alias en inglés y español apuntando al mismo ViewSet
-router.register(r"ratings", views.CalificacionViewSet, basename="ratings")
-router.register(r"calificaciones", views.CalificacionViewSet, basename="calificaciones")
+router.register(r"ratings", CalificacionViewSet, basename="ratings")
+router.register(r"calificaciones", CalificacionViewSet, basename="calificaciones")
 
 urlpatterns = [
     # Auth / JWT
-    path("token/", views.EmailOrUsernameTokenView.as_view(), name="token_obtain_pair"),
-    path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("token/", _vista("auth.EmailOrUsernameTokenView"), name="token_obtain_pair"),
+    path("token/refresh/", _vista("auth.ThrottledTokenRefreshView"), name="token_refresh"),
+    path("token/throttle/", _vista("auth.ThrottleMetricsView"), name="token_throttle_metrics"),
 
     # Perfil
-    path("me/", views.me_view, name="api_me"),
-    path("me/password/", views.MePasswordView.as_view(), name="api_me_password"),
+    path("me/", _vista("auth.me_view"), name="api_me"),
+    path("me/password/", _vista("auth.MePasswordView"), name="api_me_password"),
 
     # Registro
-    path("auth/register/", views.RegisterView.as_view(), name="api_register"),
+    path("auth/register/", _vista("auth.RegisterView"), name="api_register"),
 
     # Usuarios
-    path("users/", views.UsersListView.as_view(), name="api_users_list"),
-    path("users/<int:pk>/", views.UsersDetailView.as_view(), name="api_users_detail"),
+    path("users/", _vista("auth.UsersListView"), name="api_users_list"),
+    path("users/<int:pk>/", _vista("auth.UsersDetailView"), name="api_users_detail"),
 
     # Roles
-    path("roles/assign/", views.AssignRoleView.as_view(), name="api_roles_assign"),
+    path("roles/assign/", _vista("auth.AssignRoleView"), name="api_roles_assign"),
 
     # Cambio de contraseña por admin (con flag opcional)
-    path("users/<int:pk>/password/", views.UserPasswordView.as_view(), name="api_user_password"),
+    path("users/<int:pk>/password/", _vista("auth.UserPasswordView"), name="api_user_password"),
 
     # Carga masiva / utilidades calificaciones
-    path("calificaciones/template/", views.CalificacionTemplateView.as_view(), name="calificaciones_template"),
-    path("calificaciones/import_preview/", views.CalificacionBulkPreviewView.as_view(), name="calificaciones_import_preview"),
-    path("calificaciones/import_commit/", views.CalificacionBulkCommitView.as_view(), name="calificaciones_import_commit"),
+    path("calificaciones/template/", _vista("carga_masiva.CalificacionTemplateView"), name="calificaciones_template"),
+    path("calificaciones/import_preview/", _vista("carga_masiva.CalificacionBulkPreviewView"), name="calificaciones_import_preview"),
+    path("calificaciones/import_commit/", _vista("carga_masiva.CalificacionBulkCommitView"), name="calificaciones_import_commit"),
 
     # Export de reportes (XLSX/CSV) con formato bonito
-    path("reportes/export/", views.ReporteExportView.as_view(), name="reportes_export"),
+    path("reportes/export/", _vista("reportes.ReporteExportView"), name="reportes_export"),
+
+    # Conversión a CLP en lote (tasa vigente al cierre de cada período)
+    path("fx/convertir/", _vista("fx.FxConvertirView"), name="fx_convertir"),
 
     # Rutas del router (ratings y calificaciones) + acciones del ViewSet
     path("", include(router.urls)),
@@ -0,0 +1,148 @@
+# api/versiones.py — versión por tabla para GET condicional (ETag / Last-Modified)
+#
+# Triggers de la BD mantienen VersionTabla: cualquier INSERT/UPDATE/DELETE sobre
+# una tabla de TABLAS suma 1 a su versión y fija `modificado`, sin importar si
+# vino del ORM, de bulk_create/update() o de SQL directo.
+#
+#   SQLite      un trigger por operación (SQLite solo tiene triggers por fila:
+#               un upsert de una fila de VersionTabla por fila escrita).
+#   PostgreSQL  un trigger FOR EACH STATEMENT (también TRUNCATE).
+#
+# @con_validadores lee esa fila (por clave primaria) antes que la vista: si el
+# cliente manda If-None-Match / If-Modified-Since de la misma versión responde
+# 304 sin correr la consulta principal. La versión se lee antes que los datos,
+# así que un ETag nunca describe datos más viejos que los enviados.
+import functools
+import hashlib
+
+from django.db import connections
+from django.db.models.signals import post_migrate
+from django.dispatch import receiver
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+TABLA_VERSIONES = "api_versiontabla"
+TABLAS = ("api_calificacion",)
+
+
+# ====== Lectura ======
+def version_tabla(tabla: str):
+    """(version, modificado) de `tabla`, o None si no hay contador (migración sin aplicar)."""
+    from .models import VersionTabla
+
+    return VersionTabla.objects.filter(pk=tabla).values_list("version", "modificado").first()
+
+
+def con_validadores(tabla: str, variante=None, desde=None):
+    """
+    Decorador de acciones GET de un ViewSet: ETag débil y Last-Modified a partir de
+    la versión de `tabla`, y 304 si el cliente ya tiene esa versión.
+
+    variante(vista, request) -> str | None: qué más distingue la respuesta además de
+        la URL, el usuario y Accept (None = esta respuesta no lleva validadores).
+    desde() -> datetime: piso de Last-Modified, para respuestas que cambian solas
+        con el tiempo (p. ej. el inicio del día local en stats).
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envuelta(self, request, *args, **kwargs):
+            extra = variante(self, request) if variante else ""
+            actual = version_tabla(tabla) if extra is not None and request.method in ("GET", "HEAD") else None
+            if actual is None:
+                return vista(self, request, *args, **kwargs)
+
+            version, modificado = actual
+            if desde:
+                modificado = max(modificado, desde())
+            clave = "|".join((
+                str(version), modificado.isoformat(), str(getattr(request.user, "pk", "")),
+                request.META.get("HTTP_ACCEPT", ""), request.get_full_path(), extra,
+            ))
+            etag = 'W/"%s"' % hashlib.blake2b(clave.encode(), digest_size=12).hexdigest()
+            ultimo = int(modificado.timestamp())
+
+            respuesta = get_conditional_response(request, etag=etag, last_modified=ultimo)
+            if respuesta is None:
+                respuesta = vista(self, request, *args, **kwargs)
+            if respuesta.status_code in (200, 304):
+                respuesta.headers.setdefault("ETag", etag)
+                respuesta.headers.setdefault("Last-Modified", http_date(ultimo))
+                # Que el navegador revalide siempre (304 barato) y no comparta entre usuarios
+                patch_cache_control(respuesta, private=True, no_cache=True)
+                patch_vary_headers(respuesta, ("Authorization", "Cookie"))
+            return respuesta
+        return envuelta
+    return decorador
+
+
+# ====== Esquema (migración y post_migrate) ======
+def _sqlite_triggers() -> dict[str, str]:
+    triggers = {}
+    for tabla in TABLAS:
+        for sufijo, evento in (("ai", "INSERT"), ("au", "UPDATE"), ("ad", "DELETE")):
+            triggers[f"{tabla}_version_{sufijo}"] = f"""
+CREATE TRIGGER IF NOT EXISTS {tabla}_version_{sufijo} AFTER {evento} ON {tabla} BEGIN
+    INSERT INTO {TABLA_VERSIONES} (tabla, version, modificado)
+    VALUES ('{tabla}', 1, strftime('%Y-%m-%d %H:%M:%f', 'now'))
+    ON CONFLICT (tabla) DO UPDATE SET version = version + 1, modificado = max(modificado, excluded.modificado);
+END"""
+    return triggers
+
+
+_PG_FUNCION = f"""
+CREATE OR REPLACE FUNCTION nuamx_version_tabla() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    INSERT INTO {TABLA_VERSIONES} (tabla, version, modificado) VALUES (TG_TABLE_NAME, 1, clock_timestamp())
+    ON CONFLICT (tabla) DO UPDATE
+        SET version = {TABLA_VERSIONES}.version + 1,
+            modificado = greatest({TABLA_VERSIONES}.modificado, EXCLUDED.modificado);
+    RETURN NULL;
+END $$"""
+
+
+def asegurar_triggers(schema_editor=None, using: str = "default", solo_reparar: bool = False) -> bool:
+    """
+    Crea los triggers que falten. Devuelve True si creó alguno. Con solo_reparar=True
+    no hace nada si la tabla de versiones no existe (migración sin aplicar).
+    """
+    conn = schema_editor.connection if schema_editor else connections[using]
+    if solo_reparar and TABLA_VERSIONES not in conn.introspection.table_names():
+        return False
+    with conn.cursor() as cur:
+        if conn.vendor == "sqlite":
+            cur.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s", ["%_version_%"])
+            existentes = {fila[0] for fila in cur.fetchall()}
+            faltan = [sql for nombre, sql in _sqlite_triggers().items() if nombre not in existentes]
+            for sql in faltan:
+                cur.execute(sql)
+            if faltan and solo_reparar:
+                print(f"[VERSIONES] {len(faltan)} trigger(s) de versión recreados en {conn.alias!r}")
+            return bool(faltan)
+        if conn.vendor == "postgresql":
+            cur.execute(_PG_FUNCION)
+            for tabla in TABLAS:
+                cur.execute(
+                    f"CREATE OR REPLACE TRIGGER {tabla}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE "
+                    f"ON {tabla} FOR EACH STATEMENT EXECUTE FUNCTION nuamx_version_tabla()"
+                )
+            return True
+    return False
+
+
+def borrar_triggers(schema_editor) -> None:
+    conn = schema_editor.connection
+    with conn.cursor() as cur:
+        if conn.vendor == "sqlite":
+            for nombre in _sqlite_triggers():
+                cur.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+        elif conn.vendor == "postgresql":
+            for tabla in TABLAS:
+                cur.execute(f"DROP TRIGGER IF EXISTS {tabla}_version ON {tabla}")
+            cur.execute("DROP FUNCTION IF EXISTS nuamx_version_tabla()")
+
+
+@receiver(post_migrate, dispatch_uid="api.versiones.reparar_triggers")
+def _reparar_triggers(sender, using="default", **kwargs):
+    # Igual que api/busqueda.py: en SQLite los ALTER que rehacen la tabla borran sus triggers
+    if getattr(sender, "name", None) == "api" and connections[using].vendor == "sqlite":
+        asegurar_triggers(using=using, solo_reparar=True)
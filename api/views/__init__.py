@@ -0,0 +1,49 @@
+# api/views/ — vistas de la API separadas por subsistema
+#
+#   comun.py            helpers compartidos (FX, roles, flags, filtro por RUT)
+#   auth.py             login JWT, perfil, registro, usuarios y roles
+#   calificaciones.py   CRUD + export CSV/XLSX (el router lo importa al arrancar)
+#   enriquecimiento.py  resolución de razón social por RUT
+#   carga_masiva.py     plantilla XLSX, preview y commit
+#   reportes.py         descarga de reportes XLSX/CSV
+#   fx.py               conversión a CLP en lote
+#
+# api/urls.py resuelve las vistas con core.lazy_imports.lazy_view: cada
+# módulo se importa con el primer request que lo necesita. Este paquete no
+# importa ninguno al cargarse; `from api.views import X` sigue funcionando
+# (PEP 562) e importa solo el módulo de X.
+
+import importlib
+
+_MODULOS = {
+    "comun": (
+        "User", "ROLES_VALIDOS", "fx_to_clp", "_ensure_role_exists", "_get_flags",
+        "_truthy", "_clean_rut_string", "_apply_rut_filter",
+    ),
+    "auth": (
+        "EmailOrUsernameTokenView", "ThrottledTokenRefreshView", "ThrottleMetricsView", "me_view",
+        "RegisterView", "UsersPagination", "UsersListView", "UsersDetailView", "AssignRoleView",
+        "UserPasswordView", "MePasswordView",
+    ),
+    "calificaciones": ("CalificacionViewSet",),
+    "enriquecimiento": ("resolve_razon_social",),
+    "carga_masiva": ("CalificacionTemplateView", "CalificacionBulkPreviewView", "CalificacionBulkCommitView"),
+    "reportes": ("ReporteExportView",),
+    "fx": ("FxConvertirView",),
+}
+_DONDE = {nombre: modulo for modulo, nombres in _MODULOS.items() for nombre in nombres}
+
+__all__ = sorted(n for n in _DONDE if not n.startswith("_"))
+
+
+def __getattr__(nombre):
+    modulo = _DONDE.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(f"{__name__}.{modulo}"), nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_DONDE))
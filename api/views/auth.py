@@ -0,0 +1,364 @@
+# api/views/auth.py — login JWT, perfil, registro, usuarios y roles
+from django.conf import settings
+from django.db.models import Q
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.generics import ListAPIView, RetrieveUpdateDestroyAPIView, CreateAPIView
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenRefreshView
+
+from ..permissions import (
+    get_role,
+    CanListUsers,
+    CanAssignRoles,
+    CanEditBasic,
+    CanDeleteUsers,
+    CanResetPassword,
+)
+from ..serializers import UserSerializer, UserUpdateSerializer, RegisterSerializer
+from ..throttling import LoginIPThrottle, LoginIdentifierThrottle, RefreshIPThrottle, metricas as throttle_metricas
+from .comun import User, _ensure_role_exists, _get_flags
+
+
+# ========================= Auth y Perfil =========================
+_MODEL_BACKEND = "django.contrib.auth.backends.ModelBackend"
+
+
+def _autenticar_login(request, identifier: str, password: str):
+    """
+    Usuario autenticado por email (sin distinguir mayúsculas) o username, o None.
+
+    Con el backend por defecto se resuelve en UNA consulta (usuario + flags,
+    email por el índice LOWER(email)) y se verifica la contraseña sin volver
+    a buscar al usuario. Con otros backends se delega en authenticate().
+    """
+    from django.contrib.auth import authenticate
+    from django.contrib.auth.backends import ModelBackend
+    from django.contrib.auth.signals import user_login_failed
+    from django.db.models.functions import Lower
+
+    if list(settings.AUTHENTICATION_BACKENDS) != [_MODEL_BACKEND]:
+        username = identifier
+        if "@" in identifier:
+            u = User.objects.filter(email__iexact=identifier).only("username").first()
+            if u is None:
+                return None
+            username = u.username
+        return authenticate(request, username=username, password=password)
+
+    qs = User.objects.select_related("flags")
+    if "@" in identifier:
+        qs = qs.annotate(email_lower=Lower("email")).filter(email_lower=identifier.lower()).order_by("id")
+    else:
+        qs = qs.filter(username=identifier)
+    user = qs.first()
+
+    if user is None:
+        # Mismo costo de hash que un usuario existente (no revelar si el email existe)
+        User().set_password(password)
+    elif user.check_password(password) and ModelBackend().user_can_authenticate(user):
+        user.backend = _MODEL_BACKEND
+        return user
+
+    user_login_failed.send(sender=__name__, credentials={"username": identifier}, request=request)
+    return None
+
+class EmailOrUsernameTokenView(APIView):
+    permission_classes = [permissions.AllowAny]
+    # Se evalúan antes de post(): los intentos rechazados no hashean (429 + Retry-After)
+    throttle_classes = [LoginIPThrottle, LoginIdentifierThrottle]
+
+    def post(self, request):
+        identifier = request.data.get("username") or request.data.get("email") or ""
+        password = request.data.get("password") or ""
+        user = _autenticar_login(request, identifier.strip(), password)
+
+        if not user:
+            return Response({"detail": "Credenciales inválidas."}, status=400)
+
+        if not user.is_active:
+            return Response(
+                {"detail": "Tu cuenta está desactivada. Comunícate con un administrador."},
+                status=403,
+            )
+
+        refresh = RefreshToken.for_user(user)
+        # flags ya viene del SELECT del login; solo se crea si falta
+        flags = getattr(user, "flags", None) or _get_flags(user)
+        return Response(
+            {
+                "refresh": str(refresh),
+                "access": str(refresh.access_token),
+                "must_change_password": bool(flags.must_change_password),
+            },
+            status=200,
+        )
+
+
+class ThrottledTokenRefreshView(TokenRefreshView):
+    throttle_classes = [RefreshIPThrottle]
+
+
+class ThrottleMetricsView(APIView):
+    """Contadores de throttling del login en este proceso (solo Administrador)."""
+    permission_classes = [permissions.IsAuthenticated, CanAssignRoles]
+
+    def get(self, request):
+        return Response(throttle_metricas())
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def me_view(request):
+    data = UserSerializer(request.user).data
+    data["must_change_password"] = bool(_get_flags(request.user).must_change_password)
+    return Response(data)
+
+
+class RegisterView(CreateAPIView):
+    permission_classes = [permissions.AllowAny]
+    serializer_class = RegisterSerializer
+
+
+class UsersPagination(PageNumberPagination):
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+# Orden de prioridad del rol visible (igual que serializers._primary_role_for)
+_ROLES_PRIORIDAD = ["Administrador", "Operador", "Auditor", "Usuario"]
+
+
+def _en_grupo(name: str) -> Q:
+    return Q(id__in=User.groups.through.objects.filter(group__name=name).values("user_id"))
+
+
+def _role_q(role: str) -> Q:
+    """
+    Q de usuarios cuyo rol visible es `role`: grupo de mayor prioridad o,
+    sin grupos, los flags superuser/staff (ver _primary_role_for).
+    """
+    sin_grupos = ~Q(id__in=User.groups.through.objects.values("user_id"))
+    if role in _ROLES_PRIORIDAD:
+        q = _en_grupo(role)
+        for superior in _ROLES_PRIORIDAD[:_ROLES_PRIORIDAD.index(role)]:
+            q &= ~_en_grupo(superior)
+    else:
+        q = _en_grupo(role)
+        for name in _ROLES_PRIORIDAD:
+            q &= ~_en_grupo(name)
+
+    if role == "Administrador":
+        q |= sin_grupos & Q(is_superuser=True)
+    elif role == "Operador":
+        q |= sin_grupos & Q(is_superuser=False, is_staff=True)
+    elif role == "Usuario":
+        q |= sin_grupos & Q(is_superuser=False, is_staff=False)
+    return q
+
+
+class UsersListView(ListAPIView):
+    """
+    Listado paginado de usuarios (?page, ?page_size ≤ 500).
+
+    Filtros: ?q= (email/usuario/nombre), ?email=, ?role=.
+    Perfil y flags van en el mismo SELECT y los roles de la página en una
+    consulta de prefetch: el número de queries no depende del tamaño de página.
+    """
+    permission_classes = [permissions.IsAuthenticated, CanListUsers]
+    serializer_class = UserSerializer
+    pagination_class = UsersPagination
+
+    def get_queryset(self):
+        qs = (
+            User.objects.all()
+            .select_related("profile", "flags")
+            .prefetch_related("groups")  # roles: ver permissions.group_names_for
+            .order_by("id")
+        )
+        params = self.request.query_params
+
+        q = (params.get("q") or "").strip()
+        if q:
+            qs = qs.filter(
+                Q(email__icontains=q) | Q(username__icontains=q)
+                | Q(first_name__icontains=q) | Q(last_name__icontains=q)
+            )
+
+        email = (params.get("email") or "").strip()
+        if email:
+            qs = qs.filter(email__icontains=email)
+
+        role = (params.get("role") or "").strip()
+        if role:
+            qs = qs.filter(_role_q(role))
+
+        return qs
+
+
+class UsersDetailView(RetrieveUpdateDestroyAPIView):
+    queryset = User.objects.all()
+    serializer_class = UserSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_permissions(self):
+        if self.request.method in ("GET",):
+            return [permissions.IsAuthenticated(), CanListUsers()]
+        if self.request.method in ("PATCH", "PUT"):
+            return [permissions.IsAuthenticated(), CanEditBasic()]
+        if self.request.method == "DELETE":
+            return [permissions.IsAuthenticated(), CanDeleteUsers()]
+        return super().get_permissions()
+
+    def get_serializer_class(self):
+        if self.request.method in ("PATCH", "PUT"):
+            return UserUpdateSerializer
+        return UserSerializer
+
+    def update(self, request, *args, **kwargs):
+        from django.contrib.auth.password_validation import validate_password
+        from django.core.exceptions import ValidationError as DjangoValidationError
+
+        role = get_role(request.user)
+        partial = kwargs.pop("partial", True)
+        instance = self.get_object()
+
+        before_active = bool(instance.is_active)
+
+        allowed_for_operator = {"email", "username", "first_name", "last_name", "is_active", "profile", "phone"}
+
+        data = dict(request.data)
+        if role == "Operador":
+            data = {k: v for k, v in data.items() if k in allowed_for_operator}
+
+        serializer = self.get_serializer(instance, data=data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+
+        after_active = bool(serializer.instance.is_active)
+        if before_active != after_active:
+            if after_active:
+                print(f"[NUAMX] Cuenta reactivada: id={instance.id} email={instance.email}")
+            else:
+                print(f"[NUAMX] Cuenta desactivada: id={instance.id} email={instance.email}")
+
+        return Response(serializer.data)
+
+    def destroy(self, request, *args, **kwargs):
+        if get_role(request.user) != "Administrador":
+            return Response({"detail": "No autorizado."}, status=403)
+        return super().destroy(request, *args, **kwargs)
+
+
+class AssignRoleView(APIView):
+    permission_classes = [permissions.IsAuthenticated, CanAssignRoles]
+
+    def post(self, request):
+        email = (request.data.get("email") or "").strip()
+        role = (request.data.get("role") or "").strip()
+        if not email or not role:
+            return Response({"detail": "email y role son requeridos."}, status=400)
+        try:
+            user = User.objects.get(email__iexact=email)
+        except User.DoesNotExist:
+            return Response({"detail": "Usuario no existe."}, status=404)
+
+        grp = _ensure_role_exists(role)
+        user.groups.clear()
+        user.groups.add(grp)
+        user.save()
+
+        return Response({"ok": True, "email": user.email, "role": grp.name}, status=200)
+
+
+class UserPasswordView(APIView):
+    permission_classes = [permissions.IsAuthenticated, CanResetPassword]
+
+    def post(self, request, pk):
+        from django.contrib.auth.password_validation import validate_password
+        from django.core.exceptions import ValidationError as DjangoValidationError
+        from django.utils import timezone
+
+        try:
+            user = User.objects.get(pk=pk)
+        except User.DoesNotExist:
+            return Response({"detail": "No User matches the given query."}, status=404)
+
+        new_pwd = request.data.get("password") or ""
+        if len(new_pwd) < 8:
+            return Response({"detail": "La contraseña debe tener al menos 8 caracteres."}, status=400)
+
+        try:
+            validate_password(new_pwd, user=user)
+        except DjangoValidationError as e:
+            return Response({"detail": " ; ".join(e.messages)}, status=400)
+
+        role = get_role(request.user)
+        force_change_req = bool(request.data.get("force_change", False))
+        force_change = force_change_req if role == "Administrador" else False
+
+        user.set_password(new_pwd)
+        if hasattr(user, "last_password_change"):
+            try:
+                user.last_password_change = timezone.now()
+            except Exception:
+                pass
+        user.save()
+
+        flags = _get_flags(user)
+        flags.must_change_password = force_change
+        flags.save()
+
+        return Response({"ok": True, "must_change_password": flags.must_change_password}, status=200)
+
+
+class MePasswordView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        from django.contrib.auth.password_validation import validate_password
+        from django.core.exceptions import ValidationError as DjangoValidationError
+        from django.utils import timezone
+
+        user = request.user
+        data = request.data or {}
+
+        new_pwd = (data.get("new_password") or (data.get("password") or "")).strip()
+        current = (data.get("current_password") or "").strip()
+
+        if not new_pwd:
+            return Response({"detail": "new_password es obligatorio."}, status=400)
+
+        flags = _get_flags(user)
+        force_mode = bool(flags.must_change_password)
+
+        if not force_mode:
+            if not current:
+                return Response({"detail": "current_password es obligatorio."}, status=400)
+            if not user.check_password(current):
+                return Response({"detail": "La contraseña actual no es válida."}, status=400)
+
+        if len(new_pwd) < 8:
+            return Response({"detail": "La nueva contraseña debe tener al menos 8 caracteres."}, status=400)
+
+        try:
+            validate_password(new_pwd, user=user)
+        except DjangoValidationError as e:
+            return Response({"detail": " ; ".join(e.messages)}, status=400)
+
+        user.set_password(new_pwd)
+        if hasattr(user, "last_password_change"):
+            try:
+                user.last_password_change = timezone.now()
+            except Exception:
+                pass
+        user.save()
+
+        flags.must_change_password = False
+        flags.save()
+
+        return Response({"ok": True}, status=200)
@@ -0,0 +1,632 @@
+# api/views/calificaciones.py — CRUD de calificaciones + export CSV/XLSX
+# Lo importa la URLconf al arrancar (el router necesita la clase): lo que no es
+# CRUD (enriquecimiento, carga masiva, reportes) vive en módulos diferidos.
+from django.db.models import Count, Q, Sum, Value
+from django.http import HttpResponse
+from rest_framework import permissions, filters, viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.authentication import SessionAuthentication  # cookie de sesión además de JWT
+try:
+    from ..authentication import CachedJWTAuthentication as JWTAuthentication
+except Exception:
+    JWTAuthentication = None  # por si no está instalado
+
+from core.db_router import lectura_replica, usar_replica
+from core.ventanas import filtro_ventana, hoy_local, inicio_dia, limites_dias
+from core.lazy_imports import lazy_import
+
+from ..busqueda import buscar_ids, filtrar_texto, terminos
+from ..kafka_client import enviar_evento_calificacion
+from ..models import SIN_RAZON_SOCIAL, Calificacion
+from ..serializers import CalificacionSerializer, lectura_calificaciones
+from ..versiones import con_validadores
+
+import io
+import csv
+import re
+from datetime import timedelta
+
+
+from .comun import _truthy, _apply_rut_filter
+
+# Enriquecimiento de razón social: se carga la primera vez que una acción lo pide
+enriquecimiento = lazy_import("api.views.enriquecimiento")
+
+
+# ========================= Calificaciones (CRUD + export CSV/XLSX) =========================
+class CalificacionViewSet(viewsets.ModelViewSet):
+    """
+    CRUD de calificaciones (auth requerida).
+    """
+    # ⬇️ Acepta JWT y/o cookie de sesión
+    if JWTAuthentication:
+        authentication_classes = (JWTAuthentication, SessionAuthentication)
+    else:
+        authentication_classes = (SessionAuthentication,)
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = CalificacionSerializer
+    filter_backends = [filters.OrderingFilter]
+    ordering_fields = ["created_at", "monto", "periodo", "rut", "folio"]
+    ordering = ["-created_at"]
+
+    def get_queryset(self):
+        qs = Calificacion.objects.all()
+        qp = self.request.query_params
+
+        rut = (qp.get("rut") or "").strip()
+        razon = (qp.get("razon") or "").strip()
+        texto = (qp.get("q") or "").strip()  # razón social u observaciones
+        pdesde = (qp.get("pdesde") or "").strip()
+        phasta = (qp.get("phasta") or "").strip()
+        tipo = (qp.get("tipo") or "").strip()
+        estado = (qp.get("estado") or "").strip()
+        moneda = (qp.get("moneda") or "").strip().upper()
+        # ⬇️ NUEVO: filtro de "no inscritos" (razón social vacía o NULL)
+        no_inscritos = (qp.get("no_inscritos") or qp.get("noi") or "").strip().lower()
+        want_noi = no_inscritos in ("1", "true", "on", "sí", "si")
+
+        if rut:
+            qs = _apply_rut_filter(qs, rut)
+        # Prefijos sin tildes por índice de texto (api/busqueda.py). Sin ?ordering,
+        # los resultados de una búsqueda salen por relevancia.
+        por_relevancia = bool(razon or texto) and not qp.get("ordering")
+        if razon:
+            qs = filtrar_texto(qs, razon, columnas=("razon_social",), relevancia=por_relevancia and not texto)
+        if texto:
+            qs = filtrar_texto(qs, texto, relevancia=por_relevancia)
+        if por_relevancia and terminos(texto or razon):
+            self.ordering = ["-relevancia", "-created_at"]
+        if pdesde:
+            qs = qs.filter(periodo__gte=pdesde)
+        if phasta:
+            qs = qs.filter(periodo__lte=phasta)
+        if tipo:
+            qs = qs.filter(tipo_instrumento=tipo)
+        if estado:
+            qs = qs.filter(estado_validacion=estado)
+        if moneda:
+            qs = qs.filter(moneda=moneda)
+        if want_noi:
+            qs = qs.filter(SIN_RAZON_SOCIAL)
+
+        return qs
+
+    def _build_kafka_payload(self, instance, accion: str):
+        """
+        Construye el payload estándar para eventos de calificación.
+        """
+        return {
+            "accion": accion,
+            "id": instance.id,
+            "rut": instance.rut,
+            "razon_social": instance.razon_social,
+            "periodo": instance.periodo,
+            "tipo_instrumento": instance.tipo_instrumento,
+            "folio": instance.folio,
+            "monto": int(getattr(instance, "monto", 0) or 0),
+            "moneda": getattr(instance, "moneda", "CLP"),
+            "estado_validacion": instance.estado_validacion,
+            "created_at": instance.created_at.isoformat() if getattr(instance, "created_at", None) else None,
+        }
+
+    def perform_create(self, serializer):
+        """
+        Al crear una calificación, enviamos un evento a Kafka (si está habilitado).
+        """
+        instance = serializer.save()
+        try:
+            payload = self._build_kafka_payload(instance, "create")
+            enviar_evento_calificacion(payload)
+        except Exception:
+            # Nunca rompemos el flujo de la API por un error de Kafka.
+            pass
+
+    def perform_update(self, serializer):
+        """
+        Al actualizar una calificación, también enviamos un evento.
+        """
+        instance = serializer.save()
+        try:
+            payload = self._build_kafka_payload(instance, "update")
+            enviar_evento_calificacion(payload)
+        except Exception:
+            pass
+
+    # ==================== NUEVO: Enriquecer en el listado ====================
+    @staticmethod
+    def _quiere_enriquecer(qp) -> bool:
+        want_noi = _truthy(qp.get("no_inscritos") or qp.get("noi"))
+        enrich_flag = qp.get("enrich")
+        auto_enrich_noi = qp.get("auto_enrich_noi")
+
+        # política: por defecto, si piden no_inscritos, enriquecemos
+        auto_enrich = True if auto_enrich_noi is None else _truthy(auto_enrich_noi)
+        return _truthy(enrich_flag) if enrich_flag is not None else (want_noi and auto_enrich)
+
+    # ETag/304 por versión de la tabla; el listado enriquecido depende de servicios
+    # externos, así que no lleva validadores
+    @con_validadores(
+        "api_calificacion",
+        variante=lambda vista, request: None if vista._quiere_enriquecer(request.query_params) else "",
+    )
+    def list(self, request, *args, **kwargs):
+        """
+        Si pides ?no_inscritos=1 (o ?enrich=1), se intenta completar razon_social
+        desde:
+          1) cache local de Calificacion
+          2) servicios HTTP en RESOLVE_RAZON_HTTP
+        No persiste en BD; solo afecta la representación JSON.
+        Flags:
+          - enrich=1/0 (forzar encendido/apagado)
+          - auto_enrich_noi=1/0 (por defecto 1) activa auto-enriquecimiento cuando no_inscritos=1
+        """
+        enrich = self._quiere_enriquecer(request.query_params)
+        queryset = self.filter_queryset(self.get_queryset())
+
+        if not enrich:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+            # Mismo JSON que el serializer, desde .values() (sin modelo ni campos DRF por fila)
+            return Response(lectura_calificaciones.filas(queryset))
+
+        # Lectura pesada (todo el queryset + resolución por RUT): a la réplica si hay
+        with lectura_replica(request):
+            return self._list_enriquecido(queryset)
+
+    def _list_enriquecido(self, queryset):
+        # Enriquecimiento: resolvemos por RUT y en memoria seteamos razon_social
+        # para que el serializer lo devuelva completado.
+        # 1) construir cache por RUT
+        need = []
+        for obj in queryset:
+            if not (obj.razon_social or "").strip():
+                if (obj.rut or "").strip():
+                    need.append((obj.id, obj.rut.strip()))
+
+        # Agrupar por RUT único
+        unique_ruts = sorted({rut for _, rut in need})
+
+        resolved_cache: dict[str, str] = {}
+        for rut in unique_ruts:
+            razon, _, _ = enriquecimiento.resolve_razon_social(rut)
+            if razon:
+                resolved_cache[rut] = razon
+
+        # 2) aplicar sobre instancias (sin guardar)
+        for obj in queryset:
+            if not (obj.razon_social or "").strip():
+                rut = (obj.rut or "").strip()
+                if rut and rut in resolved_cache:
+                    # Asignación en memoria para que el serializer lea este valor
+                    obj.razon_social = resolved_cache[rut]
+
+        # Continuar flujo DRF normal
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            # Cabecera informativa (opcional)
+            resp = self.get_paginated_response(serializer.data)
+            try:
+                resp["X-Resolved-RUTs"] = str(len(resolved_cache))
+            except Exception:
+                pass
+            return resp
+
+        serializer = self.get_serializer(queryset, many=True)
+        resp = Response(serializer.data)
+        try:
+            resp["X-Resolved-RUTs"] = str(len(resolved_cache))
+        except Exception:
+            pass
+        return resp
+
+    # ==================== NUEVO: Resolver "no inscritos" ====================
+    @action(detail=False, methods=["post"], url_path="resolve_no_inscritos", permission_classes=[permissions.IsAuthenticated])
+    def resolve_no_inscritos(self, request, *args, **kwargs):
+        """
+        Intenta completar razon_social para calificaciones con RUT y razon_social vacía.
+        Opciones:
+          - dry_run: 1 (default) => no guarda; 0 => guarda cambios
+          - limit: máximo de filas a procesar (default 500)
+          - overwrite: 1 para sobreescribir si existe (default 0 = solo vacíos)
+          - filtros iguales a get_queryset (rut, pdesde, phasta, tipo, estado, moneda, no_inscritos)
+        Fuentes:
+          1) Local (otras calificaciones con mismo RUT y razon_social conocida)
+          2) HTTP externos (RESOLVE_RAZON_HTTP)
+        """
+        qp = request.query_params
+        dry_run = _truthy(qp.get("dry_run")) if qp.get("dry_run") is not None else True
+        limit = int(qp.get("limit") or 500)
+        overwrite = _truthy(qp.get("overwrite") or "0")
+
+        # Tomamos el queryset respetando filtros y forzando no inscritos por defecto
+        base_qs = self.get_queryset()
+        if not _truthy(qp.get("no_inscritos") or qp.get("noi") or "1"):
+            # si no pidieron explicitamente no_inscritos, igualmente trabajamos sobre vacíos para este endpoint
+            base_qs = base_qs.filter(SIN_RAZON_SOCIAL)
+
+        # Solo columnas necesarias
+        qs = base_qs.order_by("id").values("id", "rut", "razon_social")
+        rows = list(qs[:limit])
+
+        # Agrupamos por RUT
+        by_rut = {}
+        for r in rows:
+            rut = (r.get("rut") or "").strip()
+            if not rut:
+                continue
+            by_rut.setdefault(rut, []).append(r["id"])
+
+        updated = 0
+        examples = []
+        errors = []
+
+        for rut, ids in by_rut.items():
+            razon, source, err = enriquecimiento.resolve_razon_social(rut)
+            if err:
+                errors.append({"rut": rut, "error": err, "source": source})
+            if not razon:
+                continue
+
+            examples.append({"rut": rut, "razon_social": razon, "source": source, "affected": len(ids)})
+
+            if dry_run:
+                continue
+
+            # Guardar en BD: por defecto solo vacíos, a menos que overwrite=1
+            if overwrite:
+                q = Calificacion.objects.filter(id__in=ids)
+            else:
+                q = Calificacion.objects.filter(id__in=ids).filter(SIN_RAZON_SOCIAL)
+            count = q.update(razon_social=razon)
+            updated += int(count)
+
+        return Response(
+            {
+                "ok": True,
+                "dry_run": bool(dry_run),
+                "distinct_ruts": len(by_rut),
+                "processed": len(rows),
+                "updated": int(updated),
+                "examples": examples[:20],  # muestra algunos
+                "errors": errors[:20],
+            },
+            status=200,
+        )
+
+    @action(detail=False, methods=["get"], url_path="buscar")
+    def buscar(self, request, *args, **kwargs):
+        """
+        Autocompletar: GET /api/calificaciones/buscar/?q=constru%20nuno&limit=20
+        Las `limit` calificaciones más relevantes para q (prefijos, sin tildes),
+        resueltas directo sobre el índice de texto. Vacío hasta que el último
+        término tenga 3 letras (ver api/busqueda.py).
+        """
+        texto = (request.query_params.get("q") or "").strip()
+        try:
+            limite = min(max(int(request.query_params.get("limit") or 20), 1), 100)
+        except ValueError:
+            limite = 20
+        qs = Calificacion.objects.all()
+        ids = buscar_ids(texto, limite, using=qs.db)
+        por_id = qs.in_bulk(ids)
+        resultados = [por_id[i] for i in ids if i in por_id]
+        return Response({"q": texto, "count": len(resultados),
+                         "results": self.get_serializer(resultados, many=True).data})
+
+    @action(detail=False, methods=["get"], url_path="export_csv")
+    @usar_replica
+    def export_csv(self, request, *args, **kwargs):
+        # ⬇️ NUEVO: permitir enrich=1 para completar razon_social en la descarga (sin guardar en BD)
+        enrich = _truthy(request.query_params.get("enrich"))
+        qs = self.filter_queryset(self.get_queryset()).order_by("id")
+
+        rows = [[
+            "rut", "razon_social", "periodo", "tipo_instrumento", "folio",
+            "monto", "moneda", "estado_validacion", "observaciones", "created_at"
+        ]]
+        # Tuplas con las columnas del CSV: sin instanciar un modelo por fila
+        for rut, razon, periodo, tipo, folio, monto, moneda, estado, obs, creado in qs.values_list(*rows[0]):
+            if enrich and not (razon or "").strip():
+                resolved, _, _ = enriquecimiento.resolve_razon_social(rut)
+                if resolved:
+                    razon = resolved
+            rows.append([
+                rut,
+                razon,
+                periodo,
+                tipo,
+                folio,
+                str(monto),
+                moneda,
+                estado,
+                (obs or "").replace("\n", " ").replace("\r", " "),
+                creado.isoformat(),
+            ])
+
+        from io import StringIO
+        sio = StringIO()
+        writer = csv.writer(sio)
+        for r in rows:
+            writer.writerow(r)
+        out = sio.getvalue()
+        resp = HttpResponse(out, content_type="text/csv; charset=utf-8")
+        resp["Content-Disposition"] = 'attachment; filename="calificaciones.csv"'
+        return resp
+
+    @action(detail=False, methods=["post"], url_path="export_xlsx_from_rows")
+    def export_xlsx_from_rows(self, request, *args, **kwargs):
+        rows_in = list((request.data or {}).get("rows") or [])
+
+        try:
+            from openpyxl import Workbook
+            from openpyxl.worksheet.datavalidation import DataValidation
+            from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+            from openpyxl.worksheet.table import Table, TableStyleInfo
+        except Exception:
+            out_rows = [[
+                "RUT","Razón social","Período","Tipo","Folio","Monto","Moneda","Estado","Observaciones"
+            ]]
+            for x in rows_in:
+                out_rows.append([
+                    x.get("rut") or x.get("RUT") or "",
+                    x.get("razon_social") or x.get("Razón social") or "",
+                    x.get("periodo") or x.get("Período") or "",
+                    x.get("tipo") or x.get("Tipo") or x.get("tipo_instrumento") or "",
+                    x.get("folio") or x.get("Folio") or "",
+                    str(x.get("monto") or x.get("Monto") or x.get("monto_raw") or ""),
+                    (x.get("moneda") or x.get("Moneda") or "").upper(),
+                    x.get("estado") or x.get("Estado") or x.get("estado_validacion") or "",
+                    x.get("observaciones") or x.get("Observaciones") or "",
+                ])
+            buf = io.StringIO()
+            w = csv.writer(buf)
+            for r in out_rows:
+                w.writerow(r)
+            resp = HttpResponse(buf.getvalue(), content_type="text/csv; charset=utf-8")
+            resp["Content-Disposition"] = 'attachment; filename="carga_masiva.csv"'
+            return resp
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Carga masiva"
+
+        headers = ["RUT","Razón social","Período","Tipo","Folio","Monto","Moneda","Estado","Observaciones"]
+        ws.append(headers)
+
+        HEX_HEADER = "E8F5E9"
+        HEX_ZEBRA  = "F3FBF4"
+        HEX_BORDER = "DDE5DD"
+        HEX_TEXT   = "0F172A"
+
+        thin = Side(style="thin", color=HEX_BORDER)
+        cell_border = Border(top=thin, left=thin, right=thin, bottom=thin)
+
+        for col, title in enumerate(headers, start=1):
+            c = ws.cell(row=1, column=col, value=title)
+            c.fill = PatternFill("solid", fgColor=HEX_HEADER)
+            c.font = Font(bold=True, color=HEX_TEXT)
+            c.alignment = Alignment(vertical="center", horizontal="center")
+            c.border = cell_border
+
+        widths = [14, 24, 12, 16, 12, 16, 12, 22, 40]
+        for i, wdt in enumerate(widths, start=1):
+            ws.column_dimensions[chr(64+i)].width = wdt
+
+        ws.freeze_panes = "A2"
+        ws.auto_filter.ref = "A1:I1"
+        ws.row_dimensions[1].height = 22
+
+        # VALIDACIONES ESTRICTAS (solo opciones; sin permitir escribir otras)
+        dv_tipo = DataValidation(
+            type="list",
+            formula1='"Factura,Boleta,Nota de crédito,Otro"',
+            allow_blank=False,
+            showErrorMessage=True,
+            errorTitle="Valor inválido",
+            error="Debe seleccionar una opción de la lista: Factura, Boleta, Nota de crédito u Otro.",
+            errorStyle="stop",
+            showInputMessage=True,
+            promptTitle="Tipo",
+            prompt="Seleccione: Factura, Boleta, Nota de crédito u Otro."
+        )
+        dv_moneda = DataValidation(
+            type="list",
+            formula1='"USD,COP,CLP,PEN"',
+            allow_blank=False,
+            showErrorMessage=True,
+            errorTitle="Valor inválido",
+            error="Debe seleccionar una moneda de la lista: USD, COP, CLP o PEN.",
+            errorStyle="stop",
+            showInputMessage=True,
+            promptTitle="Moneda",
+            prompt="Seleccione: USD, COP, CLP o PEN."
+        )
+        dv_estado = DataValidation(
+            type="list",
+            formula1='"Válida,Con advertencias,Rechazada"',
+            allow_blank=False,
+            showErrorMessage=True,
+            errorTitle="Valor inválido",
+            error="Debe seleccionar una opción: Válida, Con advertencias o Rechazada.",
+            errorStyle="stop",
+            showInputMessage=True,
+            promptTitle="Estado",
+            prompt="Seleccione: Válida, Con advertencias o Rechazada."
+        )
+        ws.add_data_validation(dv_tipo)
+        ws.add_data_validation(dv_moneda)
+        ws.add_data_validation(dv_estado)
+
+        def parse_amount(moneda: str, monto_texto: str):
+            m = (moneda or "").upper()
+            s = str(monto_texto or "").strip()
+            if m in ("USD", "PEN"):
+                try:
+                    return float(s.replace(".", "").replace(",", ".")) if s else None
+                except Exception:
+                    return None
+            else:
+                try:
+                    num = re.sub(r"[^\d]", "", s)
+                    return int(num) if num else None
+                except Exception:
+                    return None
+
+        start = 2
+        for i, x in enumerate(rows_in, start=start):
+            rut  = x.get("rut") or x.get("RUT") or ""
+            raz  = x.get("razon_social") or x.get("Razón social") or ""
+            per  = x.get("periodo") or x.get("Período") or ""
+            tip  = x.get("tipo") or x.get("Tipo") or x.get("tipo_instrumento") or ""
+            fol  = x.get("folio") or x.get("Folio") or ""
+            mon_txt = x.get("moneda") or x.get("Moneda") or ""
+            mon = (mon_txt or "").upper()
+            est  = x.get("estado") or x.get("Estado") or x.get("estado_validacion") or ""
+            obs  = x.get("observaciones") or x.get("Observaciones") or ""
+            monto_txt = x.get("monto") or x.get("Monto") or x.get("monto_raw") or ""
+
+            ws.append([rut, raz, per, tip, fol, None, mon, est, obs])
+
+            if i % 2 == 0:
+                for col in range(1, 10):
+                    ws.cell(i, col).fill = PatternFill("solid", fgColor=HEX_ZEBRA)
+
+            for col in range(1, 10):
+                cell = ws.cell(i, col)
+                cell.border = cell_border
+                cell.font = Font(color=HEX_TEXT)
+                if col in (1, 3, 4, 5, 7, 8):
+                    cell.alignment = Alignment(vertical="center", horizontal="center")
+                elif col == 6:
+                    cell.alignment = Alignment(vertical="center", horizontal="right")
+                else:
+                    cell.alignment = Alignment(vertical="top", wrap_text=True)
+
+            # Aplicar validaciones celda por celda
+            dv_tipo.add(ws.cell(i, 4))
+            dv_moneda.add(ws.cell(i, 7))
+            dv_estado.add(ws.cell(i, 8))
+
+            num = parse_amount(mon, monto_txt)
+            c_monto = ws.cell(i, 6, num)
+            if num is None:
+                c_monto.value = None
+            c_monto.number_format = "#,##0.00" if mon in ("USD", "PEN") else "#,##0"
+
+            ws.row_dimensions[i].height = 18
+
+        last_row = max(ws.max_row, 1)
+        from openpyxl.worksheet.table import Table, TableStyleInfo
+        table_ref = f"A1:I{last_row}"
+        table = Table(displayName="Calificaciones", ref=table_ref)
+        table_style = TableStyleInfo(
+            name="TableStyleMedium9",
+            showFirstColumn=False,
+            showLastColumn=False,
+            showRowStripes=True,
+            showColumnStripes=False,
+        )
+        table.tableStyleInfo = table_style
+        ws.add_table(table)
+
+        bio = io.BytesIO()
+        wb.save(bio)
+        bio.seek(0)
+        resp = HttpResponse(
+            bio.getvalue(),
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+        resp["Content-Disposition"] = 'attachment; filename="carga_masiva.xlsx"'
+        return resp
+
+    # ====== Endpoint de estadísticas para el dashboard (con auth múltiple) ======
+    @staticmethod
+    def _agregado(qs, **agregados):
+        """
+        aggregate() como queryset sin ejecutar: una sola fila y sin GROUP BY
+        (se agrupa por una constante), así EXPLAIN ve el mismo SQL que se lee con .get().
+        """
+        return qs.order_by().annotate(_uno=Value(1)).values("_uno").annotate(**agregados).values(*agregados)
+
+    @classmethod
+    def consultas_stats(cls, hoy) -> dict:
+        """
+        Querysets (sin ejecutar) de stats para el día local `hoy`. También los
+        usa api/formas_consulta.py para revisar sus planes.
+        """
+        qs = Calificacion.objects.all()
+        # Últimos 14 días locales (America/Santiago) como rangos UTC semiabiertos:
+        # un COUNT filtrado por día, todos en una pasada por el índice de created_at
+        limites = limites_dias(hoy - timedelta(days=13), 14)
+        ventana_14d = filtro_ventana("created_at", limites[0], limites[-1])
+        return {
+            # Total en CLP de todas las monedas: SUM directo sobre la columna materializada
+            "resumen": cls._agregado(
+                qs,
+                total=Count("id"),
+                monto_clp_total=Sum("monto_clp"),
+                sin_tasa=Count("id", filter=Q(monto_clp__isnull=True)),
+            ),
+            "serie_14d": cls._agregado(qs.filter(**ventana_14d), **{
+                f"d{i}": Count("id", filter=Q(**filtro_ventana("created_at", limites[i], limites[i + 1])))
+                for i in range(14)
+            }),
+            "estados": qs.values_list("estado_validacion", flat=True),
+            "tipos": qs.values_list("tipo_instrumento", flat=True),
+            "errores_14d": cls._agregado(
+                qs.filter(**ventana_14d, estado_validacion__in=["Con advertencias", "Rechazada"]),
+                n=Count("id"),
+            ),
+        }
+
+    @action(detail=False, methods=["get"], url_path="stats", permission_classes=[permissions.IsAuthenticated])
+    @usar_replica
+    # La serie de 14 días cambia a medianoche aunque la tabla no cambie
+    @con_validadores(
+        "api_calificacion",
+        variante=lambda vista, request: hoy_local().isoformat(),
+        desde=lambda: inicio_dia(hoy_local()),
+    )
+    def stats(self, request, *args, **kwargs):
+        from collections import Counter
+
+        hoy = hoy_local()
+        inicio = hoy - timedelta(days=13)
+        consultas = self.consultas_stats(hoy)
+
+        resumen = consultas["resumen"].get()
+        por_dia = consultas["serie_14d"].get()
+        serie_14d = [
+            {"date": (inicio + timedelta(days=i)).isoformat(), "count": por_dia[f"d{i}"]}
+            for i in range(14)
+        ]
+
+        estados_cnt = Counter(consultas["estados"])
+        tipos_cnt   = Counter(consultas["tipos"])
+
+        errores_14d = consultas["errores_14d"].get()["n"]
+
+        data = {
+            "total_registros": resumen["total"],
+            "registros_por_dia": serie_14d,
+            "estados": {
+                "Válida": int(estados_cnt.get("Válida", 0)),
+                "Con advertencias": int(estados_cnt.get("Con advertencias", 0)),
+                "Rechazada": int(estados_cnt.get("Rechazada", 0)),
+            },
+            "tipos": {
+                "Factura": int(tipos_cnt.get("Factura", 0)),
+                "Boleta": int(tipos_cnt.get("Boleta", 0)),
+                "Nota de crédito": int(tipos_cnt.get("Nota de crédito", 0)),
+                "Otro": int(tipos_cnt.get("Otro", 0)),
+            },
+            "errores_ultimos_14d": int(errores_14d),
+            "monto_clp_total": int(resumen["monto_clp_total"] or 0),
+            "sin_tasa": resumen["sin_tasa"],
+        }
+        return Response(data, status=200)
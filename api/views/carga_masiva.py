@@ -0,0 +1,405 @@
+# api/views/carga_masiva.py — plantilla XLSX, preview y commit de la carga masiva
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.parsers import MultiPartParser, FormParser  # ⬅️ necesario para multipart
+
+from ..models import Calificacion
+from ..views_template import (
+    HEADERS as PLANTILLA_HEADERS,
+    TIPO_LIST as PLANTILLA_TIPOS,
+    MONEDA_LIST as PLANTILLA_MONEDAS,
+    ESTADO_LIST as PLANTILLA_ESTADOS,
+    template_response,
+)
+
+import io
+import re
+import unicodedata
+from datetime import datetime
+
+from ..fx import convertir_lote
+
+
+# ========================= Carga masiva: plantilla/preview/commit =========================
+def _enumerar(opciones) -> str:
+    """['A', 'B', 'Otro'] → 'A, B u Otro' (conjunción 'u' ante sonido o)."""
+    opciones = list(opciones)
+    if len(opciones) < 2:
+        return "".join(opciones)
+    ultimo = opciones[-1]
+    conj = "u" if ultimo.lower().startswith(("o", "ho")) else "o"
+    return f"{', '.join(opciones[:-1])} {conj} {ultimo}"
+
+
+def _build_plantilla_carga_masiva() -> io.BytesIO:
+    """XLSX de Carga Masiva (ver CalificacionTemplateView). Lanza ImportError sin openpyxl."""
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+    from openpyxl.worksheet.datavalidation import DataValidation
+    from openpyxl.worksheet.table import Table, TableStyleInfo
+
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Carga masiva"
+
+    headers = list(PLANTILLA_HEADERS)
+    ws.append(headers)
+
+    HEX_HEADER = "E8F5E9"
+    HEX_ZEBRA  = "F3FBF4"
+    HEX_BORDER = "DDE5DD"
+    HEX_TEXT   = "0F172A"
+
+    thin = Side(style="thin", color=HEX_BORDER)
+    border = Border(top=thin, left=thin, right=thin, bottom=thin)
+
+    for col, title in enumerate(headers, start=1):
+        c = ws.cell(row=1, column=col, value=title)
+        c.fill = PatternFill("solid", fgColor=HEX_HEADER)
+        c.font = Font(bold=True, color=HEX_TEXT)
+        c.alignment = Alignment(vertical="center", horizontal="center")
+        c.border = border
+
+    widths = [14, 26, 12, 18, 12, 16, 12, 22, 40]
+    for i, wdt in enumerate(widths, start=1):
+        ws.column_dimensions[chr(64+i)].width = wdt
+
+    ws.freeze_panes = "A2"
+    ws.auto_filter.ref = "A1:I1"
+    ws.row_dimensions[1].height = 22
+
+    # VALIDACIONES ESTRICTAS (solo opciones; sin escritura libre)
+    dv_tipo = DataValidation(
+        type="list",
+        formula1=f'"{",".join(PLANTILLA_TIPOS)}"',
+        allow_blank=False,
+        showErrorMessage=True,
+        errorTitle="Valor inválido",
+        error=f"Debe seleccionar una opción de la lista: {_enumerar(PLANTILLA_TIPOS)}.",
+        errorStyle="stop",
+        showInputMessage=True,
+        promptTitle="Tipo",
+        prompt=f"Seleccione: {_enumerar(PLANTILLA_TIPOS)}."
+    )
+    dv_moneda = DataValidation(
+        type="list",
+        formula1=f'"{",".join(PLANTILLA_MONEDAS)}"',
+        allow_blank=False,
+        showErrorMessage=True,
+        errorTitle="Valor inválido",
+        error=f"Debe seleccionar una moneda de la lista: {_enumerar(PLANTILLA_MONEDAS)}.",
+        errorStyle="stop",
+        showInputMessage=True,
+        promptTitle="Moneda",
+        prompt=f"Seleccione: {_enumerar(PLANTILLA_MONEDAS)}."
+    )
+    dv_estado = DataValidation(
+        type="list",
+        formula1=f'"{",".join(PLANTILLA_ESTADOS)}"',
+        allow_blank=False,
+        showErrorMessage=True,
+        errorTitle="Valor inválido",
+        error=f"Debe seleccionar una opción: {_enumerar(PLANTILLA_ESTADOS)}.",
+        errorStyle="stop",
+        showInputMessage=True,
+        promptTitle="Estado",
+        prompt=f"Seleccione: {_enumerar(PLANTILLA_ESTADOS)}."
+    )
+    ws.add_data_validation(dv_tipo)
+    ws.add_data_validation(dv_moneda)
+    ws.add_data_validation(dv_estado)
+
+    # 10 filas vacías con validaciones
+    for i in range(2, 12):
+        ws.append(["", "", "", "", "", None, "", "", ""])
+        if i % 2 == 0:
+            for col in range(1, 10):
+                ws.cell(i, col).fill = PatternFill("solid", fgColor=HEX_ZEBRA)
+        for col in range(1, 10):
+            cell = ws.cell(i, col)
+            cell.border = border
+            cell.font = Font(color=HEX_TEXT)
+            if col in (1, 3, 4, 5, 7, 8):
+                cell.alignment = Alignment(vertical="center", horizontal="center")
+            elif col == 6:
+                cell.alignment = Alignment(vertical="center", horizontal="right")
+            else:
+                cell.alignment = Alignment(vertical="top", wrap_text=True)
+        dv_tipo.add(f"D{i}")
+        dv_moneda.add(f"G{i}")
+        dv_estado.add(f"H{i}")
+        ws.cell(i, 6).number_format = "#,##0"  # entero por defecto
+
+    # Tabla
+    last_row = ws.max_row
+    table = Table(displayName="Calificaciones", ref=f"A1:I{last_row}")
+    table_style = TableStyleInfo(
+        name="TableStyleMedium9",
+        showFirstColumn=False, showLastColumn=False,
+        showRowStripes=True, showColumnStripes=False,
+    )
+    table.tableStyleInfo = table_style
+    ws.add_table(table)
+
+    bio = io.BytesIO()
+    wb.save(bio); bio.seek(0)
+    return bio
+
+
+class CalificacionTemplateView(APIView):
+    """
+    Entrega un XLSX con EXACTAMENTE las mismas opciones de Carga Masiva:
+    - Columnas: RUT, Razón social, Período, Tipo, Folio, Monto, Moneda, Estado, Observaciones
+    - Listas (solo selección, sin escritura libre):
+        * Tipo:    Factura, Boleta, Nota de crédito, Otro
+        * Moneda:  USD, COP, CLP, PEN
+        * Estado:  Válida, Con advertencias, Rechazada
+    - 10 filas vacías, cabecera verde suave, zebra, autofiltro y panes congelados.
+
+    Columnas y listas vienen de api/views_template.py. El archivo se genera
+    una vez por versión de contenido y se sirve cacheado con ETag.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        try:
+            return template_response(request, _build_plantilla_carga_masiva)
+        except ImportError:
+            return Response(
+                {"detail": "Servidor sin 'openpyxl'. Instálalo: pip install openpyxl"},
+                status=500,
+            )
+
+
+class CalificacionBulkPreviewView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = (MultiPartParser, FormParser)
+
+    def _norm(self, s: str) -> str:
+        s = (s or "").strip().lower()
+        s = "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c))
+        s = s.replace("razon social", "razon_social")
+        s = s.replace("período", "periodo")
+        s = s.replace("tipo de documento", "tipo")
+        s = s.replace("tipo documento", "tipo")
+        s = s.replace("nota de credito", "nota de crédito")
+        return s
+
+    def _parse_rows(self, request):
+        if isinstance(request.data, dict) and "rows" in request.data:
+            raw_rows = list(request.data.get("rows") or [])
+            parsed = []
+            for x in raw_rows:
+                parsed.append({
+                    "rut":               (x.get("rut") or x.get("RUT") or "").strip(),
+                    "razon_social":      (x.get("razon_social") or x.get("Razón social") or "").strip(),
+                    "periodo":           (x.get("periodo") or x.get("Período") or "").strip(),
+                    "tipo_instrumento":  (x.get("tipo_instrumento") or x.get("tipo") or x.get("Tipo") or "Factura").strip(),
+                    "folio":             (x.get("folio") or x.get("Folio") or "").strip(),
+                    "monto_raw":         str(x.get("monto_raw") or x.get("monto") or x.get("Monto") or "").replace(".", ",").strip(),
+                    "moneda":            (x.get("moneda") or x.get("Moneda") or "CLP").strip().upper(),
+                    "estado_validacion": (x.get("estado_validacion") or x.get("estado") or x.get("Estado") or "Válida").strip(),
+                    "observaciones":     (x.get("observaciones") or x.get("Observaciones") or "").strip(),
+                })
+            return parsed, None
+
+        up = request.FILES.get("file")
+        if not up:
+            return [], "No llegó archivo 'file' en el form-data."
+
+        try:
+            from openpyxl import load_workbook  # type: ignore
+        except Exception:
+            return [], "Servidor sin 'openpyxl'. Instálalo o envía JSON."
+
+        wb = load_workbook(up, data_only=True, read_only=True)
+        ws = wb.active
+
+        headers = []
+        for c in ws[1]:
+            headers.append(self._norm(str(c.value or "")))
+
+        idx = {h: i for i, h in enumerate(headers)}
+
+        def col(*names):
+            for n in names:
+                n2 = self._norm(n)
+                if n2 in idx:
+                    return idx[n2]
+            return None
+
+        need = {
+            "rut": col("RUT", "rut"),
+            "razon_social": col("Razón social", "razon_social"),
+            "periodo": col("Período", "periodo"),
+            "tipo": col("Tipo", "tipo", "tipo de documento", "tipo documento"),
+            "folio": col("Folio", "folio"),
+            "monto": col("Monto", "monto"),
+            "moneda": col("Moneda", "moneda"),
+            "estado": col("Estado", "estado"),
+            "observaciones": col("Observaciones", "observaciones", "obs"),
+        }
+
+        required = ("rut", "razon_social", "periodo", "tipo", "folio", "monto", "moneda", "estado")
+        missing = [k for k in required if need[k] is None]
+        if missing:
+            return [], ("Encabezados faltantes o distintos: " + ", ".join(missing))
+
+        rows = []
+        for r in ws.iter_rows(min_row=2, values_only=True):
+            vals = list(r or [])
+            if not any(str(v).strip() for v in vals if v is not None):
+                continue
+
+            def gv(key):
+                i = need[key]
+                return "" if i is None or i >= len(vals) else ("" if vals[i] is None else str(vals[i]))
+
+            periodo_cell = vals[need["periodo"]] if need["periodo"] is not None and need["periodo"] < len(vals) else ""
+            if isinstance(periodo_cell, datetime):
+                per_txt = periodo_cell.strftime("%Y-%m")
+            else:
+                per_raw = str(periodo_cell or "").strip()
+                if re.match(r"^\d{1,2}/\d{1,2}/\d{4}$", per_raw):
+                    try:
+                        dt = datetime.strptime(per_raw, "%d/%m/%Y")
+                        per_txt = dt.strftime("%Y-%m")
+                    except Exception:
+                        per_txt = per_raw
+                else:
+                    per_txt = per_raw
+
+            rows.append({
+                "rut":               gv("rut").strip(),
+                "razon_social":      gv("razon_social").strip(),
+                "periodo":           per_txt,
+                "tipo_instrumento":  (gv("tipo") or "Factura").strip(),
+                "folio":             gv("folio").strip(),
+                "monto_raw":         str(gv("monto")).replace(".", ",").strip(),
+                "moneda":            (gv("moneda").strip().upper() or "CLP"),
+                "estado_validacion": (gv("estado") or "Válida").strip(),
+                "observaciones":     gv("observaciones").strip(),
+            })
+
+        return rows, None
+
+    def _validate_one(self, row):
+        errs = []
+
+        rut = (row.get("rut") or "").strip()
+        if not rut:
+            errs.append("RUT es obligatorio.")
+
+        periodo = (row.get("periodo") or "").strip()
+        if not re.match(r"^\d{4}-\d{2}$", periodo):
+            errs.append("Período debe ser YYYY-MM.")
+
+        tipo = (row.get("tipo_instrumento") or "").strip()
+        if not tipo:
+            errs.append("Tipo es obligatorio.")
+
+        folio = (row.get("folio") or "").strip()
+        if not folio:
+            errs.append("Folio es obligatorio.")
+
+        moneda = (row.get("moneda") or "CLP").upper()
+        if moneda not in ("CLP","USD","COP","PEN"):
+            errs.append("Moneda inválida (use CLP, USD, COP o PEN).")
+
+        monto_raw = str(row.get("monto_raw") or "")
+        if moneda in ("USD","PEN"):
+            if not re.match(r"^\d+(,\d{1,2})?$", monto_raw or ""):
+                errs.append("Monto debe usar coma decimal (ej: 123,45) para USD/PEN.")
+            monto_number = float((monto_raw or "0").replace(",", ".") or 0)
+        else:
+            if not re.match(r"^\d+$", re.sub(r"[^\d]", "", monto_raw or "0")):
+                errs.append("Monto debe ser entero (sin decimales) para CLP/COP.")
+            monto_number = float(re.sub(r"[^\d]", "", monto_raw or "0") or 0)
+
+        estado = (row.get("estado_validacion") or "").strip()
+        if estado not in ("Válida","Con advertencias","Rechazada"):
+            errs.append("Estado inválido.")
+
+        out = dict(row)
+        out["errors"] = errs
+        out["monto_number"] = monto_number
+        return out
+
+    def post(self, request):
+        rows, import_err = self._parse_rows(request)
+        if import_err:
+            return Response({"currency": "MIXED", "rows": [], "errors": [import_err]}, status=400)
+
+        out_rows = [self._validate_one(r) for r in rows]
+        # Todas las filas a CLP de una vez, con la tasa vigente al cierre de su período
+        convertidos = convertir_lote((r["monto_number"], r.get("moneda"), r.get("periodo")) for r in out_rows)
+        for r, (monto_clp, tasa) in zip(out_rows, convertidos):
+            r["monto_clp"] = monto_clp if monto_clp is not None else int(round(r["monto_number"]))
+            r["fx_clp_per_unit"] = str(tasa) if tasa is not None else None
+        if not out_rows:
+            return Response({"currency": "MIXED", "rows": [], "errors": ["El archivo no contiene filas válidas."]}, status=400)
+
+        monedas = {(r.get("moneda") or "CLP").upper() for r in rows}
+        summary_currency = list(monedas)[0] if len(monedas) == 1 else "MIXED"
+
+        return Response({"currency": summary_currency, "rows": out_rows, "errors": []}, status=200)
+
+
+class CalificacionBulkCommitView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        default_currency = (request.data.get("currency") or "CLP").upper()
+        raw_rows = list(request.data.get("rows") or [])
+        if not raw_rows:
+            return Response({"detail": "rows es obligatorio."}, status=400)
+
+        created = 0
+        ids = []
+
+        for x in raw_rows:
+            r = {
+                "rut":            (x.get("rut") or x.get("RUT") or "").strip(),
+                "razon_social":   (x.get("razon_social") or x.get("Razón social") or "").strip(),
+                "periodo":        (x.get("periodo") or x.get("Período") or "").strip(),
+                "tipo_instrumento": (x.get("tipo_instrumento") or x.get("tipo") or x.get("Tipo") or "Factura").strip(),
+                "folio":          (x.get("folio") or x.get("Folio") or "").strip(),
+                "monto_raw":      str(x.get("monto_raw") or x.get("monto") or x.get("Monto") or "").strip(),
+                "moneda":         (x.get("moneda") or x.get("Moneda") or default_currency).strip().upper(),
+                "estado_validacion": (x.get("estado_validacion") or x.get("estado") or x.get("Estado") or "Válida").strip(),
+                "observaciones":  (x.get("observaciones") or x.get("Observaciones") or "").strip(),
+            }
+
+            per = r["periodo"]
+            if re.match(r"^\d{1,2}/\d{1,2}/\d{4}$", per):
+                try:
+                    dt = datetime.strptime(per, "%d/%m/%Y")
+                    r["periodo"] = dt.strftime("%Y-%m")
+                except Exception:
+                    pass
+
+            moneda = r["moneda"] or default_currency
+
+            if moneda in ("USD", "PEN"):
+                monto_number = float((r["monto_raw"] or "0").replace(",", ".") or 0)
+            else:
+                monto_number = float(re.sub(r"[^\d]", "", r["monto_raw"] or "0") or 0)
+
+            monto_save = int(round(monto_number))
+
+            obj = Calificacion.objects.create(
+                rut=r["rut"],
+                razon_social=r["razon_social"],
+                periodo=r["periodo"],
+                tipo_instrumento=r["tipo_instrumento"],
+                folio=r["folio"],
+                monto=monto_save,
+                moneda=moneda,
+                estado_validacion=r["estado_validacion"],
+                observaciones=r["observaciones"],
+            )
+            created += 1
+            ids.append(obj.id)
+
+        return Response({"ok": True, "created": created, "ids": ids}, status=200)
@@ -0,0 +1,80 @@
+# api/views/comun.py — helpers compartidos por los módulos de vistas
+from django.contrib.auth import get_user_model
+from django.db.models import F, Value
+from django.db.models.functions import Replace
+
+from ..models import UserFlag
+from ..fx import convertir_lote
+
+import re
+
+User = get_user_model()
+ROLES_VALIDOS = {"Administrador", "Operador", "Auditor", "Usuario"}
+
+
+# ========================= Helpers FX =========================
+def fx_to_clp(amount_number: float, code: str, periodo: str | None = None) -> int:
+    """Monto en CLP con la tasa vigente al cierre de `periodo` (sin tasa: el monto tal cual)."""
+    try:
+        clp, _ = convertir_lote([(amount_number, code, periodo)])[0]
+        if clp is not None:
+            return clp
+        return int(round(float(amount_number)))
+    except Exception:
+        try:
+            return int(round(float(amount_number or 0)))
+        except Exception:
+            return 0
+
+
+# ========================= Utilidades varias =========================
+def _ensure_role_exists(name: str):
+    if name not in ROLES_VALIDOS:
+        pass
+    grp, _ = User.groups.rel.model.objects.get_or_create(name=name)  # Group
+    return grp
+
+
+def _get_flags(user: User) -> UserFlag:
+    obj, _ = UserFlag.objects.get_or_create(user=user)
+    return obj
+
+
+def _truthy(val) -> bool:
+    """Interpreta strings como 1/true/on/sí/si."""
+    s = str(val or "").strip().lower()
+    return s in ("1", "true", "on", "sí", "si", "yes", "y")
+
+
+# ====== NUEVO: helpers para RUT flexible ======
+def _clean_rut_string(s: str) -> str:
+    """
+    Limpia un RUT en texto, quitando puntos, guiones y espacios.
+    Ej: '12.345.678-9' -> '123456789'
+    """
+    s = (s or "").strip()
+    return re.sub(r"[.\-\s]", "", s)
+
+
+def _apply_rut_filter(qs, rut_raw: str):
+    """
+    Aplica un filtro de RUT 'flexible', ignorando ., - y espacios
+    tanto en el parámetro como en lo almacenado en BD.
+
+    No altera cómo se guarda el RUT, solo cómo se filtra.
+    """
+    rut_clean = _clean_rut_string(rut_raw)
+    if not rut_clean:
+        return qs
+
+    # Normalizamos el campo rut en BD quitando ., - y espacios
+    qs = qs.annotate(
+        rut_norm=Replace(
+            Replace(
+                Replace(F("rut"), Value("."), Value("")),
+                Value("-"), Value("")
+            ),
+            Value(" "), Value("")
+        )
+    ).filter(rut_norm__icontains=rut_clean)
+    return qs
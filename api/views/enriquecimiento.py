@@ -0,0 +1,90 @@
+# api/views/enriquecimiento.py — resolución de razón social por RUT
+# Solo lo importan las acciones que enriquecen (resolve_razon, backfill, enrich=1).
+import os
+
+from django.db.models import Q
+
+from ..models import Calificacion
+
+# ⬇️ requests opcional para “traer de todos lados”
+try:
+    import requests  # type: ignore
+except Exception:  # pragma: no cover
+    requests = None  # si no está instalado, seguimos solo con fuentes locales
+
+
+# ================ Resolución de razón social (“de todos lados”) ================
+def _resolve_razon_from_local_cache(rut: str) -> tuple[str | None, str]:
+    """
+    Busca en la misma tabla Calificacion algún registro previo con misma RUT
+    y razón_social no vacía. Toma el más reciente.
+    """
+    c = (
+        Calificacion.objects.filter(rut__iexact=rut)
+        .exclude(Q(razon_social__isnull=True) | Q(razon_social=""))
+        .order_by("-id")
+        .first()
+    )
+    if c and c.razon_social:
+        return c.razon_social.strip(), "local:calificacion"
+    return None, "local:none"
+
+
+def _resolve_razon_from_http(rut: str) -> tuple[str | None, str, str | None]:
+    """
+    Consulta servicios HTTP configurados por env:
+      RESOLVE_RAZON_HTTP="https://a.example/lookup,https://b.example/find"
+    Acepta JSON {"razon_social": "..."} o texto plano.
+    Devuelve (razon, source, error).
+    """
+    if not requests:
+        return None, "http:disabled", "requests-not-installed"
+
+    urls = (os.environ.get("RESOLVE_RAZON_HTTP") or "").strip()
+    if not urls:
+        return None, "http:none", None
+
+    for raw in urls.split(","):
+        url = raw.strip()
+        if not url:
+            continue
+        try:
+            resp = requests.get(url, params={"rut": rut}, timeout=6)
+            if resp.status_code != 200:
+                continue
+            razon = None
+            try:
+                data = resp.json()
+                razon = (data.get("razon_social") or "").strip() or None
+            except Exception:
+                txt = (resp.text or "").strip()
+                razon = txt or None
+            if razon:
+                return razon, f"http:{url}", None
+        except Exception as e:  # pragma: no cover
+            _ = e
+            continue
+    return None, "http:none", None
+
+
+def resolve_razon_social(rut: str) -> tuple[str | None, str, str | None]:
+    """
+    Intenta resolver razón social en este orden:
+      1) Cache local (Calificacion misma tabla)
+      2) Servicios HTTP configurables por env
+    Retorna (razon, source, error)
+    """
+    if not rut:
+        return None, "invalid:empty-rut", "empty-rut"
+
+    # 1) local
+    razon, src = _resolve_razon_from_local_cache(rut)
+    if razon:
+        return razon, src, None
+
+    # 2) http externos opcionales
+    razon, src, err = _resolve_razon_from_http(rut)
+    if razon:
+        return razon, src, None
+
+    return None, "not-found", err
@@ -0,0 +1,51 @@
+# api/views/fx.py — conversión a CLP en lote (misma lógica que monto_clp)
+import math
+
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ..fx import convertir_lote
+
+MAX_ITEMS = 10000
+
+
+def _item(x) -> tuple[float, str | None, str | None]:
+    """(monto, moneda, periodo) de un item del body; ValueError si no es válido."""
+    if not isinstance(x, dict):
+        raise ValueError
+    monto = x.get("monto")
+    monto = float(str(monto if monto is not None else 0).replace(",", "."))
+    # nan / inf / 1e400 pasan float() pero no se pueden convertir a CLP
+    if not math.isfinite(monto):
+        raise ValueError
+    moneda, periodo = x.get("moneda"), x.get("periodo")
+    if not all(v is None or isinstance(v, str) for v in (moneda, periodo)):
+        raise ValueError
+    return monto, moneda, periodo
+
+
+class FxConvertirView(APIView):
+    """
+    POST {"items": [{"monto": 12.5, "moneda": "USD", "periodo": "2025-03"}, ...]}
+    → {"items": [{"monto_clp": 11875, "fx_clp_per_unit": "950.0000"}, ...], "sin_tasa": 0}
+    Cada monto se convierte con la tasa vigente al cierre de su período.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        items = request.data.get("items") if isinstance(request.data, dict) else None
+        if not isinstance(items, list):
+            return Response({"detail": "items debe ser una lista."}, status=400)
+        if len(items) > MAX_ITEMS:
+            return Response({"detail": f"Máximo {MAX_ITEMS} items por llamada."}, status=400)
+        try:
+            tuplas = [_item(x) for x in items]
+        except ValueError:
+            return Response({"detail": "Cada item necesita monto numérico, moneda y periodo."}, status=400)
+
+        salida = [
+            {"monto_clp": clp, "fx_clp_per_unit": str(tasa) if tasa is not None else None}
+            for clp, tasa in convertir_lote(tuplas)
+        ]
+        return Response({"items": salida, "sin_tasa": sum(1 for x in salida if x["monto_clp"] is None)})
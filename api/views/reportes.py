@@ -0,0 +1,254 @@
+# api/views/reportes.py — descarga de reportes XLSX/CSV
+from django.db.models import Count, Sum
+from django.http import HttpResponse
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.db_router import usar_replica
+from core.ventanas import filtro_ventana, ventana_periodo
+
+from ..busqueda import filtrar_texto
+from ..models import SIN_RAZON_SOCIAL, Calificacion
+
+import io
+import csv
+from datetime import datetime
+
+from django.utils import timezone
+
+from .comun import _truthy, _apply_rut_filter
+from .enriquecimiento import resolve_razon_social
+
+
+# ========================= Reportes (descarga XLSX/CSV con formato bonito) =========================
+class ReporteExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    TITLES = {
+        "diario":  "Reporte diario",
+        "semanal": "Reporte semanal",
+        "mensual": "Reporte mensual",
+    }
+
+    def _rango(self, scope: str):
+        # Días en America/Santiago como [inicio, fin) en UTC: usa el índice de created_at
+        return ventana_periodo(scope)
+
+    def _filtrar(self, request):
+        qs = Calificacion.objects.all()
+        qp = request.query_params
+        rut     = (qp.get("rut") or "").strip()
+        razon   = (qp.get("razon") or "").strip()
+        pdesde  = (qp.get("pdesde") or "").strip()
+        phasta  = (qp.get("phasta") or "").strip()
+        tipo    = (qp.get("tipo") or "").strip()
+        estado  = (qp.get("estado") or "").strip()
+        moneda  = (qp.get("moneda") or "").strip().upper()
+        # ⬇️ NUEVO: soporte para no_inscritos también en reportes
+        no_inscritos = (qp.get("no_inscritos") or qp.get("noi") or "").strip().lower()
+        want_noi = no_inscritos in ("1", "true", "on", "sí", "si")
+
+        if rut:
+            qs = _apply_rut_filter(qs, rut)
+        if razon:
+            qs = filtrar_texto(qs, razon, columnas=("razon_social",))
+        if pdesde:
+            qs = qs.filter(periodo__gte=pdesde)
+        if phasta:
+            qs = qs.filter(periodo__lte=phasta)
+        if tipo:
+            qs = qs.filter(tipo_instrumento=tipo)
+        if estado:
+            qs = qs.filter(estado_validacion=estado)
+        if moneda:
+            qs = qs.filter(moneda=moneda)
+        if want_noi:
+            qs = qs.filter(SIN_RAZON_SOCIAL)
+        return qs
+
+    @usar_replica
+    def get(self, request):
+        scope = (request.query_params.get("scope") or "mensual").lower()
+        fmt   = (request.query_params.get("format") or "xlsx").lower()
+        enrich = _truthy(request.query_params.get("enrich"))  # ⬅️ NUEVO
+        if scope not in ("diario", "semanal", "mensual"):
+            return Response({"detail": "scope inválido"}, status=400)
+
+        title = self.TITLES.get(scope, "Reporte")
+        start, end = self._rango(scope)
+        qs = self._filtrar(request).filter(**filtro_ventana("created_at", start, end)).order_by("id")
+
+        headers = [
+            "RUT","Razón social","Período","Tipo","Folio",
+            "Monto","Moneda","Estado","Observaciones","Creado en"
+        ]
+        data = []
+        tz = timezone.get_current_timezone()
+        columnas = ("rut", "razon_social", "periodo", "tipo_instrumento", "folio",
+                    "monto", "moneda", "estado_validacion", "observaciones", "created_at")
+        for rut, razon, periodo, tipo, folio, monto, moneda, estado, obs, creado in qs.values_list(*columnas):
+            if enrich and not (razon or "").strip():
+                resolved, _, _ = resolve_razon_social(rut)
+                if resolved:
+                    razon = resolved
+            data.append([
+                rut,
+                razon,
+                periodo,
+                tipo,
+                folio,
+                int(monto),
+                moneda,
+                estado,
+                (obs or "").replace("\n", " ").replace("\r", " "),
+                creado.astimezone(tz).strftime("%Y-%m-%d %H:%M:%S"),
+            ])
+
+        today_str = datetime.now().strftime("%Y-%m-%d")
+        base_name = f"{title.replace(' ', '_').lower()}_{today_str}"
+
+        if fmt == "csv":
+            sio = io.StringIO()
+            w = csv.writer(sio)
+            w.writerow([title]); w.writerow([]); w.writerow(headers)
+            for row in data:
+                w.writerow(row)
+            resp = HttpResponse(sio.getvalue(), content_type="text/csv; charset=utf-8")
+            resp["Content-Disposition"] = f'attachment; filename="{base_name}.csv"'
+            return resp
+
+        try:
+            from openpyxl import Workbook
+            from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+            from openpyxl.worksheet.table import Table, TableStyleInfo
+        except Exception:
+            sio = io.StringIO()
+            w = csv.writer(sio)
+            w.writerow([title]); w.writerow([]); w.writerow(headers)
+            for row in data:
+                w.writerow(row)
+            resp = HttpResponse(sio.getvalue(), content_type="text/csv; charset=utf-8")
+            resp["Content-Disposition"] = f'attachment; filename="{base_name}.csv"'
+            return resp
+
+        wb = Workbook()
+
+        HEX_TITLE  = "CDEFD6"
+        HEX_HEADER = "DCFCE7"
+        HEX_ZEBRA  = "F0FDF4"
+        HEX_BORDER = "E5E7EB"
+        HEX_TEXT   = "0F172A"
+        thin = Side(style="thin", color=HEX_BORDER)
+        border = Border(top=thin, left=thin, right=thin, bottom=thin)
+
+        ws = wb.active
+        ws.title = title
+
+        ws.merge_cells("A1:J1")
+        c_title = ws["A1"]
+        c_title.value = title
+        c_title.fill = PatternFill("solid", fgColor=HEX_TITLE)
+        c_title.font = Font(size=14, bold=True, color=HEX_TEXT)
+        c_title.alignment = Alignment(horizontal="center", vertical="center")
+        ws.row_dimensions[1].height = 28
+
+        ws.append([""] * len(headers))
+        ws.row_dimensions[2].height = 6
+
+        ws.append(headers)
+        for col in range(1, len(headers)+1):
+            c = ws.cell(3, col)
+            c.font = Font(bold=True, color=HEX_TEXT)
+            c.fill = PatternFill("solid", fgColor=HEX_HEADER)
+            c.alignment = Alignment(horizontal="center", vertical="center")
+            c.border = border
+        ws.row_dimensions[3].height = 22
+        ws.freeze_panes = "A4"
+
+        start_row = 4
+        for i, row in enumerate(data, start=start_row):
+            ws.append(row)
+            if i % 2 == 0:
+                for col in range(1, len(headers)+1):
+                    ws.cell(i, col).fill = PatternFill("solid", fgColor=HEX_ZEBRA)
+            for col in range(1, len(headers)+1):
+                cell = ws.cell(i, col)
+                cell.border = border
+                cell.font = Font(color=HEX_TEXT)
+                if col in (1,3,4,5,7,8,10):
+                    cell.alignment = Alignment(horizontal="center", vertical="center")
+                elif col == 6:
+                    cell.alignment = Alignment(horizontal="right", vertical="center")
+                else:
+                    cell.alignment = Alignment(vertical="top", wrap_text=True)
+            ws.cell(i, 6).number_format = "#,##0"
+
+        last_row = ws.max_row
+        last_col = ws.max_column
+        ref = f"A3:{chr(64+last_col)}{last_row}"
+        table = Table(displayName="TablaReporte", ref=ref)
+        table.tableStyleInfo = TableStyleInfo(
+            name="TableStyleLight21", showFirstColumn=False, showLastColumn=False,
+            showRowStripes=True, showColumnStripes=False
+        )
+        ws.add_table(table)
+
+        widths = [14, 30, 10, 16, 12, 16, 10, 18, 40, 19]
+        for idx, wdt in enumerate(widths, start=1):
+            ws.column_dimensions[chr(64+idx)].width = wdt
+
+        total_row = last_row + 2
+        ws.cell(total_row, 1, "Totales").font = Font(bold=True)
+        ws.merge_cells(start_row=total_row, start_column=1, end_row=total_row, end_column=5)
+        ws.cell(total_row, 6, f"=SUBTOTAL(9,F4:F{last_row})").number_format = "#,##0"
+        ws.cell(total_row, 9, "Documentos:").alignment = Alignment(horizontal="right")
+        ws.cell(total_row, 10, f"=SUBTOTAL(3,A4:A{last_row})")
+
+        # Resumen por moneda en UNA consulta: monto_clp ya viene materializado (api/fx.py)
+        res = list(
+            qs.order_by().values("moneda")
+            .annotate(docs=Count("id"), suma=Sum("monto"), suma_clp=Sum("monto_clp"))
+            .order_by("moneda")
+        )
+        total_clp = sum(int(agg["suma_clp"] or 0) for agg in res)
+
+        ws2 = wb.create_sheet("Resumen")
+        ws2.append(["Moneda", "Documentos", "Suma monto", "Suma CLP"])
+        for col in range(1, 4+1):
+            c = ws2.cell(1, col)
+            c.font = Font(bold=True, color=HEX_TEXT)
+            c.fill = PatternFill("solid", fgColor=HEX_HEADER)
+            c.alignment = Alignment(horizontal="center", vertical="center")
+            c.border = border
+        for agg in res:
+            ws2.append([agg["moneda"] or "CLP", agg["docs"], int(agg["suma"] or 0),
+                        int(agg["suma_clp"]) if agg["suma_clp"] is not None else None])
+        ws2.append(["Total", sum(agg["docs"] for agg in res), None, total_clp])
+        for c in range(1, 5):
+            ws2.cell(ws2.max_row, c).font = Font(bold=True)
+        for r in range(2, ws2.max_row+1):
+            ws2.cell(r, 3).number_format = "#,##0"
+            ws2.cell(r, 4).number_format = "#,##0"
+            for c in range(1, 5):
+                ws2.cell(r, c).border = border
+        ws2.column_dimensions["A"].width = 12
+        ws2.column_dimensions["B"].width = 14
+        ws2.column_dimensions["C"].width = 16
+        ws2.column_dimensions["D"].width = 18
+
+        info_row = ws2.max_row + 2
+        tz = timezone.get_current_timezone()
+        ws2.cell(info_row, 1, f"Generado: {timezone.now().astimezone(tz).strftime('%Y-%m-%d %H:%M:%S')}")
+        ws2.cell(info_row+1, 1, f"Alcance: {scope.title()}")
+        ws2.merge_cells(start_row=info_row, start_column=1, end_row=info_row, end_column=4)
+        ws2.merge_cells(start_row=info_row+1, start_column=1, end_row=info_row+1, end_column=4)
+
+        bio = io.BytesIO()
+        wb.save(bio); bio.seek(0)
+        resp = HttpResponse(
+            bio.getvalue(),
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+        resp["Content-Disposition"] = f'attachment; filename="{base_name}.xlsx"'
+        return resp
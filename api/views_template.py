@@ -1,7 +1,16 @@
+import functools
+import hashlib
+import json
 import os
+import threading
+import types
 from io import BytesIO
-from django.http import FileResponse, HttpResponseServerError
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
 from django.contrib.staticfiles import finders
+from django.utils.cache import get_conditional_response, patch_cache_control
 
 # Nombre sugerido al descargar
 DOWNLOAD_NAME = "plantilla_carga_masiva.xlsx"
@@ -20,7 +29,7 @@ HEADERS = [
 ]
 
 TIPO_LIST = ["Factura", "Boleta", "Nota de crédito", "Otro"]
-MONEDA_LIST = ["CLP", "USD", "COP", "PEN"]
+MONEDA_LIST = ["USD", "COP", "CLP", "PEN"]
 ESTADO_LIST = ["Válida", "Con advertencias", "Rechazada"]
 
 COL_WIDTHS = [15, 24, 12, 16, 12, 14, 12, 18, 28]  # aprox
@@ -120,15 +129,109 @@ def _build_xlsx_in_memory() -> BytesIO:
     return mem
 
 
-def calificacion_template(request):
+# ======== Cache de la plantilla (por versión de contenido) ========
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# El archivo solo cambia con una nueva versión (y con ella el ETag)
+TEMPLATE_MAX_AGE = int(getattr(settings, "PLANTILLA_CACHE_MAX_AGE", 86400))
+TEMPLATE_CACHE_DIR = Path(getattr(settings, "PLANTILLA_CACHE_DIR", settings.BASE_DIR / ".cache" / "plantillas"))
+
+# "builder:versión" → bytes del XLSX
+_bytes_por_version: dict[str, bytes] = {}
+_cache_lock = threading.Lock()
+
+
+def _huella_codigo(valor, h) -> None:
     """
-    Devuelve la plantilla XLSX con los encabezados y validaciones actualizadas.
-    Se genera SIEMPRE en memoria para asegurar el formato correcto.
+    Bytecode, nombres y constantes (recorriendo los code objects anidados).
+    Sin números de línea ni nombre de archivo: mover el builder o editar otra
+    parte del módulo no cambia la versión.
     """
-    try:
-        mem = _build_xlsx_in_memory()
-        return FileResponse(mem, as_attachment=True, filename=DOWNLOAD_NAME)
-    except RuntimeError as e:
-        return HttpResponseServerError(str(e))
-    except Exception as e:
-        return HttpResponseServerError("Error generando la plantilla: %s" % e)
+    if isinstance(valor, types.CodeType):
+        h.update(valor.co_code)
+        h.update(repr(valor.co_names).encode("utf-8"))
+        for const in valor.co_consts:
+            _huella_codigo(const, h)
+    elif isinstance(valor, tuple):
+        for item in valor:
+            _huella_codigo(item, h)
+    elif isinstance(valor, frozenset):
+        # El orden de un frozenset depende del hash seed del proceso
+        for r in sorted(repr(x) for x in valor):
+            h.update(r.encode("utf-8"))
+    else:
+        h.update(repr(valor).encode("utf-8"))
+    h.update(b"\0")
+
+
+@functools.lru_cache(maxsize=None)
+def template_version(builder) -> str:
+    """
+    Huella del contenido: encabezados, listas y el bytecode del builder
+    (estilos, anchos, textos). Cualquier cambio produce otra versión.
+    Se calcula una vez por builder: el código no cambia sin reiniciar el proceso.
+    """
+    h = hashlib.sha256()
+    _huella_codigo(builder.__code__, h)
+    h.update(json.dumps([HEADERS, TIPO_LIST, MONEDA_LIST, ESTADO_LIST], ensure_ascii=False).encode("utf-8"))
+    return h.hexdigest()[:20]
+
+
+def get_template_bytes(builder) -> tuple[bytes, str]:
+    """
+    Bytes de la plantilla para la versión vigente: memoria del proceso →
+    archivo en TEMPLATE_CACHE_DIR (compartido entre workers) → builder().
+    Solo se genera una vez por versión.
+    """
+    version = template_version(builder)
+    key = f"{builder.__name__}:{version}"
+    data = _bytes_por_version.get(key)
+    if data is not None:
+        return data, version
+
+    with _cache_lock:
+        data = _bytes_por_version.get(key)
+        if data is None:
+            path = TEMPLATE_CACHE_DIR / f"{builder.__name__}_{version}.xlsx"
+            try:
+                data = path.read_bytes()
+            except OSError:
+                data = builder().getvalue()
+                try:
+                    TEMPLATE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+                    tmp.write_bytes(data)
+                    os.replace(tmp, path)
+                except OSError as e:
+                    print(f"[PLANTILLA] No se pudo guardar {path}: {e!r}")
+                else:
+                    _borrar_versiones_viejas(builder.__name__, path)
+            # Solo se conserva la versión vigente de cada builder
+            for k in [k for k, v in _bytes_por_version.items() if k.startswith(builder.__name__ + ":")]:
+                del _bytes_por_version[k]
+            _bytes_por_version[key] = data
+    return data, version
+
+
+def _borrar_versiones_viejas(nombre: str, vigente: Path) -> None:
+    """Quita del directorio los XLSX de otras versiones de este builder."""
+    for viejo in TEMPLATE_CACHE_DIR.glob(f"{nombre}_*.xlsx"):
+        if viejo != vigente and viejo.stem.rsplit("_", 1)[0] == nombre:
+            try:
+                viejo.unlink()
+            except OSError:
+                pass  # otro worker ya lo borró
+
+
+def template_response(request, builder, filename: str = DOWNLOAD_NAME) -> HttpResponse:
+    """Respuesta XLSX cacheada con ETag por versión; 304 si el cliente ya la tiene."""
+    data, version = get_template_bytes(builder)
+    etag = f'"{version}"'
+
+    resp = get_conditional_response(request, etag=etag)
+    if resp is None:
+        resp = HttpResponse(data, content_type=XLSX_CONTENT_TYPE)
+        resp["Content-Disposition"] = f'attachment; filename="{filename}"'
+    resp["ETag"] = etag
+    # private: la descarga requiere sesión
+    patch_cache_control(resp, private=True, max_age=TEMPLATE_MAX_AGE)
+    return resp
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# Antes de cargar settings: bajo ASGI DB_CONN_MAX_AGE vale 0 por defecto
+os.environ.setdefault('DJANGO_ASGI', '1')
 
 application = get_asgi_application()
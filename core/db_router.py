@@ -0,0 +1,116 @@
+# core/db_router.py — lecturas analíticas a una réplica de solo lectura
+#
+# Las vistas pesadas de lectura (reportes, export CSV, stats, listado
+# enriquecido) se marcan con @usar_replica o `with lectura_replica(request)`;
+# todo lo que lean dentro va al alias DB_REPLICA_ALIAS. El resto del tráfico
+# (CRUD, carga masiva, login) sigue en "default".
+#
+# Se cae a "default" cuando:
+#   - no hay réplica configurada (DB_REPLICA_URL vacío),
+#   - la réplica no responde (se reintenta tras REPLICA_REINTENTO segundos),
+#   - el usuario escribió hace menos de DB_REPLICA_RYW_SECONDS (read-your-writes:
+#     la réplica puede no tener todavía su propia carga masiva).
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+REPLICA_ALIAS = getattr(settings, "DB_REPLICA_ALIAS", "replica")
+RYW_SECONDS = getattr(settings, "DB_REPLICA_RYW_SECONDS", 5)
+RYW_CACHE = getattr(settings, "DB_REPLICA_RYW_CACHE", "default")
+REPLICA_REINTENTO = 30
+
+# Alias de lectura del contexto actual (None = lo que diga Django, o sea "default")
+_alias_lectura: ContextVar[str | None] = ContextVar("nuamx_alias_lectura", default=None)
+
+_caida_hasta = 0.0
+_caida_lock = threading.Lock()
+
+
+def replica_configurada() -> bool:
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def _replica_sana() -> bool:
+    global _caida_hasta
+    if time.monotonic() < _caida_hasta:
+        return False
+    try:
+        connections[REPLICA_ALIAS].ensure_connection()
+        return True
+    except Exception as e:
+        with _caida_lock:
+            _caida_hasta = time.monotonic() + REPLICA_REINTENTO
+        print(f"[DB] Réplica {REPLICA_ALIAS!r} no disponible ({e}); lecturas a 'default' por {REPLICA_REINTENTO}s")
+        return False
+
+
+# ====== Read-your-writes ======
+def _clave_ryw(user_id) -> str:
+    return f"ryw:{user_id}"
+
+
+def marcar_escritura(user) -> None:
+    """Registra que `user` acaba de escribir: sus lecturas van a 'default' un rato."""
+    if not (replica_configurada() and RYW_SECONDS > 0 and getattr(user, "is_authenticated", False)):
+        return
+    caches[RYW_CACHE].set(_clave_ryw(user.pk), time.time() + RYW_SECONDS, timeout=RYW_SECONDS)
+
+
+def escribio_hace_poco(user) -> bool:
+    if RYW_SECONDS <= 0 or not getattr(user, "is_authenticated", False):
+        return False
+    hasta = caches[RYW_CACHE].get(_clave_ryw(user.pk))
+    return bool(hasta and hasta > time.time())
+
+
+# ====== Hints por vista ======
+def alias_para(request) -> str:
+    """Alias donde deben leer las consultas analíticas de este request."""
+    user = getattr(request, "user", None)
+    if not replica_configurada() or escribio_hace_poco(user) or not _replica_sana():
+        return "default"
+    return REPLICA_ALIAS
+
+
+@contextmanager
+def lectura_replica(request):
+    """Las lecturas dentro del bloque van a la réplica (o a 'default', ver arriba)."""
+    token = _alias_lectura.set(alias_para(request))
+    try:
+        yield
+    finally:
+        _alias_lectura.reset(token)
+
+
+def usar_replica(metodo):
+    """Decorador para métodos de vistas (DRF/Django) de solo lectura."""
+    @functools.wraps(metodo)
+    def envoltura(self, request, *args, **kwargs):
+        with lectura_replica(request):
+            return metodo(self, request, *args, **kwargs)
+    return envoltura
+
+
+class ReplicaRouter:
+    """Router de Django: solo cambia las lecturas marcadas con lectura_replica()."""
+
+    def db_for_read(self, model, **hints):
+        return _alias_lectura.get()
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplica y primaria tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación, no por migrate
+        return db != REPLICA_ALIAS
@@ -0,0 +1,145 @@
+# core/lazy_imports.py — imports diferidos para dependencias pesadas u opcionales
+#
+# Uso:
+#   from core.lazy_imports import lazy_import
+#   kafka = lazy_import("kafka")                       # se importa al primer uso
+#   httpx = lazy_import("httpx", optional=True)        # None si no está instalado
+#   openpyxl = lazy_import("openpyxl", error="Servidor sin 'openpyxl'. Instálalo: pip install openpyxl")
+#
+# El módulo real se carga en el primer acceso a un atributo (kafka.KafkaProducer,
+# httpx.AsyncClient, ...). Un `except kafka.errors.NoBrokersAvailable:` no lo
+# carga: Python evalúa la expresión del except solo si hubo una excepción.
+# Las anotaciones que nombren el módulo deben ir entre comillas.
+#
+# Solo vale la pena para módulos que nada más importa al arrancar: `requests`
+# y `yaml`, por ejemplo, los importa rest_framework.compat de todas formas.
+# Ver `python manage.py perfil_arranque` para medir el efecto.
+
+import importlib
+import importlib.util
+import threading
+
+
+class LazyModule:
+    """Proxy de un módulo que se importa en el primer acceso a un atributo."""
+
+    __slots__ = ("_nombre", "_error", "_modulo", "_lock")
+
+    def __init__(self, nombre: str, error: str | None = None):
+        object.__setattr__(self, "_nombre", nombre)
+        object.__setattr__(self, "_error", error)
+        object.__setattr__(self, "_modulo", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _cargar(self):
+        modulo = self._modulo
+        if modulo is None:
+            with self._lock:
+                modulo = self._modulo
+                if modulo is None:
+                    try:
+                        modulo = importlib.import_module(self._nombre)
+                    except ImportError as e:
+                        if self._error:
+                            raise ImportError(self._error) from e
+                        raise
+                    object.__setattr__(self, "_modulo", modulo)
+        return modulo
+
+    def __getattr__(self, attr):
+        if attr in LazyModule.__slots__:
+            # Slot sin asignar (objeto a medio construir): no cargar el módulo para buscarlo
+            raise AttributeError(attr)
+        modulo = self._cargar()
+        try:
+            return getattr(modulo, attr)
+        except AttributeError:
+            if attr.startswith("__"):
+                raise  # sondeos de dunders (copy, pickle, inspect): nunca son submódulos
+        # Submódulo que el paquete no importa por sí solo (p.ej. openpyxl.worksheet.table)
+        submodulo = f"{self._nombre}.{attr}"
+        try:
+            return importlib.import_module(submodulo)
+        except ModuleNotFoundError as e:
+            if e.name != submodulo:
+                raise  # el submódulo existe pero le falta una dependencia
+            # Ni atributo ni submódulo: AttributeError, para que hasattr/getattr(..., default) funcionen
+            raise AttributeError(f"module {self._nombre!r} has no attribute {attr!r}") from None
+
+    def __setattr__(self, attr, value):
+        setattr(self._cargar(), attr, value)
+
+    # Como un módulo: copiar devuelve el mismo proxy y pickle lo recrea por nombre
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (LazyModule, (self._nombre, self._error))
+
+    def __repr__(self):
+        estado = "cargado" if self._modulo is not None else "sin cargar"
+        return f"<LazyModule {self._nombre!r} ({estado})>"
+
+
+def is_available(nombre: str) -> bool:
+    """True si el paquete está instalado, sin importarlo."""
+    try:
+        return importlib.util.find_spec(nombre.split(".", 1)[0]) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def is_loaded(modulo) -> bool:
+    """True si un LazyModule ya importó su módulo (o si `modulo` es un módulo normal)."""
+    if isinstance(modulo, LazyModule):
+        return modulo._modulo is not None
+    return modulo is not None
+
+
+def lazy_import(nombre: str, optional: bool = False, error: str | None = None):
+    """
+    Devuelve un LazyModule para `nombre`.
+    Con optional=True devuelve None si el paquete no está instalado
+    (equivalente al try/except ImportError → None del resto del repo).
+    """
+    if optional and not is_available(nombre):
+        return None
+    return LazyModule(nombre, error=error)
+
+
+# ====== Vistas diferidas para la URLconf ======
+def lazy_view(ruta: str, csrf_exempt: bool = False, **initkwargs):
+    """
+    Vista para `path()` que importa "paquete.modulo.Nombre" en su primer request.
+
+    Sirve para que cargar la URLconf no importe todos los módulos de vistas:
+    un worker que solo atiende el login nunca carga la carga masiva ni los
+    reportes. Acepta clases con `as_view()` (Django/DRF) o funciones-vista.
+    Con csrf_exempt=True la envoltura se marca exenta desde el arranque
+    (CsrfViewMiddleware mira el atributo ANTES de llamar a la vista; las
+    vistas de DRF ya son exentas y hacen su propio chequeo de sesión).
+    """
+    modulo, _, nombre = ruta.rpartition(".")
+    cargada = None
+    lock = threading.Lock()
+
+    def _resolver():
+        nonlocal cargada
+        if cargada is None:
+            with lock:
+                if cargada is None:
+                    destino = getattr(importlib.import_module(modulo), nombre)
+                    cargada = destino.as_view(**initkwargs) if hasattr(destino, "as_view") else destino
+        return cargada
+
+    def vista(request, *args, **kwargs):
+        return _resolver()(request, *args, **kwargs)
+
+    vista.__name__ = vista.__qualname__ = nombre
+    vista.__module__ = modulo
+    vista.lazy_target = ruta
+    vista.csrf_exempt = csrf_exempt
+    return vista
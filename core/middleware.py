@@ -1,12 +1,27 @@
+import re
+
+from django.conf import settings
 from django.shortcuts import redirect
+from django.utils.cache import patch_vary_headers
 from django.utils.deprecation import MiddlewareMixin
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.utils.text import compress_string
+from api.authentication import resolver_usuario_jwt
+from core.db_router import marcar_escritura, replica_configurada
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 
 class LoginRequiredMiddleware(MiddlewareMixin):
     """
     Middleware que protege todas las rutas excepto login, registro,
     endpoints JWT y archivos estáticos.
+
+    El usuario del token se resuelve con resolver_usuario_jwt: una vez por
+    request (las vistas DRF reutilizan el resultado) y, entre requests, desde
+    un cache corto por jti que respeta la expiración del token.
     """
 
     PUBLIC_PREFIXES = (
@@ -25,21 +40,109 @@ class LoginRequiredMiddleware(MiddlewareMixin):
         if path in self.PUBLIC_EXACT or path.startswith(self.PUBLIC_PREFIXES):
             return None
 
-        # Admin de Django
-        if path.startswith("/admin/"):
+        # Admin de Django (montado en /dj-admin/, usa su propia sesión)
+        if path.startswith(("/admin/", "/dj-admin/")):
             return None
 
-        # Intentar JWT en cookie (si lo usas)
+        # Intentar JWT en cookie (si lo usas) o en Authorization: Bearer
         token = request.COOKIES.get("access")
+        if not token:
+            header = request.META.get("HTTP_AUTHORIZATION", "")
+            if header.startswith("Bearer "):
+                token = header[len("Bearer "):].strip()
         if token:
-            auth = JWTAuthentication()
             try:
-                validated = auth.get_validated_token(token)
-                user = auth.get_user(validated)
+                user, _ = resolver_usuario_jwt(request, token)
                 request.user = user
                 return None
             except Exception:
                 pass
 
+        # API: DRF responde 401/403 en JSON según los permisos de cada vista
+        if path.startswith("/api/"):
+            return None
+
         # No autenticado → login
         return redirect("/login")
+
+
+class ReadYourWritesMiddleware(MiddlewareMixin):
+    """
+    Marca al usuario que acaba de escribir (método no seguro con respuesta
+    2xx/3xx) para que sus lecturas analíticas no vayan a la réplica durante
+    DB_REPLICA_RYW_SECONDS. Sin réplica configurada no hace nada.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+    def process_response(self, request, response):
+        if request.method not in self.SAFE_METHODS and response.status_code < 400 and replica_configurada():
+            # DRF deja en request.user el usuario que autenticó la vista
+            marcar_escritura(getattr(request, "user", None))
+        return response
+
+
+
+class CompresionMiddleware(MiddlewareMixin):
+    """
+    Comprime las respuestas JSON y CSV de GET/HEAD desde COMPRESION_MIN_BYTES:
+    brotli si está instalado y el cliente lo acepta, si no gzip. Es como
+    GZipMiddleware de Django, pero solo para esos tipos (HTML, XLSX e imágenes
+    quedan igual) y solo en lecturas: las respuestas de login o refresh, que
+    reflejan datos del usuario junto a tokens, no se comprimen (BREACH).
+    """
+
+    TIPOS = ("application/json", "text/csv")
+    MIN_BYTES = getattr(settings, "COMPRESION_MIN_BYTES", 1024)
+    BROTLI_CALIDAD = getattr(settings, "COMPRESION_BROTLI_CALIDAD", 5)
+    # gzip agrega hasta 100 bytes al azar en el encabezado, igual que GZipMiddleware (BREACH)
+    MAX_RANDOM_BYTES = 100
+
+    _CODIFICACION = re.compile(r"^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([\d.]+))?\s*$")
+
+    @classmethod
+    def _aceptadas(cls, accept_encoding: str) -> set[str]:
+        """Codificaciones de Accept-Encoding con q > 0."""
+        aceptadas = set()
+        for parte in accept_encoding.lower().split(","):
+            m = cls._CODIFICACION.match(parte)
+            if not m:
+                continue
+            try:
+                q = float(m.group(2)) if m.group(2) else 1.0
+            except ValueError:
+                continue
+            if q > 0:
+                aceptadas.add(m.group(1))
+        return aceptadas
+
+    def process_response(self, request, response):
+        if (
+            request.method not in ("GET", "HEAD")
+            or response.streaming
+            or response.has_header("Content-Encoding")
+            or response.get("Content-Type", "").split(";")[0].strip().lower() not in self.TIPOS
+            or len(response.content) < self.MIN_BYTES
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        aceptadas = self._aceptadas(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if brotli and "br" in aceptadas:
+            codificacion, comprimido = "br", brotli.compress(response.content, quality=self.BROTLI_CALIDAD)
+        elif "gzip" in aceptadas:
+            codificacion = "gzip"
+            comprimido = compress_string(response.content, max_random_bytes=self.MAX_RANDOM_BYTES)
+        else:
+            return response
+        if len(comprimido) >= len(response.content):
+            return response
+
+        response.content = comprimido
+        response.headers["Content-Length"] = str(len(comprimido))
+        response.headers["Content-Encoding"] = codificacion
+        # El ETag describe el contenido sin comprimir: como GZipMiddleware, pasa a débil
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        return response
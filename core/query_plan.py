@@ -0,0 +1,81 @@
+# core/query_plan.py — plan de ejecución de un queryset (SQLite y PostgreSQL)
+#
+# SQLite: EXPLAIN QUERY PLAN. Cada tabla aparece como
+#   SEARCH t USING INDEX i (col=?)   → busca por índice (bien)
+#   SCAN t USING [COVERING] INDEX i  → recorre el índice entero (sirve para ORDER BY)
+#   SCAN t                           → recorre la tabla entera
+#   USE TEMP B-TREE FOR ORDER BY     → ordena en memoria
+# PostgreSQL: EXPLAIN. "Seq Scan on t" es el recorrido completo. Con pocas filas
+# el planner lo prefiere aunque haya índice; sin_seq_scan() lo penaliza para
+# saber si existe un índice utilizable.
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.db import connections, transaction
+
+
+@dataclass
+class Plan:
+    lineas: list[str]
+    vendor: str
+    tabla: str
+    scan_completo: bool = False    # la tabla se lee entera, sin índice
+    busca_por_indice: bool = False  # al menos una condición resuelta con índice (o índice parcial)
+    ordena_en_memoria: bool = False
+    indices: list[str] = field(default_factory=list)
+
+    def __str__(self):
+        return "\n".join(self.lineas)
+
+
+_INDICE_SQLITE = re.compile(r"USING (?:COVERING )?INDEX (\S+)")
+_INDICE_PG = re.compile(r"(?:Index|Index Only|Bitmap Index) Scan (?:Backward )?(?:using|on) (\S+)")
+
+
+def indices_parciales(modelo) -> set[str]:
+    """Nombres de los índices con condición: recorrerlos entero ya es filtrar."""
+    return {idx.name for idx in modelo._meta.indexes if idx.condition is not None}
+
+
+def analizar(qs, tabla: str | None = None) -> Plan:
+    """EXPLAIN del queryset `qs` y clasificación de cómo lee `tabla` (por defecto, la de su modelo)."""
+    tabla = tabla or qs.model._meta.db_table
+    vendor = connections[qs.db].vendor
+    lineas = qs.explain().splitlines()
+    plan = Plan(lineas=lineas, vendor=vendor, tabla=tabla)
+    parciales = indices_parciales(qs.model)
+    for linea in lineas:
+        if vendor == "sqlite":
+            texto = linea.split(maxsplit=3)[-1] if linea[:1].isdigit() else linea
+            if texto.startswith(f"SCAN {tabla}") and "INDEX" not in texto:
+                plan.scan_completo = True
+            if texto.startswith(f"SEARCH {tabla}"):  # por índice o por PRIMARY KEY
+                plan.busca_por_indice = True
+            if "USE TEMP B-TREE FOR ORDER BY" in texto:
+                plan.ordena_en_memoria = True
+            plan.indices += _INDICE_SQLITE.findall(texto)
+        else:
+            if f"Seq Scan on {tabla}" in linea:
+                plan.scan_completo = True
+            if "Index Cond" in linea or "Recheck Cond" in linea:
+                plan.busca_por_indice = True
+            if re.search(r"\bSort\b", linea) and "Sort Key" not in linea and "Sort Method" not in linea:
+                plan.ordena_en_memoria = True
+            plan.indices += _INDICE_PG.findall(linea)
+    plan.indices = sorted(set(plan.indices))
+    if parciales & set(plan.indices):
+        plan.busca_por_indice = True
+    return plan
+
+
+@contextmanager
+def sin_seq_scan(using: str = "default"):
+    """En PostgreSQL, penaliza el Seq Scan dentro del bloque (no-op en SQLite)."""
+    if connections[using].vendor != "postgresql":
+        yield
+        return
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cur:
+            cur.execute("SET LOCAL enable_seqscan = off")
+        yield
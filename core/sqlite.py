@@ -0,0 +1,44 @@
+# core/sqlite.py — PRAGMAs de SQLite en cada conexión nueva
+#
+# Django abre SQLite con journal DELETE y synchronous FULL: cada escritura
+# bloquea la BD entera (los lectores esperan) y hace fsync en cada commit.
+# Con WAL los lectores leen la última versión confirmada mientras un writer
+# escribe, y synchronous=NORMAL solo hace fsync en los checkpoints.
+#
+# Los valores vienen de settings.SQLITE_PRAGMAS (o de la clave SQLITE_PRAGMAS
+# de cada alias en DATABASES). Con CONN_MAX_AGE > 0 esto corre una vez por
+# conexión persistente, no por request.
+
+import re
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Orden en que se aplican: journal_mode primero (cambia cómo se escribe el resto)
+PRAGMAS_SOPORTADOS = ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store")
+_VALOR_VALIDO = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+
+def pragmas_para(settings_dict) -> dict:
+    """PRAGMAs que corresponden a un alias (su propia clave o la global)."""
+    pragmas = settings_dict.get("SQLITE_PRAGMAS")
+    if pragmas is None:
+        pragmas = getattr(settings, "SQLITE_PRAGMAS", {})
+    return {k: pragmas[k] for k in PRAGMAS_SOPORTADOS if pragmas.get(k) not in (None, "")}
+
+
+@receiver(connection_created, dispatch_uid="core.sqlite.aplicar_pragmas")
+def aplicar_pragmas(sender, connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    # Directo sobre la conexión sqlite3: sin pasar por el log de queries de Django
+    conn = connection.connection
+    for nombre, valor in pragmas_para(connection.settings_dict).items():
+        if not _VALOR_VALIDO.match(str(valor)):
+            print(f"[SQLITE] PRAGMA {nombre} ignorado: valor inválido {valor!r}")
+            continue
+        fila = conn.execute(f"PRAGMA {nombre} = {valor}").fetchone()
+        # journal_mode devuelve el modo efectivo; una BD en memoria se queda en "memory"
+        if nombre == "journal_mode" and fila and str(fila[0]).lower() not in (str(valor).lower(), "memory"):
+            print(f"[SQLITE] journal_mode={valor} no aplicó en {connection.alias!r} (quedó {fila[0]!r})")
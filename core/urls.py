@@ -3,16 +3,17 @@ from django.urls import path, include
 from django.shortcuts import render
 import requests
 
-def vista_indicadores_economicos(request):
+from web.microservicios_client import aobtener_indicadores
+
+async def vista_indicadores_economicos(request):
     try:
-        # Llamamos al microservicio
-        respuesta = requests.get('http://127.0.0.1:5000/indicadores')
-        datos = respuesta.json()
+        # Llamamos al microservicio (copia cacheada + revalidación con ETag), sin bloquear el worker
+        datos = await aobtener_indicadores()
         
         # OJO AQUÍ: Agregamos 'web/' antes del nombre del archivo
         return render(request, 'web/panel_tributario.html', {'info': datos})
         
-    except requests.exceptions.ConnectionError:
+    except (requests.exceptions.RequestException, ValueError):
         return render(request, 'web/panel_tributario.html', {
             'error': 'No se pudo conectar con el Servicio de Indicadores.'
         })
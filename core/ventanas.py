@@ -0,0 +1,60 @@
+# core/ventanas.py — ventanas de días locales como rangos UTC semiabiertos
+#
+# Filtrar con `created_at__date` envuelve la columna en una función (conversión
+# de zona horaria + DATE): ningún índice sirve y se evalúa fila por fila. Un
+# día en America/Santiago (TIME_ZONE) es en cambio un rango de instantes:
+#
+#     created_at >= inicio_utc AND created_at < fin_utc
+#
+# que usa el índice de created_at. Los límites se calculan en Python una vez
+# por request. Semiabierto ([inicio, fin)) para que días consecutivos no se
+# solapen ni dejen huecos, sin depender de la precisión de los microsegundos.
+#
+# Cambios de hora: en Chile el cambio es a medianoche, así que la "medianoche"
+# de ese día no existe (o se repite). zoneinfo con fold=0 toma el offset previo,
+# que cae justo en el primer instante real del día.
+import datetime
+
+from django.utils import timezone
+
+UTC = datetime.timezone.utc
+
+
+def zona():
+    return timezone.get_current_timezone()
+
+
+def hoy_local() -> datetime.date:
+    return timezone.localdate()
+
+
+def inicio_dia(dia: datetime.date) -> datetime.datetime:
+    """Primer instante (en UTC) del día `dia` en la zona local."""
+    return datetime.datetime.combine(dia, datetime.time.min, tzinfo=zona()).astimezone(UTC)
+
+
+def ventana_dias(desde: datetime.date, hasta: datetime.date) -> tuple[datetime.datetime, datetime.datetime]:
+    """Días locales desde..hasta (ambos incluidos) como [inicio, fin) en UTC."""
+    return inicio_dia(desde), inicio_dia(hasta + datetime.timedelta(days=1))
+
+
+def limites_dias(desde: datetime.date, dias: int) -> list[datetime.datetime]:
+    """dias+1 límites UTC: el día i es [limites[i], limites[i+1])."""
+    return [inicio_dia(desde + datetime.timedelta(days=i)) for i in range(dias + 1)]
+
+
+def ventana_periodo(alcance: str, hoy: datetime.date | None = None) -> tuple[datetime.datetime, datetime.datetime]:
+    """'diario' (hoy), 'semanal' (desde el lunes) o 'mensual' (desde el día 1), hasta el fin de hoy."""
+    hoy = hoy or hoy_local()
+    if alcance == "diario":
+        desde = hoy
+    elif alcance == "semanal":
+        desde = hoy - datetime.timedelta(days=hoy.weekday())
+    else:
+        desde = hoy.replace(day=1)
+    return ventana_dias(desde, hoy)
+
+
+def filtro_ventana(campo: str, inicio: datetime.datetime, fin: datetime.datetime) -> dict:
+    """kwargs de filter() para el rango semiabierto sobre `campo`."""
+    return {f"{campo}__gte": inicio, f"{campo}__lt": fin}
@@ -0,0 +1,34 @@
+# gunicorn_asgi.py — perfil de despliegue ASGI para Django (core.asgi:application)
+#
+# Uso (Linux/macOS):
+#   gunicorn core.asgi:application -c gunicorn_asgi.py
+#
+# Cada worker es un proceso con un event loop (uvicorn). Las vistas async que
+# dependen de microservicios (auditoria_view, panel_tributario_view,
+# vista_indicadores_economicos) esperan la red sin ocupar hilos, así que un
+# worker atiende cientos de páginas concurrentes aunque los upstreams estén lentos.
+# Las vistas sync (DRF, páginas estáticas) corren en el pool de hilos de asgiref.
+#
+# Variables de entorno:
+#   DJANGO_BIND            (default 127.0.0.1:8000)
+#   DJANGO_WORKERS         (default 2 x CPU, máx 8)
+#   DJANGO_TIMEOUT         (default 60)  → worker sin responder se reinicia
+#   DJANGO_GRACEFUL        (default 30)  → tiempo para terminar requests al apagar
+#   DJANGO_MAX_REQUESTS    (default 0 = sin reciclaje de workers)
+
+import multiprocessing
+import os
+
+bind = os.getenv("DJANGO_BIND", "127.0.0.1:8000")
+workers = int(os.getenv("DJANGO_WORKERS") or min(8, multiprocessing.cpu_count() * 2))
+worker_class = "uvicorn_worker.UvicornWorker"
+timeout = int(os.getenv("DJANGO_TIMEOUT") or 60)
+graceful_timeout = int(os.getenv("DJANGO_GRACEFUL") or 30)
+keepalive = 5
+max_requests = int(os.getenv("DJANGO_MAX_REQUESTS") or 0)
+max_requests_jitter = max_requests // 10 if max_requests else 0
+
+accesslog = "-"
+errorlog = "-"
+
+raw_env = ["DJANGO_SETTINGS_MODULE=core.settings"]
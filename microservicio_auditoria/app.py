@@ -1,11 +1,116 @@
-from flask import Flask, request, jsonify
+import importlib.util
+import json
+import os
+import sys
+import threading
+from bisect import bisect_left
 from datetime import datetime
 
+from flask import Flask, Response, request, jsonify, stream_with_context
+
 app = Flask(__name__)
 
 # "Base de datos" en memoria solo para la demo
 eventos_auditoria = []
 
+# Índices en memoria sobre eventos_auditoria (guardan posiciones en la lista).
+# Como la lista solo crece y cada evento se sella con la hora del servidor,
+# las posiciones quedan ordenadas por id y por fecha: eso permite bisect.
+_indice_usuario = {}
+_indice_accion = {}
+_marcas_tiempo = []
+
+# Protege la lista y los índices cuando el servidor atiende con varios hilos
+_lock = threading.Lock()
+
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 500
+LOTE_MAXIMO = 1000
+
+
+def _normalizar_evento(data: dict) -> dict:
+    evento = {
+        "usuario": data.get("usuario") or "desconocido",
+        "accion": data.get("accion") or "ACCION_NO_ESPECIFICADA",
+        "detalle": data.get("detalle") or "",
+    }
+    # Los clientes con buffer informan cuándo ocurrió realmente el evento
+    if data.get("ocurrido_en"):
+        evento["ocurrido_en"] = str(data["ocurrido_en"])
+    return evento
+
+
+def _agregar_eventos(lote: list) -> list:
+    """
+    Normaliza y guarda un lote de eventos actualizando los índices
+    bajo un único lock. Devuelve los eventos tal como quedaron almacenados.
+    """
+    eventos = [_normalizar_evento(d) for d in lote if isinstance(d, dict)]
+
+    with _lock:
+        ahora = datetime.utcnow().isoformat() + "Z"
+        for evento in eventos:
+            pos = len(eventos_auditoria)
+            evento["id"] = pos + 1
+            evento["registrado_en"] = ahora
+
+            eventos_auditoria.append(evento)
+            _marcas_tiempo.append(ahora)
+            _indice_usuario.setdefault(evento["usuario"], []).append(pos)
+            _indice_accion.setdefault(evento["accion"], []).append(pos)
+
+    return eventos
+
+
+def _agregar_evento(data: dict) -> dict:
+    return _agregar_eventos([data])[0]
+
+
+def _posiciones_filtradas(usuario=None, accion=None, desde=None, hasta=None, cursor=None):
+    """
+    Devuelve las posiciones (ascendentes) que cumplen los filtros.
+
+    - usuario / accion: se resuelven con los índices; si vienen ambos se parte
+      del índice más chico y se filtra por el otro campo.
+    - desde (inclusive) / hasta (exclusivo): ISO 8601, se comparan como texto
+      contra `registrado_en` usando búsqueda binaria.
+    - cursor: id del último evento de la página anterior; solo se devuelven
+      eventos más antiguos.
+    """
+    with _lock:
+        total = len(eventos_auditoria)
+        if usuario is not None and accion is not None:
+            a = _indice_usuario.get(usuario, [])
+            b = _indice_accion.get(accion, [])
+            base, campo, valor = (a, "accion", accion) if len(a) <= len(b) else (b, "usuario", usuario)
+            posiciones = [p for p in base if eventos_auditoria[p][campo] == valor]
+        elif usuario is not None:
+            posiciones = list(_indice_usuario.get(usuario, []))
+        elif accion is not None:
+            posiciones = list(_indice_accion.get(accion, []))
+        else:
+            posiciones = range(total)
+
+    lo, hi = 0, len(posiciones)
+    if desde:
+        lo = bisect_left(posiciones, desde, key=lambda p: _marcas_tiempo[p])
+    if hasta:
+        hi = bisect_left(posiciones, hasta, lo=lo, key=lambda p: _marcas_tiempo[p])
+    if cursor is not None:
+        # id = posición + 1, así que "id < cursor" equivale a "posición < cursor - 1"
+        hi = min(hi, bisect_left(posiciones, cursor - 1, lo=lo))
+    return posiciones[lo:hi]
+
+
+def _int_param(nombre, defecto=None):
+    valor = (request.args.get(nombre) or "").strip()
+    if not valor:
+        return defecto
+    try:
+        return int(valor)
+    except ValueError:
+        return defecto
+
 
 # ============================================================
 # POST → Registrar un evento de auditoría
@@ -23,45 +128,202 @@ def registrar_evento():
     """
     data = request.get_json() or {}
 
-    usuario = data.get("usuario", "desconocido")
-    accion = data.get("accion", "ACCION_NO_ESPECIFICADA")
-    detalle = data.get("detalle", "")
+    evento = _agregar_evento(data)
 
-    evento = {
-        "usuario": usuario,
-        "accion": accion,
-        "detalle": detalle,
-        "registrado_en": datetime.utcnow().isoformat() + "Z",
-    }
+    return jsonify({
+        "status": "REGISTRADO",
+        "evento": evento,
+        "total_eventos_registrados": len(eventos_auditoria),
+    }), 201
 
-    # Guardamos en memoria (lista)
-    eventos_auditoria.append(evento)
+
+# ============================================================
+# POST → Registrar varios eventos en una sola llamada
+# ============================================================
+@app.route("/auditoria/eventos/batch", methods=["POST"])
+def registrar_eventos_batch():
+    """
+    Registra un lote de eventos. Acepta {"eventos": [...]} o directamente una lista,
+    con el mismo formato que /auditoria/evento. Máximo LOTE_MAXIMO por llamada.
+    """
+    data = request.get_json(silent=True)
+    lote = data.get("eventos") if isinstance(data, dict) else data
+    if not isinstance(lote, list):
+        return jsonify({"status": "ERROR", "detalle": "Se esperaba una lista de eventos."}), 400
+    if len(lote) > LOTE_MAXIMO:
+        return jsonify({"status": "ERROR", "detalle": f"Máximo {LOTE_MAXIMO} eventos por lote."}), 413
+
+    registrados = _agregar_eventos(lote)
 
     return jsonify({
         "status": "REGISTRADO",
-        "evento": evento,
+        "registrados": len(registrados),
         "total_eventos_registrados": len(eventos_auditoria),
     }), 201
 
 
 # ============================================================
-# GET → Listar todos los eventos registrados
+# GET → Consultar eventos (filtros + paginación + export NDJSON)
 # ============================================================
 @app.route("/auditoria/eventos", methods=["GET"])
 def listar_eventos():
     """
-    Devuelve todos los eventos registrados por el microservicio.
-    Este endpoint es el que consulta Django.
+    Devuelve eventos del más reciente al más antiguo. Este endpoint es el que consulta Django.
+
+    Parámetros (todos opcionales):
+      - usuario, accion: coincidencia exacta
+      - desde, hasta: ISO 8601 (desde inclusive, hasta exclusivo)
+      - cursor: `siguiente_cursor` de la página anterior
+      - limit: tamaño de página (default 50, máx 500)
+      - formato=ndjson: exporta TODOS los eventos filtrados, uno por línea, en streaming
     """
+    posiciones = _posiciones_filtradas(
+        usuario=request.args.get("usuario") or None,
+        accion=request.args.get("accion") or None,
+        desde=(request.args.get("desde") or "").strip() or None,
+        hasta=(request.args.get("hasta") or "").strip() or None,
+        cursor=_int_param("cursor"),
+    )
+
+    if (request.args.get("formato") or "").lower() == "ndjson":
+        def generar():
+            for p in reversed(posiciones):
+                yield json.dumps(eventos_auditoria[p], ensure_ascii=False) + "\n"
+
+        return Response(stream_with_context(generar()), mimetype="application/x-ndjson")
+
+    limit = max(1, min(_int_param("limit", LIMITE_POR_DEFECTO), LIMITE_MAXIMO))
+    pagina = [eventos_auditoria[p] for p in reversed(posiciones[-limit:])]
+    hay_mas = len(posiciones) > limit
+
     return jsonify({
         "total": len(eventos_auditoria),
-        "eventos": eventos_auditoria,
+        "coincidencias": len(posiciones),
+        "eventos": pagina,
+        "siguiente_cursor": pagina[-1]["id"] if hay_mas and pagina else None,
+    })
+
+
+# ============================================================
+# GET → Salud / disponibilidad
+# ============================================================
+@app.route("/health", methods=["GET"])
+def health():
+    """
+    Liveness: el proceso está vivo y responde.
+    """
+    return jsonify({
+        "status": "ok",
+        "service": "microservicio_auditoria"
+    })
+
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """
+    Readiness: 503 mientras el launcher (servir_microservicio.py) drena
+    conexiones antes de apagarse, para que el balanceador deje de enviar tráfico.
+    """
+    if app.config.get("DRAINING"):
+        return jsonify({"status": "draining", "service": "microservicio_auditoria"}), 503
+    return jsonify({
+        "status": "ready",
+        "service": "microservicio_auditoria",
+        "total_eventos_registrados": len(eventos_auditoria)
     })
 
 
+# ============================================================
+# Modo consumer → ingesta por lotes desde Kafka
+# ============================================================
+KAFKA_BOOTSTRAP_SERVERS = (os.getenv("KAFKA_BOOTSTRAP_SERVERS") or "localhost:9092").strip()
+KAFKA_TOPIC_AUDITORIA = (os.getenv("KAFKA_TOPIC_AUDITORIA") or "auditoria_eventos").strip()
+KAFKA_GROUP_ID = (os.getenv("KAFKA_GROUP_ID_AUDITORIA") or "nuamx-auditoria").strip()
+
+
+KAFKA_BACKOFF_MAX_SECONDS = float(os.getenv("KAFKA_BACKOFF_MAX_SECONDS") or "30")
+
+
+def _crear_consumer():
+    from kafka import KafkaConsumer
+
+    return KafkaConsumer(
+        KAFKA_TOPIC_AUDITORIA,
+        bootstrap_servers=KAFKA_BOOTSTRAP_SERVERS.split(","),
+        group_id=KAFKA_GROUP_ID,
+        auto_offset_reset="earliest",
+        enable_auto_commit=False,
+    )
+
+
+def _cerrar_consumer(consumer) -> None:
+    try:
+        consumer.close()
+    except Exception:
+        pass
+
+
+def consumir_kafka(detener: threading.Event | None = None, max_registros: int = 500) -> None:
+    """
+    Lee eventos del topic de auditoría y los guarda por lotes de hasta
+    `max_registros`. El offset se confirma después de guardar cada lote.
+    Si Kafka no está disponible o un lote falla, lo informa, espera (backoff
+    exponencial hasta KAFKA_BACKOFF_MAX_SECONDS) y vuelve a crear el consumer:
+    retoma desde el último offset confirmado, sin afectar la API HTTP.
+    """
+    if importlib.util.find_spec("kafka") is None:
+        print("[KAFKA] kafka-python no está instalado; modo consumer deshabilitado.")
+        return
+
+    detener = detener or threading.Event()
+    consumer = None
+    espera = 1.0
+    while not detener.is_set():
+        try:
+            if consumer is None:
+                consumer = _crear_consumer()
+                print(f"[KAFKA] Consumer de auditoría escuchando '{KAFKA_TOPIC_AUDITORIA}'...")
+            registros = consumer.poll(timeout_ms=1000, max_records=max_registros)
+            if not registros:
+                continue
+            lote = []
+            for mensajes in registros.values():
+                for msg in mensajes:
+                    try:
+                        lote.append(json.loads(msg.value.decode("utf-8")))
+                    except Exception:
+                        print(f"[KAFKA] Mensaje de auditoría inválido descartado: {msg.value!r}")
+            _agregar_eventos(lote)
+            consumer.commit()
+            espera = 1.0
+        except Exception as e:
+            print(f"[KAFKA] Error en el consumer de auditoría: {e!r}; reintento en {espera:.0f}s")
+            if consumer is not None:
+                _cerrar_consumer(consumer)
+                consumer = None
+            detener.wait(espera)
+            espera = min(espera * 2, KAFKA_BACKOFF_MAX_SECONDS)
+
+    if consumer is not None:
+        _cerrar_consumer(consumer)
+    print("[KAFKA] Consumer de auditoría cerrado.")
+
+
+def iniciar_consumer_kafka() -> threading.Thread:
+    hilo = threading.Thread(target=consumir_kafka, name="auditoria-kafka", daemon=True)
+    hilo.start()
+    return hilo
+
+
 # ============================================================
 # MAIN → Ejecutar microservicio
 # ============================================================
 if __name__ == "__main__":
+    # --kafka (o AUDITORIA_KAFKA=1) agrega la ingesta desde Kafka junto a la API HTTP
+    modo_kafka = "--kafka" in sys.argv or (os.getenv("AUDITORIA_KAFKA") or "").strip() == "1"
+    if modo_kafka:
+        iniciar_consumer_kafka()
+
     # Puerto 5001 → NO choca con otros microservicios
-    app.run(host="127.0.0.1", port=5001, debug=True)
+    # (en modo Kafka sin reloader: duplicaría el hilo consumer)
+    app.run(host="127.0.0.1", port=5001, debug=True, use_reloader=not modo_kafka)
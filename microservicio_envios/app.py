@@ -1,14 +1,25 @@
-from flask import Flask, jsonify
+import os
+from flask import Flask, jsonify, request
 from datetime import datetime
 
 app = Flask(__name__)
 
+# Los indicadores cambian a lo más una vez al día: los clientes pueden
+# reutilizar la respuesta durante este tiempo y luego revalidar con ETag.
+CACHE_MAX_AGE = int(os.getenv("INDICADORES_CACHE_MAX_AGE") or "300")
+
+
 @app.route('/indicadores', methods=['GET'])
 def obtener_indicadores():
-    return jsonify({
+    """
+    Indicadores del día. Responde con ETag/Last-Modified/Cache-Control y
+    devuelve 304 sin cuerpo si el cliente ya tiene la versión vigente.
+    """
+    hoy = datetime.now().astimezone()
+    resp = jsonify({
         # El HTML espera 'origen' y 'fecha'
         "origen": "Banco Central Simulado",
-        "fecha": datetime.now().strftime("%d-%m-%Y"),
+        "fecha": hoy.strftime("%d-%m-%Y"),
         
         # IMPORTANTE: El HTML espera los números dentro de "valores"
         "valores": {
@@ -19,6 +30,37 @@ def obtener_indicadores():
         },
         "estado": "online"
     })
+    resp.last_modified = hoy.replace(hour=0, minute=0, second=0, microsecond=0)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = CACHE_MAX_AGE
+    resp.add_etag()
+    return resp.make_conditional(request)
+
+
+@app.route("/health", methods=["GET"])
+def health():
+    """
+    Liveness: el proceso está vivo y responde.
+    """
+    return jsonify({
+        "status": "ok",
+        "service": "microservicio_envios"
+    })
+
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """
+    Readiness: 503 mientras el launcher (servir_microservicio.py) drena
+    conexiones antes de apagarse, para que el balanceador deje de enviar tráfico.
+    """
+    if app.config.get("DRAINING"):
+        return jsonify({"status": "draining", "service": "microservicio_envios"}), 503
+    return jsonify({
+        "status": "ready",
+        "service": "microservicio_envios"
+    })
+
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
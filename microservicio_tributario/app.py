@@ -1,7 +1,15 @@
-from flask import Flask, jsonify
+import os
+from datetime import datetime, timezone
+
+from flask import Flask, jsonify, request
 
 app = Flask(__name__)
 
+# Los parámetros son fijos mientras el proceso vive: se publican con ETag y
+# Last-Modified = hora de carga, y los clientes pueden reutilizarlos este tiempo.
+CACHE_MAX_AGE = int(os.getenv("TRIBUTARIO_CACHE_MAX_AGE") or "3600")
+PARAMETROS_CARGADOS_EN = datetime.now(timezone.utc).replace(microsecond=0)
+
 # Parámetros tributarios simulados (solo demo)
 PARAMETROS_TRIBUTARIOS = {
     "iva": 19.0,
@@ -16,8 +24,14 @@ PARAMETROS_TRIBUTARIOS = {
 def obtener_parametros():
     """
     Devuelve los parámetros tributarios que usará el Panel Tributario de NUAMX.
+    Responde 304 sin cuerpo si el If-None-Match del cliente sigue vigente.
     """
-    return jsonify(PARAMETROS_TRIBUTARIOS)
+    resp = jsonify(PARAMETROS_TRIBUTARIOS)
+    resp.last_modified = PARAMETROS_CARGADOS_EN
+    resp.cache_control.public = True
+    resp.cache_control.max_age = CACHE_MAX_AGE
+    resp.add_etag()
+    return resp.make_conditional(request)
 
 
 @app.route("/health", methods=["GET"])
@@ -31,6 +45,20 @@ def health():
     })
 
 
+@app.route("/ready", methods=["GET"])
+def ready():
+    """
+    Readiness: 503 mientras el launcher (servir_microservicio.py) drena
+    conexiones antes de apagarse, para que el balanceador deje de enviar tráfico.
+    """
+    if app.config.get("DRAINING"):
+        return jsonify({"status": "draining", "service": "microservicio_tributario"}), 503
+    return jsonify({
+        "status": "ready",
+        "service": "microservicio_tributario"
+    })
+
+
 if __name__ == "__main__":
     # Puerto 5002 para no chocar con 5000 (indicadores) ni 5001 (auditoría)
     app.run(host="127.0.0.1", port=5002, debug=True)
@@ -0,0 +1,101 @@
+# probar_carga_microservicios.py — prueba de carga simple (requests/seg) contra los microservicios
+#
+# Uso:
+#   python probar_carga_microservicios.py                      # los tres, 10 s, 16 clientes
+#   python probar_carga_microservicios.py tributario -d 30 -c 64
+#
+# Cada cliente es un hilo con su propia sesión keep-alive. Compara por ejemplo
+# `python microservicio_tributario/app.py` (servidor de desarrollo) contra
+# `python servir_microservicio.py tributario --workers 4 --threads 8`.
+
+import argparse
+import statistics
+import threading
+import time
+
+import requests
+
+OBJETIVOS = {
+    "envios": ("GET", "http://127.0.0.1:5000/indicadores", None),
+    "auditoria": ("GET", "http://127.0.0.1:5001/auditoria/eventos?limit=50", None),
+    "auditoria-post": (
+        "POST",
+        "http://127.0.0.1:5001/auditoria/evento",
+        {"usuario": "carga@nuamx.cl", "accion": "PRUEBA_CARGA", "detalle": "probar_carga_microservicios.py"},
+    ),
+    "tributario": ("GET", "http://127.0.0.1:5002/tributario/parametros", None),
+}
+POR_DEFECTO = ("envios", "auditoria", "tributario")
+
+
+def _percentil(valores, p):
+    if not valores:
+        return 0.0
+    valores = sorted(valores)
+    k = min(len(valores) - 1, int(round(p / 100.0 * (len(valores) - 1))))
+    return valores[k]
+
+
+def medir(nombre: str, duracion: float, concurrencia: int) -> dict:
+    metodo, url, cuerpo = OBJETIVOS[nombre]
+    latencias = []
+    errores = [0]
+    lock = threading.Lock()
+    fin = time.perf_counter() + duracion
+
+    def cliente():
+        s = requests.Session()
+        propias, fallas = [], 0
+        while time.perf_counter() < fin:
+            t0 = time.perf_counter()
+            try:
+                r = s.request(metodo, url, json=cuerpo, timeout=(2, 10))
+                ok = r.status_code < 400
+            except requests.RequestException:
+                ok = False
+            if ok:
+                propias.append(time.perf_counter() - t0)
+            else:
+                fallas += 1
+        with lock:
+            latencias.extend(propias)
+            errores[0] += fallas
+
+    hilos = [threading.Thread(target=cliente) for _ in range(concurrencia)]
+    t_inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    transcurrido = time.perf_counter() - t_inicio
+
+    return {
+        "servicio": nombre,
+        "ok": len(latencias),
+        "errores": errores[0],
+        "rps": len(latencias) / transcurrido if transcurrido else 0.0,
+        "p50_ms": _percentil(latencias, 50) * 1000,
+        "p99_ms": _percentil(latencias, 99) * 1000,
+        "media_ms": (statistics.fmean(latencias) * 1000) if latencias else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de los microservicios NUAMX.")
+    parser.add_argument("servicios", nargs="*", metavar="servicio",
+                        help=f"Uno o más de: {', '.join(sorted(OBJETIVOS))} (por defecto: {', '.join(POR_DEFECTO)}).")
+    parser.add_argument("-d", "--duracion", type=float, default=10.0, help="Segundos por servicio.")
+    parser.add_argument("-c", "--concurrencia", type=int, default=16, help="Clientes simultáneos.")
+    args = parser.parse_args()
+    desconocidos = [s for s in args.servicios if s not in OBJETIVOS]
+    if desconocidos:
+        parser.error(f"servicio(s) desconocido(s): {', '.join(desconocidos)}")
+
+    print(f"{'servicio':<16}{'ok':>9}{'errores':>9}{'req/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for nombre in args.servicios or POR_DEFECTO:
+        r = medir(nombre, args.duracion, args.concurrencia)
+        print(f"{r['servicio']:<16}{r['ok']:>9}{r['errores']:>9}{r['rps']:>10.1f}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# probar_login.py — benchmark del login (POST /api/token/) bajo concurrencia
+#
+# Uso (con Django corriendo, p.ej. `gunicorn core.asgi:application -c gunicorn_asgi.py`):
+#   python probar_login.py --email demo@nuamx.cl --password 'Clave123!'
+#   python probar_login.py --email demo@nuamx.cl --password 'Clave123!' -d 20 -c 32
+#
+# Reporta logins/seg, p50 y p99. El costo lo domina el hash de la contraseña:
+# comparar corridas con PASSWORD_HASHER_PROFILE=alto|medio (ver core/settings.py).
+# Con --mal-password mide el camino de credenciales inválidas (mismo costo de hash).
+# Los 429 (throttle de login) se cuentan aparte: si aparece alguno la medición no
+# es del hash sino del límite, y el script termina con código 1
+# (levantar Django con LOGIN_THROTTLE_IP=0 y LOGIN_THROTTLE_IDENTIFICADOR=0).
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+import requests
+
+from probar_carga_microservicios import _percentil
+
+
+def medir(url: str, cuerpo: dict, duracion: float, concurrencia: int, esperado: int) -> dict:
+    latencias = []
+    errores = [0]
+    limitados = [0]
+    lock = threading.Lock()
+    fin = time.perf_counter() + duracion
+
+    def cliente():
+        s = requests.Session()
+        propias, fallas, rechazos = [], 0, 0
+        while time.perf_counter() < fin:
+            t0 = time.perf_counter()
+            try:
+                status = s.post(url, json=cuerpo, timeout=(2, 30)).status_code
+            except requests.RequestException:
+                status = None
+            if status == esperado:
+                propias.append(time.perf_counter() - t0)
+            elif status == 429:
+                rechazos += 1
+            else:
+                fallas += 1
+        with lock:
+            latencias.extend(propias)
+            errores[0] += fallas
+            limitados[0] += rechazos
+
+    hilos = [threading.Thread(target=cliente) for _ in range(concurrencia)]
+    t_inicio = time.perf_counter()
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    transcurrido = time.perf_counter() - t_inicio
+
+    return {
+        "ok": len(latencias),
+        "errores": errores[0],
+        "429": limitados[0],
+        "rps": len(latencias) / transcurrido if transcurrido else 0.0,
+        "p50_ms": _percentil(latencias, 50) * 1000,
+        "p99_ms": _percentil(latencias, 99) * 1000,
+        "media_ms": (statistics.fmean(latencias) * 1000) if latencias else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del login JWT de NUAMX.")
+    parser.add_argument("--url", default=os.getenv("DJANGO_URL", "http://127.0.0.1:8000").rstrip("/") + "/api/token/")
+    parser.add_argument("--email", required=True, help="Email (o username) de un usuario existente.")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--mal-password", action="store_true", help="Medir logins fallidos (espera HTTP 400).")
+    parser.add_argument("-d", "--duracion", type=float, default=10.0, help="Segundos de prueba.")
+    parser.add_argument("-c", "--concurrencia", type=int, default=16, help="Clientes simultáneos.")
+    args = parser.parse_args()
+
+    password = args.password + "-incorrecta" if args.mal_password else args.password
+    esperado = 400 if args.mal_password else 200
+    r = medir(args.url, {"email": args.email, "password": password}, args.duracion, args.concurrencia, esperado)
+
+    print(f"{'ok':>8}{'errores':>9}{'429':>7}{'login/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'media ms':>10}")
+    print(
+        f"{r['ok']:>8}{r['errores']:>9}{r['429']:>7}{r['rps']:>10.1f}"
+        f"{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['media_ms']:>10.1f}"
+    )
+    if r["429"]:
+        print(
+            f"[LOGIN] {r['429']} respuestas 429: el throttle de login limitó la prueba y los números no sirven. "
+            "Levanta Django con LOGIN_THROTTLE_IP=0 y LOGIN_THROTTLE_IDENTIFICADOR=0."
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# servir_microservicio.py — launcher de producción para los microservicios Flask
+#
+# Uso:
+#   python servir_microservicio.py envios
+#   python servir_microservicio.py tributario --workers 4 --threads 8
+#   python servir_microservicio.py auditoria --threads 16 --kafka
+#
+# Servidor:
+#   - gunicorn (Linux/macOS): N procesos worker, cada uno con M hilos (gthread).
+#   - waitress (Windows o sin gunicorn): 1 proceso con M hilos.
+#   - werkzeug: último recurso, 1 proceso multihilo SIN debugger.
+#
+# Apagado ordenado: al recibir SIGTERM/SIGINT el servicio marca /ready en 503,
+# espera --drain-seconds para que el balanceador lo saque, y luego deja terminar
+# los requests en curso (hasta --graceful-timeout) antes de cerrar.
+
+import argparse
+import importlib.util
+import math
+import os
+import signal
+import sys
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+# nombre → (carpeta, puerto por defecto)
+SERVICIOS = {
+    "envios": ("microservicio_envios", 5000),
+    "auditoria": ("microservicio_auditoria", 5001),
+    "tributario": ("microservicio_tributario", 5002),
+}
+
+# Auditoría guarda los eventos en memoria: con más de un proceso cada worker
+# tendría su propia lista. Escala solo con hilos.
+SERVICIOS_UN_PROCESO = {"auditoria"}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def cargar_app(servicio: str):
+    carpeta, _ = SERVICIOS[servicio]
+    path = BASE_DIR / carpeta / "app.py"
+    spec = importlib.util.spec_from_file_location(f"{carpeta}.app", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def _elegir_servidor(preferido: str) -> str:
+    if preferido != "auto":
+        return preferido
+    if os.name != "nt":
+        try:
+            import gunicorn  # noqa: F401
+            return "gunicorn"
+        except ImportError:
+            pass
+    try:
+        import waitress  # noqa: F401
+        return "waitress"
+    except ImportError:
+        return "werkzeug"
+
+
+def _iniciar_extras(module, args) -> None:
+    if args.kafka:
+        if hasattr(module, "iniciar_consumer_kafka"):
+            module.iniciar_consumer_kafka()
+        else:
+            print(f"[SERVE] {args.servicio} no tiene modo Kafka; se ignora --kafka.")
+
+
+def _instalar_drenado(app, args, cerrar) -> None:
+    """SIGTERM/SIGINT → /ready en 503, espera drain_seconds y llama a `cerrar`."""
+    def _handler(signum, frame):
+        if app.config.get("DRAINING"):
+            return
+        print(f"[SERVE] Señal {signum}: drenando {args.drain_seconds}s antes de cerrar...")
+        app.config["DRAINING"] = True
+
+        def _cerrar():
+            time.sleep(args.drain_seconds)
+            cerrar()
+
+        threading.Thread(target=_cerrar, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _handler)
+    signal.signal(signal.SIGINT, _handler)
+
+
+def servir_gunicorn(module, args) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    app = module.app
+
+    def post_worker_init(worker):
+        # Los hilos (p.ej. consumer Kafka) no sobreviven al fork: se crean en el worker.
+        _iniciar_extras(module, args)
+        prev = signal.getsignal(signal.SIGTERM)
+
+        def _drain(signum, frame):
+            # El handler de gunicorn (worker.alive = False) deja de aceptar conexiones:
+            # se llama recién después de drain_seconds, desde un hilo para no bloquear
+            # el loop del worker, que sigue atendiendo mientras /ready responde 503.
+            if app.config.get("DRAINING"):
+                return
+            app.config["DRAINING"] = True
+            print(f"[SERVE] Worker {os.getpid()}: drenando {args.drain_seconds}s antes de cerrar...")
+
+            def _cerrar():
+                time.sleep(args.drain_seconds)
+                if callable(prev):
+                    prev(signum, frame)
+
+            threading.Thread(target=_cerrar, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, _drain)
+
+    class _App(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{args.host}:{args.port}")
+            self.cfg.set("workers", args.workers)
+            self.cfg.set("threads", args.threads)
+            self.cfg.set("worker_class", "gthread" if args.threads > 1 else "sync")
+            # El arbiter mata a los workers pasado graceful_timeout desde el SIGTERM:
+            # debe cubrir el drenado más los requests en curso.
+            self.cfg.set("graceful_timeout", args.graceful_timeout + math.ceil(args.drain_seconds))
+            self.cfg.set("timeout", args.timeout)
+            self.cfg.set("keepalive", 5)
+            self.cfg.set("post_worker_init", post_worker_init)
+            self.cfg.set("accesslog", "-" if args.access_log else None)
+
+        def load(self):
+            return app
+
+    _App().run()
+
+
+def servir_waitress(module, args) -> None:
+    from waitress import create_server
+
+    app = module.app
+    server = create_server(
+        app,
+        host=args.host,
+        port=args.port,
+        threads=args.threads,
+        channel_timeout=args.timeout,
+    )
+    _iniciar_extras(module, args)
+    _instalar_drenado(app, args, server.close)
+    try:
+        server.run()
+    except OSError:
+        # close() desde otro hilo interrumpe el loop con EBADF
+        pass
+
+
+def servir_werkzeug(module, args) -> None:
+    from werkzeug.serving import make_server
+
+    app = module.app
+    server = make_server(args.host, args.port, app, threaded=True)
+    _iniciar_extras(module, args)
+    _instalar_drenado(app, args, server.shutdown)
+    server.serve_forever()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Sirve un microservicio NUAMX con un servidor WSGI de producción.")
+    parser.add_argument("servicio", choices=sorted(SERVICIOS))
+    parser.add_argument("--host", default=os.getenv("MICROSERVICIO_HOST") or "127.0.0.1")
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=_env_int("MICROSERVICIO_WORKERS", min(4, (os.cpu_count() or 1) * 2)))
+    parser.add_argument("--threads", type=int, default=_env_int("MICROSERVICIO_THREADS", 8))
+    parser.add_argument("--server", choices=("auto", "gunicorn", "waitress", "werkzeug"), default=os.getenv("MICROSERVICIO_SERVER") or "auto")
+    parser.add_argument("--timeout", type=int, default=30, help="Timeout por request/worker (s).")
+    parser.add_argument("--graceful-timeout", type=int, default=20, help="Tiempo para terminar requests en curso al apagar (s).")
+    parser.add_argument("--drain-seconds", type=float, default=float(os.getenv("MICROSERVICIO_DRAIN_SECONDS") or 0), help="Espera con /ready en 503 antes de cerrar.")
+    parser.add_argument("--kafka", action="store_true", help="(auditoría) ingesta desde Kafka junto a la API.")
+    parser.add_argument("--access-log", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.port is None:
+        args.port = SERVICIOS[args.servicio][1]
+    if args.servicio in SERVICIOS_UN_PROCESO and args.workers != 1:
+        print(f"[SERVE] {args.servicio} guarda estado en memoria: se fuerza --workers 1 (escala con --threads).")
+        args.workers = 1
+
+    servidor = _elegir_servidor(args.server)
+    if servidor != "gunicorn" and args.workers > 1:
+        print(f"[SERVE] {servidor} corre en un solo proceso; se ignora --workers {args.workers}.")
+
+    module = cargar_app(args.servicio)
+    print(f"[SERVE] {args.servicio} en http://{args.host}:{args.port} "
+          f"servidor={servidor} workers={args.workers} threads={args.threads}")
+
+    if servidor == "gunicorn":
+        servir_gunicorn(module, args)
+    elif servidor == "waitress":
+        servir_waitress(module, args)
+    else:
+        servir_werkzeug(module, args)
+
+
+if __name__ == "__main__":
+    main()
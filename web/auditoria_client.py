@@ -0,0 +1,271 @@
+# web/auditoria_client.py — cliente con buffer hacia el microservicio de auditoría
+
+import atexit
+import json
+import os
+import queue
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin flock, cada proceso usa su propio archivo de spill
+    fcntl = None
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from api.kafka_client import publicar_evento_auditoria
+
+
+# ========================= CONFIG =========================
+# Igual que en api/kafka_client.py: todo se puede ajustar por variables de entorno.
+
+AUDITORIA_URL = (os.getenv("AUDITORIA_URL") or "http://127.0.0.1:5001").strip().rstrip("/")
+AUDITORIA_BATCH_SIZE = int(os.getenv("AUDITORIA_BATCH_SIZE") or "100")
+AUDITORIA_FLUSH_SECONDS = float(os.getenv("AUDITORIA_FLUSH_SECONDS") or "2")
+AUDITORIA_QUEUE_MAX = int(os.getenv("AUDITORIA_QUEUE_MAX") or "10000")
+AUDITORIA_SPILL_PATH = (
+    os.getenv("AUDITORIA_SPILL_PATH")
+    or os.path.join(tempfile.gettempdir(), "nuamx_auditoria_spill.ndjson")
+).strip()
+AUDITORIA_SPILL_MAX_EVENTS = int(os.getenv("AUDITORIA_SPILL_MAX_EVENTS") or "50000")
+AUDITORIA_TIMEOUT = (2, 5)  # (connect, read)
+# "http" (default): POST por lotes al microservicio. "kafka": el hilo del buffer
+# publica en el topic de auditoría (ver api/kafka_client.py) y usa HTTP solo si
+# no hay producer; requiere el microservicio con --kafka para que alguien lo lea.
+AUDITORIA_TRANSPORT = (os.getenv("AUDITORIA_TRANSPORT") or "http").strip().lower()
+
+
+class AuditoriaBuffer:
+    """
+    Encola eventos en memoria y los envía por lotes desde un hilo de fondo
+    a Kafka (transporte "kafka") o a POST /auditoria/eventos/batch,
+    reutilizando una sesión keep-alive. El request de Django nunca toca la red.
+
+    Si el microservicio no responde, el lote se guarda en un archivo NDJSON
+    local (acotado a `spill_max_events`, se descartan los más antiguos) y se
+    reintenta en el siguiente envío exitoso. Nunca lanza excepción hacia Django.
+    """
+
+    def __init__(
+        self,
+        base_url=AUDITORIA_URL,
+        batch_size=AUDITORIA_BATCH_SIZE,
+        flush_seconds=AUDITORIA_FLUSH_SECONDS,
+        queue_max=AUDITORIA_QUEUE_MAX,
+        spill_path=AUDITORIA_SPILL_PATH,
+        spill_max_events=AUDITORIA_SPILL_MAX_EVENTS,
+        transporte=AUDITORIA_TRANSPORT,
+    ):
+        self.base_url = base_url
+        self.transporte = transporte
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        # El archivo lo comparten los workers del servidor: se protege con flock
+        # sobre "<spill>.lock"; sin fcntl, un archivo por proceso.
+        self.spill_path = spill_path if fcntl else f"{spill_path}.{os.getpid()}"
+        self.spill_max_events = spill_max_events
+
+        self._queue = queue.Queue(maxsize=queue_max)
+        self._spill_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._session = None
+
+    # ---------------- API pública ----------------
+    def encolar(self, evento: dict) -> None:
+        """Agrega un evento a la cola sin bloquear el request."""
+        self._ensure_started()
+        evento = dict(evento)
+        evento.setdefault("ocurrido_en", datetime.now(timezone.utc).isoformat())
+        try:
+            self._queue.put_nowait(evento)
+        except queue.Full:
+            # Cola llena: directo al archivo local antes que perderlo
+            self._spill([evento])
+
+    def flush(self) -> None:
+        """Envía todo lo pendiente (usado al cerrar el proceso)."""
+        while True:
+            lote = self._drain(self.batch_size)
+            if not lote:
+                break
+            self._enviar_o_derramar(lote)
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_seconds + 5)
+        self.flush()
+
+    # ---------------- Internos ----------------
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="auditoria-buffer", daemon=True)
+            self._thread.start()
+
+    def _get_session(self) -> requests.Session:
+        if self._session is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            s.mount("http://", adapter)
+            s.mount("https://", adapter)
+            self._session = s
+        return self._session
+
+    def _drain(self, maximo: int) -> list:
+        lote = []
+        while len(lote) < maximo:
+            try:
+                lote.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                primero = self._queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                # Sin tráfico: aprovechamos para vaciar lo derramado
+                self._reenviar_derramados()
+                continue
+            lote = [primero] + self._drain(self.batch_size - 1)
+            self._enviar_o_derramar(lote)
+
+    def _post_batch(self, lote: list) -> bool:
+        try:
+            resp = self._get_session().post(
+                f"{self.base_url}/auditoria/eventos/batch",
+                json={"eventos": lote},
+                timeout=AUDITORIA_TIMEOUT,
+            )
+            return resp.status_code < 300
+        except Exception as e:
+            print(f"[AUDITORIA] Error enviando lote de {len(lote)} eventos: {e!r}")
+            return False
+
+    def _publicar_kafka(self, lote: list) -> list:
+        """Publica en Kafka; devuelve los eventos que quedaron sin publicar (sin producer)."""
+        for i, evento in enumerate(lote):
+            # Un error de entrega llega después, desde el hilo del producer: al spill
+            if not publicar_evento_auditoria(evento, al_fallar=lambda ev, exc: self._spill([ev])):
+                return lote[i:]
+        return []
+
+    def _enviar_o_derramar(self, lote: list) -> None:
+        if self.transporte == "kafka":
+            lote = self._publicar_kafka(lote)
+            if not lote:
+                return
+        if self._post_batch(lote):
+            self._reenviar_derramados()
+        else:
+            self._spill(lote)
+
+    @contextmanager
+    def _bloqueo_spill(self):
+        """Exclusión sobre el archivo de spill entre hilos y entre procesos."""
+        with self._spill_lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.spill_path + ".lock", "a") as fh:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _spill(self, eventos: list, al_principio: bool = False) -> None:
+        """
+        Guarda eventos en el archivo local, respetando el máximo configurado.
+        al_principio=True los pone antes de lo ya guardado (reenvíos fallidos).
+        """
+        with self._bloqueo_spill():
+            try:
+                existentes = self._leer_spill()
+                todos = eventos + existentes if al_principio else existentes + eventos
+                if len(todos) > self.spill_max_events:
+                    descartados = len(todos) - self.spill_max_events
+                    print(f"[AUDITORIA] Spill lleno: se descartan {descartados} eventos antiguos.")
+                    todos = todos[-self.spill_max_events:]
+                self._escribir_spill(todos)
+            except Exception as e:
+                print(f"[AUDITORIA] No se pudo escribir el spill local: {e!r}")
+
+    def _reenviar_derramados(self) -> None:
+        # Se toma el archivo completo bajo el lock y se envía sin él: los POST
+        # pueden tardar y otros hilos/procesos necesitan derramar mientras tanto.
+        with self._bloqueo_spill():
+            try:
+                pendientes = self._leer_spill()
+                self._escribir_spill([])
+            except Exception as e:
+                print(f"[AUDITORIA] No se pudo leer el spill local: {e!r}")
+                return
+        while pendientes:
+            lote = pendientes[: self.batch_size]
+            if not self._post_batch(lote):
+                self._spill(pendientes, al_principio=True)
+                return
+            pendientes = pendientes[self.batch_size:]
+
+    def _leer_spill(self) -> list:
+        if not os.path.exists(self.spill_path):
+            return []
+        eventos = []
+        with open(self.spill_path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if line:
+                    try:
+                        eventos.append(json.loads(line))
+                    except ValueError:
+                        continue
+        return eventos
+
+    def _escribir_spill(self, eventos: list) -> None:
+        if not eventos:
+            if os.path.exists(self.spill_path):
+                os.remove(self.spill_path)
+            return
+        tmp = self.spill_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            for e in eventos:
+                fh.write(json.dumps(e, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.spill_path)
+
+
+_buffer: AuditoriaBuffer | None = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> AuditoriaBuffer:
+    """Crea (lazy) y reutiliza el buffer del proceso."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = AuditoriaBuffer()
+                atexit.register(_buffer.close)
+    return _buffer
+
+
+def enviar_evento_auditoria(payload: dict) -> None:
+    """
+    Encola un evento de auditoría; el hilo del buffer lo publica por Kafka o
+    HTTP según AUDITORIA_TRANSPORT. No bloquea ni rompe el flujo de Django.
+    """
+    try:
+        get_buffer().encolar(payload)
+    except Exception as e:
+        print(f"[AUDITORIA] Error al encolar evento: {e!r}")
@@ -0,0 +1,347 @@
+# web/microservicios_client.py — cliente compartido hacia los microservicios Flask
+#
+# - Una sesión keep-alive por proceso con pool de conexiones.
+# - Timeouts estrictos (connect, read): un microservicio colgado no retiene workers.
+# - Reintentos con backoff exponencial y jitter para errores de red / 5xx,
+#   dentro de un plazo total por llamada (DEADLINE).
+# - Copia cacheada compartida con revalidación condicional (ETag) y
+#   stale-while-revalidate: si la copia venció hace poco se entrega y se
+#   refresca en segundo plano; si el microservicio falla se entrega la última
+#   copia buena (stale-if-error).
+# - Variantes async (prefijo `a`) para las vistas ASGI, con httpx si está instalado.
+
+import asyncio
+import contextlib
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from core.lazy_imports import lazy_import
+
+# httpx es opcional: sin él, las variantes async delegan al cliente sync en un hilo.
+# Diferido: se carga con el primer request async (importarlo arrastra click y pygments).
+httpx = lazy_import("httpx", optional=True)
+
+
+# ========================= CONFIG =========================
+INDICADORES_URL = getattr(settings, "INDICADORES_URL", "http://127.0.0.1:5000")
+AUDITORIA_URL = getattr(settings, "AUDITORIA_URL", "http://127.0.0.1:5001")
+TRIBUTARIO_URL = getattr(settings, "TRIBUTARIO_URL", "http://127.0.0.1:5002")
+
+# Alias de CACHES compartido entre workers (ver core/settings.py)
+CACHE_ALIAS = getattr(settings, "MICROSERVICIOS_CACHE_ALIAS", "microservicios")
+# Tope de frescura local aunque el microservicio anuncie un max-age mayor
+CACHE_TTL_MAX = int(getattr(settings, "MICROSERVICIOS_CACHE_TTL", 300))
+# Ventana tras vencer en la que se entrega la copia y se revalida en segundo plano
+CACHE_SWR_SECONDS = int(getattr(settings, "MICROSERVICIOS_CACHE_SWR", 60))
+# Cuánto se guarda la copia para revalidarla o usarla si el microservicio cae
+CACHE_KEEP_SECONDS = 24 * 60 * 60
+
+TIMEOUT = (
+    float(getattr(settings, "MICROSERVICIOS_CONNECT_TIMEOUT", 1.0)),
+    float(getattr(settings, "MICROSERVICIOS_READ_TIMEOUT", 3.0)),
+)
+RETRIES = int(getattr(settings, "MICROSERVICIOS_RETRIES", 2))
+# Plazo total de una llamada con sus reintentos: ningún intento ni espera lo excede
+DEADLINE = float(getattr(settings, "MICROSERVICIOS_DEADLINE", 5.0))
+BACKOFF_BASE = float(getattr(settings, "MICROSERVICIOS_BACKOFF", 0.1))
+POOL_SIZE = int(getattr(settings, "MICROSERVICIOS_POOL_SIZE", 20))
+
+_RETRY_STATUS = {502, 503, 504}
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_refreshing: set[str] = set()
+_refreshing_lock = threading.Lock()
+# Bajo ASGI el loop es único: un AsyncClient por hilo/loop que se reutiliza.
+# Bajo WSGI cada request async corre en un loop nuevo que se cierra al responder,
+# así que cada llamada abre y cierra su propio cliente (ver _cliente_async).
+SERVIDOR_ASGI = getattr(settings, "SERVIDOR_ASGI", False)
+_async_local = threading.local()
+
+
+# ========================= HELPERS =========================
+def get_session() -> requests.Session:
+    """Crea (lazy) y reutiliza la sesión keep-alive del proceso."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                s = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                _session = s
+    return _session
+
+
+def _timeout_restante(limite: float) -> tuple[float, float]:
+    """(connect, read) acotados a lo que queda del plazo de la llamada."""
+    restante = max(limite - time.monotonic(), 0.001)
+    return min(TIMEOUT[0], restante), min(TIMEOUT[1], restante)
+
+
+def _sin_reintento(intento: int, espera: float, limite: float) -> bool:
+    """True si no quedan reintentos o la espera ya consumiría el plazo."""
+    return intento >= RETRIES or time.monotonic() + espera >= limite
+
+
+def get_con_reintentos(url: str, params=None, headers=None) -> requests.Response:
+    """
+    GET con timeouts estrictos y hasta RETRIES reintentos ante errores de
+    conexión, timeouts o 502/503/504, todo dentro de DEADLINE segundos.
+    Espera entre intentos con "full jitter": uniforme entre 0 y
+    BACKOFF_BASE * 2**intento.
+    """
+    limite = time.monotonic() + DEADLINE
+    intento = 0
+    while True:
+        resp, error = None, None
+        try:
+            resp = get_session().get(url, params=params, headers=headers, timeout=_timeout_restante(limite))
+            if resp.status_code not in _RETRY_STATUS:
+                return resp
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            error = e
+        espera = random.uniform(0, BACKOFF_BASE * (2 ** intento))
+        if _sin_reintento(intento, espera, limite):
+            if error is not None:
+                raise error
+            return resp
+        time.sleep(espera)
+        intento += 1
+
+
+def _max_age(resp) -> int:
+    """Lee max-age del Cache-Control del microservicio (0 si no viene)."""
+    for part in (resp.headers.get("Cache-Control") or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name.lower() == "max-age":
+            try:
+                return max(0, int(value))
+            except ValueError:
+                return 0
+    return 0
+
+
+def _headers_condicionales(entry) -> dict:
+    headers = {}
+    if entry:
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def _nueva_entrada(resp, entry, data, ttl_max: int) -> dict:
+    ttl = min(_max_age(resp), ttl_max)
+    return {
+        "data": data,
+        "etag": resp.headers.get("ETag") or (entry or {}).get("etag"),
+        "last_modified": resp.headers.get("Last-Modified") or (entry or {}).get("last_modified"),
+        "fresh_until": time.time() + ttl,
+    }
+
+
+def _revalidar(url: str, key: str, entry, params, ttl_max: int):
+    """GET (condicional si hay copia) y actualización del cache (salvo ttl_max=0). Devuelve los datos."""
+    resp = get_con_reintentos(url, params=params, headers=_headers_condicionales(entry))
+
+    if resp.status_code == 304 and entry:
+        data = entry["data"]
+    else:
+        resp.raise_for_status()
+        data = resp.json()
+
+    if ttl_max > 0:
+        caches[CACHE_ALIAS].set(key, _nueva_entrada(resp, entry, data, ttl_max), timeout=CACHE_KEEP_SECONDS)
+    return data
+
+
+def _revalidar_en_segundo_plano(url: str, key: str, entry, params, ttl_max: int) -> None:
+    """Lanza una sola revalidación por clave a la vez; los errores solo se loguean."""
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def _run():
+        try:
+            _revalidar(url, key, entry, params, ttl_max)
+        except Exception as e:
+            print(f"[MICROSERVICIOS] Revalidación en segundo plano falló para {url}: {e!r}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=_run, name=f"swr:{key}", daemon=True).start()
+
+
+def obtener_json_cacheado(url: str, cache_key: str | None, params=None, ttl_max: int = CACHE_TTL_MAX):
+    """
+    GET de un recurso JSON a través del cache compartido.
+
+    - Copia fresca → se devuelve sin llamar al microservicio.
+    - Copia vencida hace menos de CACHE_SWR_SECONDS → se devuelve y se
+      revalida en segundo plano.
+    - Copia más vieja o sin copia → GET condicional en línea; si falla y hay
+      una copia anterior, se devuelve esa (última respuesta buena).
+
+    Con ttl_max=0 es un GET en vivo: ni lee ni escribe el cache (escribir una
+    copia por cada combinación de filtros solo llenaría el disco), así que
+    cache_key puede ser None.
+    Sin respaldo, los errores se propagan como excepciones de `requests`.
+    """
+    key = f"ms:{cache_key}"
+    entry = caches[CACHE_ALIAS].get(key) if ttl_max > 0 else None
+    now = time.time()
+
+    if entry and now < entry["fresh_until"]:
+        return entry["data"]
+
+    if entry and ttl_max > 0 and now < entry["fresh_until"] + CACHE_SWR_SECONDS:
+        _revalidar_en_segundo_plano(url, key, entry, params, ttl_max)
+        return entry["data"]
+
+    try:
+        return _revalidar(url, key, entry, params, ttl_max)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        if entry:
+            print(f"[MICROSERVICIOS] {url} no disponible ({e!r}); se usa la última respuesta buena.")
+            return entry["data"]
+        raise
+
+
+# ========================= RECURSOS =========================
+def obtener_indicadores():
+    return obtener_json_cacheado(f"{INDICADORES_URL}/indicadores", "indicadores")
+
+
+def obtener_parametros_tributarios():
+    return obtener_json_cacheado(f"{TRIBUTARIO_URL}/tributario/parametros", "tributario:parametros")
+
+
+def obtener_eventos_auditoria(params: dict):
+    """Una página de eventos de auditoría, siempre en vivo (sin cache)."""
+    return obtener_json_cacheado(f"{AUDITORIA_URL}/auditoria/eventos", None, params=params, ttl_max=0)
+
+
+# ========================= ASYNC (vistas ASGI) =========================
+def _nuevo_async_client():
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(TIMEOUT[1], connect=TIMEOUT[0]),
+        limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+    )
+
+
+def _get_async_client():
+    loop = asyncio.get_running_loop()
+    client = getattr(_async_local, "client", None)
+    if client is None or getattr(_async_local, "loop", None) is not loop or client.is_closed:
+        client = _nuevo_async_client()
+        _async_local.client = client
+        _async_local.loop = loop
+    return client
+
+
+@contextlib.asynccontextmanager
+async def _cliente_async():
+    """Cliente compartido bajo ASGI; bajo WSGI uno por llamada, cerrado al salir."""
+    if SERVIDOR_ASGI:
+        yield _get_async_client()
+        return
+    async with _nuevo_async_client() as client:
+        yield client
+
+
+async def aget_con_reintentos(url: str, params=None, headers=None):
+    """
+    Igual que get_con_reintentos (mismo plazo DEADLINE) pero sin bloquear el
+    event loop. Los errores de transporte se re-lanzan como excepciones de
+    `requests` para que las vistas manejen una sola familia de errores.
+    """
+    limite = time.monotonic() + DEADLINE
+    intento = 0
+    async with _cliente_async() as client:
+        while True:
+            resp, error = None, None
+            connect, read = _timeout_restante(limite)
+            try:
+                resp = await client.get(
+                    url, params=params, headers=headers, timeout=httpx.Timeout(read, connect=connect),
+                )
+                if resp.status_code not in _RETRY_STATUS:
+                    return resp
+            except httpx.TimeoutException as e:
+                error = requests.exceptions.Timeout(str(e))
+                error.__cause__ = e
+            except httpx.TransportError as e:
+                error = requests.exceptions.ConnectionError(str(e))
+                error.__cause__ = e
+            espera = random.uniform(0, BACKOFF_BASE * (2 ** intento))
+            if _sin_reintento(intento, espera, limite):
+                if error is not None:
+                    raise error
+                return resp
+            await asyncio.sleep(espera)
+            intento += 1
+
+
+async def _arevalidar(url: str, key: str, entry, params, ttl_max: int):
+    resp = await aget_con_reintentos(url, params=params, headers=_headers_condicionales(entry))
+
+    if resp.status_code == 304 and entry:
+        data = entry["data"]
+    else:
+        if resp.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{resp.status_code} para {url}")
+        data = resp.json()
+
+    if ttl_max > 0:
+        await caches[CACHE_ALIAS].aset(key, _nueva_entrada(resp, entry, data, ttl_max), timeout=CACHE_KEEP_SECONDS)
+    return data
+
+
+async def aobtener_json_cacheado(url: str, cache_key: str | None, params=None, ttl_max: int = CACHE_TTL_MAX):
+    """Versión async de obtener_json_cacheado (mismas reglas de cache y respaldo)."""
+    if httpx is None:
+        return await sync_to_async(obtener_json_cacheado)(url, cache_key, params=params, ttl_max=ttl_max)
+
+    key = f"ms:{cache_key}"
+    entry = await caches[CACHE_ALIAS].aget(key) if ttl_max > 0 else None
+    now = time.time()
+
+    if entry and now < entry["fresh_until"]:
+        return entry["data"]
+
+    if entry and ttl_max > 0 and now < entry["fresh_until"] + CACHE_SWR_SECONDS:
+        # Hilo y no task: bajo WSGI el loop del request se cierra al responder
+        _revalidar_en_segundo_plano(url, key, entry, params, ttl_max)
+        return entry["data"]
+
+    try:
+        return await _arevalidar(url, key, entry, params, ttl_max)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        if entry:
+            print(f"[MICROSERVICIOS] {url} no disponible ({e!r}); se usa la última respuesta buena.")
+            return entry["data"]
+        raise
+
+
+async def aobtener_indicadores():
+    return await aobtener_json_cacheado(f"{INDICADORES_URL}/indicadores", "indicadores")
+
+
+async def aobtener_parametros_tributarios():
+    return await aobtener_json_cacheado(f"{TRIBUTARIO_URL}/tributario/parametros", "tributario:parametros")
+
+
+async def aobtener_eventos_auditoria(params: dict):
+    return await aobtener_json_cacheado(f"{AUDITORIA_URL}/auditoria/eventos", None, params=params, ttl_max=0)
@@ -1,3 +1,103 @@
-from django.test import TestCase
+import json
+import sys
+from datetime import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from servir_microservicio import cargar_app
+
+from .views import _hasta_exclusivo
+
+
+class AuditoriaMicroservicioTests(SimpleTestCase):
+    """API del microservicio de auditoría (Flask) con el test client: filtros, paginación, lotes y drenado."""
+
+    def setUp(self):
+        # Módulo recién cargado en cada test: la "base de datos" es una lista en memoria
+        self.ms = cargar_app("auditoria")
+        self.addCleanup(sys.modules.pop, "microservicio_auditoria.app", None)
+        self.client = self.ms.app.test_client()
+
+    def _registrar(self, instante: datetime, *eventos):
+        """Registra `eventos` como si el servidor los recibiera en `instante` (UTC)."""
+        with mock.patch.object(self.ms, "datetime") as reloj:
+            reloj.utcnow.return_value = instante
+            resp = self.client.post("/auditoria/eventos/batch", json={"eventos": list(eventos)})
+        self.assertEqual(resp.status_code, 201)
+
+    def _ids(self, **params):
+        resp = self.client.get("/auditoria/eventos", query_string=params)
+        self.assertEqual(resp.status_code, 200)
+        return [e["id"] for e in resp.get_json()["eventos"]]
+
+    def test_filtros_usuario_accion_y_rango(self):
+        self._registrar(datetime(2025, 3, 1, 10), {"usuario": "ana", "accion": "LOGIN"}, {"usuario": "beto", "accion": "LOGIN"})
+        self._registrar(datetime(2025, 3, 2, 10), {"usuario": "ana", "accion": "EXPORT"})
+        self._registrar(datetime(2025, 3, 3, 10), {"usuario": "ana", "accion": "LOGIN"})
+
+        self.assertEqual(self._ids(), [4, 3, 2, 1])  # del más reciente al más antiguo
+        self.assertEqual(self._ids(usuario="ana"), [4, 3, 1])
+        self.assertEqual(self._ids(accion="LOGIN"), [4, 2, 1])
+        self.assertEqual(self._ids(usuario="ana", accion="LOGIN"), [4, 1])
+        self.assertEqual(self._ids(desde="2025-03-02"), [4, 3])
+        self.assertEqual(self._ids(hasta="2025-03-02T10:00:00"), [2, 1])  # hasta exclusivo
+        self.assertEqual(self._ids(usuario="ana", desde="2025-03-02", hasta="2025-03-03"), [3])
+        self.assertEqual(self._ids(usuario="nadie"), [])
+
+    def test_hasta_con_fecha_sola_incluye_ese_dia(self):
+        self._registrar(datetime(2025, 3, 31, 23, 59), {"usuario": "ana"})
+        self._registrar(datetime(2025, 4, 1, 0, 0), {"usuario": "ana"})
+
+        self.assertEqual(_hasta_exclusivo("2025-03-31"), "2025-04-01")
+        self.assertEqual(_hasta_exclusivo("2025-03-31T12:00"), "2025-03-31T12:00")
+        self.assertEqual(self._ids(desde="2025-03-31", hasta=_hasta_exclusivo("2025-03-31")), [1])
+
+    def test_cursor_recorre_todas_las_paginas(self):
+        self._registrar(datetime(2025, 3, 1), *({"usuario": "ana", "detalle": str(i)} for i in range(5)))
+        self._registrar(datetime(2025, 3, 1), {"usuario": "beto"})
+
+        vistos, cursor = [], None
+        while True:
+            params = {"usuario": "ana", "limit": 2}
+            if cursor is not None:
+                params["cursor"] = cursor
+            data = self.client.get("/auditoria/eventos", query_string=params).get_json()
+            vistos.append([e["id"] for e in data["eventos"]])
+            cursor = data["siguiente_cursor"]
+            if cursor is None:
+                break
+        self.assertEqual(vistos, [[5, 4], [3, 2], [1]])
+
+    def test_ndjson_en_streaming(self):
+        self._registrar(datetime(2025, 3, 1), {"usuario": "ana", "detalle": "ñandú"}, {"usuario": "beto"}, {"usuario": "ana"})
+
+        resp = self.client.get("/auditoria/eventos", query_string={"usuario": "ana", "formato": "ndjson", "limit": 1})
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.is_streamed)
+        self.assertEqual(resp.mimetype, "application/x-ndjson")
+        lineas = resp.get_data(as_text=True).splitlines()
+        self.assertEqual([json.loads(linea)["id"] for linea in lineas], [3, 1])  # todos, sin paginar
+        self.assertIn("ñandú", lineas[1])
+
+    def test_lote_maximo_y_elementos_que_no_son_objetos(self):
+        with mock.patch.object(self.ms, "LOTE_MAXIMO", 3):
+            resp = self.client.post("/auditoria/eventos/batch", json=[{"usuario": "ana"}] * 4)
+            self.assertEqual(resp.status_code, 413)
+            self.assertEqual(self.ms.eventos_auditoria, [])
+
+            resp = self.client.post("/auditoria/eventos/batch", json={"eventos": [{"usuario": "ana"}, "x", None]})
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.get_json()["registrados"], 1)
+        self.assertEqual(self._ids(), [1])
+
+        resp = self.client.post("/auditoria/eventos/batch", json={"eventos": "no es lista"})
+        self.assertEqual(resp.status_code, 400)
+
+    def test_ready_devuelve_503_al_drenar(self):
+        self.assertEqual(self.client.get("/ready").status_code, 200)
+        self.ms.app.config["DRAINING"] = True
+        resp = self.client.get("/ready")
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.get_json()["status"], "draining")
+        self.assertEqual(self.client.get("/health").status_code, 200)  # sigue vivo mientras drena
@@ -1,12 +1,22 @@
+import asyncio
+from datetime import date, timedelta
+
 from django.shortcuts import render
 import requests  # para hablar con microservicios externos
 
+from .auditoria_client import enviar_evento_auditoria
+from .microservicios_client import (
+    aobtener_eventos_auditoria,
+    aobtener_indicadores,
+    aobtener_parametros_tributarios,
+)
+
 # ============================================================
 # Configuración Microservicios
 # ============================================================
 
-AUDITORIA_URL = "http://127.0.0.1:5001"
-TRIBUTARIO_URL = "http://127.0.0.1:5002"
+# Eventos por página en la vista de auditoría
+AUDITORIA_PAGE_SIZE = 50
 
 
 # ============================================================
@@ -15,19 +25,27 @@ TRIBUTARIO_URL = "http://127.0.0.1:5002"
 
 def registrar_evento_auditoria(usuario, accion, detalle):
     """
-    Envía un evento al microservicio de auditoría.
-    No interrumpe la app si el microservicio está caído.
+    Encola un evento para el microservicio de auditoría.
+    El envío real ocurre por lotes en segundo plano (ver web/auditoria_client.py),
+    así que no agrega latencia al request ni lo interrumpe si el servicio está caído.
+    """
+    enviar_evento_auditoria({
+        "usuario": usuario or "desconocido",
+        "accion": accion or "ACCION_NO_ESPECIFICADA",
+        "detalle": detalle or "",
+    })
+
+
+def _hasta_exclusivo(hasta: str) -> str:
+    """
+    El microservicio compara `hasta` como texto y de forma exclusiva: una
+    fecha sola ("2025-03-31", la del <input type="date">) dejaría fuera ese
+    día completo. Se envía el día siguiente; fechas con hora pasan tal cual.
     """
     try:
-        payload = {
-            "usuario": usuario or "desconocido",
-            "accion": accion or "ACCION_NO_ESPECIFICADA",
-            "detalle": detalle or "",
-        }
-        requests.post(f"{AUDITORIA_URL}/auditoria/evento", json=payload, timeout=2)
-    except Exception:
-        # Evita romper NUAMX si el microservicio no responde
-        pass
+        return (date.fromisoformat(hasta) + timedelta(days=1)).isoformat()
+    except ValueError:
+        return hasta
 
 
 # ============================================================
@@ -104,24 +122,46 @@ def force_password_view(request):
 # Vista Auditoría
 # ============================================================
 
-def auditoria_view(request):
+async def auditoria_view(request):
     """
-    Consulta al microservicio de auditoría y muestra los eventos.
+    Consulta al microservicio de auditoría y muestra UNA página de eventos.
+    Los filtros (usuario, accion, desde, hasta) y el cursor viajan en la query
+    string hacia el microservicio; `hasta` como fecha incluye ese día.
+    Vista async: bajo ASGI no ocupa un hilo mientras espera al microservicio.
     """
     eventos = []
     error = None
+    total = 0
+    siguiente_cursor = None
+
+    params = {"limit": AUDITORIA_PAGE_SIZE}
+    for key in ("usuario", "accion", "desde", "hasta", "cursor"):
+        value = (request.GET.get(key) or "").strip()
+        if value:
+            params[key] = value
+
+    consulta = dict(params)
+    if "hasta" in consulta:
+        consulta["hasta"] = _hasta_exclusivo(consulta["hasta"])
 
     try:
-        resp = requests.get(f"{AUDITORIA_URL}/auditoria/eventos", timeout=3)
-        resp.raise_for_status()
-        data = resp.json()
-        eventos = data.get("eventos", []) if isinstance(data, dict) else data
+        data = await aobtener_eventos_auditoria(consulta)
+        if isinstance(data, dict):
+            eventos = data.get("eventos", [])
+            total = data.get("coincidencias", data.get("total", len(eventos)))
+            siguiente_cursor = data.get("siguiente_cursor")
+        else:
+            eventos = data
     except Exception as e:
         error = str(e)
 
+    filtros = {k: v for k, v in params.items() if k not in ("limit", "cursor")}
     return render(request, "web/auditoria.html", {
         "eventos": eventos,
         "error": error,
+        "total": total,
+        "filtros": filtros,
+        "siguiente_cursor": siguiente_cursor,
     })
 
 
@@ -129,27 +169,35 @@ def auditoria_view(request):
 # Vista Panel Tributario (Tercer Microservicio)
 # ============================================================
 
-def panel_tributario_view(request):
+async def panel_tributario_view(request):
     """
-    Consulta el Microservicio Tributario y muestra parámetros fiscales.
+    Consulta el Microservicio Tributario y muestra parámetros fiscales, junto
+    con los indicadores del día (UF) si el servicio de indicadores responde.
+    Ambos microservicios se consultan en paralelo.
     """
-    try:
-        response = requests.get(f"{TRIBUTARIO_URL}/tributario/parametros", timeout=3)
+    data, indicadores = await asyncio.gather(
+        aobtener_parametros_tributarios(),
+        aobtener_indicadores(),
+        return_exceptions=True,
+    )
 
-        if response.status_code == 200:
-            data = response.json()
-            return render(request, "web/panel_tributario_ms.html", {
-                "conectado": True,
-                "tributario": data
-            })
+    if isinstance(indicadores, BaseException):
+        indicadores = None
 
+    if isinstance(data, requests.exceptions.HTTPError):
         return render(request, "web/panel_tributario_ms.html", {
             "conectado": False,
             "error": "El microservicio respondió con código no válido."
         })
 
-    except Exception as e:
+    if isinstance(data, BaseException):
         return render(request, "web/panel_tributario_ms.html", {
             "conectado": False,
-            "error": str(e)
+            "error": str(data)
         })
+
+    return render(request, "web/panel_tributario_ms.html", {
+        "conectado": True,
+        "tributario": data,
+        "indicadores": indicadores,
+    })